@@ -0,0 +1,212 @@
+"""Content-addressed cache for rendered resume artifacts.
+
+An artifact (rendered HTML or exported PDF) is keyed by a hash of the profile
+fields the templates read, the template id and the template version, so the
+same inputs always map to the same entry and any relevant change maps to a new
+one. Entries live in a small in-memory LRU tier backed by a size-capped
+on-disk tier that evicts the least recently used files. Workers may share the
+disk directory: its contents, not per-process bookkeeping, decide what is
+cached and when the cap is exceeded.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from rendering import RENDER_FIELDS, TEMPLATE_VERSIONS
+
+
+logger = logging.getLogger(__name__)
+
+
+def profile_fingerprint(profile: Mapping[str, Any]) -> str:
+    """Stable hash of the profile fields that influence rendering"""
+    relevant = {field: profile.get(field) for field in RENDER_FIELDS}
+    encoded = json.dumps(relevant, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def artifact_key(profile: Mapping[str, Any], template_id: str) -> str:
+    """Cache key for a profile rendered with a given template and version"""
+    version = TEMPLATE_VERSIONS.get(template_id, 0)
+    raw = f"{template_id}:{version}:{profile_fingerprint(profile)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ArtifactCache:
+    """Two-tier (memory, disk) LRU cache of rendered artifacts"""
+
+    def __init__(self, directory: Path, memory_items: int = 256, disk_max_bytes: int = 512 * 1024 * 1024,
+                 scan_fraction: float = 0.05, touch_interval: float = 60.0):
+        self.directory = Path(directory)
+        self.memory_items = memory_items
+        self.disk_max_bytes = disk_max_bytes
+        # Re-scan the directory after writing this much since the last scan
+        self.scan_after_bytes = max(1, int(disk_max_bytes * scan_fraction))
+        # Memory hits bump the file's mtime at most this often
+        self.touch_interval = touch_interval
+        self._memory: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._touched: Dict[Tuple[str, str], float] = {}
+        self._written_since_scan = 0
+        self._scanning = False
+        # As of the last directory scan plus this worker's writes since;
+        # other workers' writes show up at the next scan
+        self._disk_entries = 0
+        self._disk_bytes = 0
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+        }
+
+    def load(self):
+        """Create the directory and bring it under the size cap"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._scan_and_evict()
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["misses"]
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        return {
+            **self.stats,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_entries": self._disk_entries,
+            "disk_bytes": self._disk_bytes,
+        }
+
+    def _path(self, key: str, kind: str) -> Path:
+        return self.directory / key[:2] / f"{key}.{kind}"
+
+    async def get(self, key: str, kind: str) -> Optional[bytes]:
+        entry = (key, kind)
+        if entry in self._memory:
+            self._memory.move_to_end(entry)
+            self.stats["memory_hits"] += 1
+            data = self._memory[entry]
+            # Disk eviction goes by mtime, so the hottest entries, which are
+            # only ever read from memory, must still look recent on disk
+            now = time.monotonic()
+            if now - self._touched[entry] >= self.touch_interval:
+                self._touched[entry] = now
+                try:
+                    await asyncio.to_thread(os.utime, self._path(key, kind))
+                except OSError:
+                    # Evicted by another worker; the next put writes it again
+                    pass
+            return data
+
+        # The file may have been written by another worker sharing the directory
+        try:
+            data = await asyncio.to_thread(self._read_file, self._path(key, kind))
+        except FileNotFoundError:
+            self.stats["misses"] += 1
+            return None
+        self._remember(entry, data)
+        self.stats["disk_hits"] += 1
+        return data
+
+    async def put(self, key: str, kind: str, data: bytes):
+        self._remember((key, kind), data)
+        path = self._path(key, kind)
+        try:
+            replaced = await asyncio.to_thread(self._write_file, path, data)
+        except OSError as e:
+            logger.warning(f"Could not write artifact {path.name} to disk: {e}")
+            return
+        self.stats["writes"] += 1
+        if replaced is None:
+            self._disk_entries += 1
+        self._disk_bytes += len(data) - (replaced or 0)
+        self._written_since_scan += len(data)
+        if self._written_since_scan >= self.scan_after_bytes and not self._scanning:
+            self._scanning = True
+            try:
+                await asyncio.to_thread(self._scan_and_evict)
+            except OSError as e:
+                logger.warning(f"Artifact cache scan failed: {e}")
+            finally:
+                self._scanning = False
+
+    def _remember(self, entry: Tuple[str, str], data: bytes):
+        self._memory[entry] = data
+        self._memory.move_to_end(entry)
+        # Only called right after the file was read or written
+        self._touched[entry] = time.monotonic()
+        while len(self._memory) > self.memory_items:
+            evicted, _ = self._memory.popitem(last=False)
+            del self._touched[evicted]
+            self.stats["memory_evictions"] += 1
+
+    def _scan_and_evict(self, stale_tmp_seconds: float = 3600):
+        """Measure the directory and delete the least recently used files over the cap.
+
+        The directory is the only shared record of what is cached, so every
+        worker's scan sees the others' files and the cap holds for all of them
+        together. Reads bump a file's mtime (memory hits at most once per
+        ``touch_interval``), so mtime order is recency order.
+        """
+        self._written_since_scan = 0
+        now = time.time()
+        entries = []
+        for path in self.directory.glob("*/*"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if path.suffix == ".tmp":
+                # Left behind by a worker that died mid-write
+                if now - stat.st_mtime > stale_tmp_seconds:
+                    path.unlink(missing_ok=True)
+                continue
+            entries.append((stat.st_mtime, path, stat.st_size))
+
+        total = sum(size for _, _, size in entries)
+        if total > self.disk_max_bytes:
+            entries.sort()
+            evicted = 0
+            for _, path, size in entries:
+                if total <= self.disk_max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                evicted += 1
+            entries = entries[evicted:]
+            self.stats["disk_evictions"] += evicted
+        self._disk_entries = len(entries)
+        self._disk_bytes = total
+
+    @staticmethod
+    def _read_file(path: Path) -> bytes:
+        data = path.read_bytes()
+        # Keep mtime in step with recency; eviction goes by it.
+        os.utime(path)
+        return data
+
+    @staticmethod
+    def _write_file(path: Path, data: bytes) -> Optional[int]:
+        """Write ``data`` to ``path``; the size of the file it replaced, if any"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            replaced = path.stat().st_size
+        except FileNotFoundError:
+            replaced = None
+        # A unique temporary name, so workers writing the same entry do not
+        # write into each other's file; os.replace makes the result atomic
+        with tempfile.NamedTemporaryFile(dir=path.parent, prefix=path.name, suffix=".tmp", delete=False) as tmp:
+            tmp.write(data)
+        try:
+            os.replace(tmp.name, path)
+        except OSError:
+            os.unlink(tmp.name)
+            raise
+        return replaced
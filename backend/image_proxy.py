@@ -0,0 +1,183 @@
+"""Proxy for remote profile pictures and template preview images.
+
+Browsers and the PDF renderer never hotlink LinkedIn or Pexels. An image is
+fetched once per (url, size), resized to the size it is displayed at, encoded
+as both WebP and JPEG and kept in an ``ArtifactCache``; later requests are
+served from there. Only https URLs on allowlisted hosts are fetched and
+redirects are not followed, so the proxy cannot be pointed at arbitrary hosts.
+"""
+import asyncio
+import base64
+import hashlib
+import io
+import logging
+import re
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+from PIL import Image, ImageOps
+
+from artifact_cache import ArtifactCache
+
+
+logger = logging.getLogger(__name__)
+
+# Pixel boxes images are cropped to: "photo" is twice the largest avatar a
+# template shows (96px), "preview" twice the frontend's template card.
+IMAGE_SIZES: Dict[str, Tuple[int, int]] = {
+    "photo": (192, 192),
+    "preview": (640, 384),
+}
+FORMATS = {"webp": "image/webp", "jpeg": "image/jpeg"}
+
+# Refuse to decode anything bigger (decompression bombs)
+MAX_IMAGE_PIXELS = 40_000_000
+
+# One entity tag in an If-None-Match list; commas may appear inside the quotes
+ENTITY_TAG = re.compile(r'(?:W/)?("[^"]*")')
+
+
+class ImageNotAllowed(ValueError):
+    """The URL is not https or its host is not on the allowlist."""
+
+
+class ImageFetchError(Exception):
+    """The upstream image could not be fetched or decoded."""
+
+
+def image_key(url: str, size: str) -> str:
+    return hashlib.sha256(f"{size}:{url}".encode("utf-8")).hexdigest()
+
+
+def image_etag(data: bytes) -> str:
+    return '"' + hashlib.sha256(data).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an ``If-None-Match`` header matches ``etag``.
+
+    The header is ``*`` or a comma-separated list of entity tags, and
+    If-None-Match uses the weak comparison, so ``W/"x"`` matches ``"x"``.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in ENTITY_TAG.findall(if_none_match)
+
+
+def encode_thumbnails(source: bytes, size: str) -> Dict[str, bytes]:
+    """Crop/resize ``source`` to ``size`` and encode it in every format (runs in a thread)"""
+    box = IMAGE_SIZES[size]
+    with Image.open(io.BytesIO(source)) as image:
+        # Opening only reads the header; check before anything is decoded
+        width, height = image.size
+        if width * height > MAX_IMAGE_PIXELS:
+            raise ValueError(f"Image is {width}x{height} pixels, more than {MAX_IMAGE_PIXELS}")
+        # JPEG can decode straight to a smaller scale, which is much cheaper
+        image.draft("RGB", (box[0] * 2, box[1] * 2))
+        image = ImageOps.exif_transpose(image)
+        image = ImageOps.fit(image, box, Image.LANCZOS)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+    encoded = {}
+    buffer = io.BytesIO()
+    image.save(buffer, format="WEBP", quality=80, method=4)
+    encoded["webp"] = buffer.getvalue()
+
+    if image.mode == "RGBA":
+        flattened = Image.new("RGB", image.size, (255, 255, 255))
+        flattened.paste(image, mask=image.getchannel("A"))
+        image = flattened
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=82, optimize=True, progressive=True)
+    encoded["jpeg"] = buffer.getvalue()
+    return encoded
+
+
+class ImageProxy:
+    def __init__(self, cache: ArtifactCache, allowed_hosts: Iterable[str], max_bytes: int = 5 * 1024 * 1024,
+                 timeout: float = 10.0):
+        self.cache = cache
+        self.allowed_hosts = tuple(host.strip().lower() for host in allowed_hosts if host.strip())
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def start(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout, follow_redirects=False)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def allowed(self, url: Optional[str]) -> bool:
+        """Whether ``url`` is https on an allowlisted host (or one of its subdomains)"""
+        if not url:
+            return False
+        parts = urlsplit(url)
+        host = (parts.hostname or "").lower()
+        return parts.scheme == "https" and any(
+            host == allowed or host.endswith("." + allowed) for allowed in self.allowed_hosts
+        )
+
+    async def get(self, url: str, size: str, fmt: str) -> bytes:
+        """The resized image, fetching and encoding it on the first request only"""
+        if not self.allowed(url):
+            raise ImageNotAllowed(url)
+        key = image_key(url, size)
+        data = await self.cache.get(key, fmt)
+        if data is not None:
+            return data
+
+        # Concurrent misses for the same image share one fetch and encode
+        if key not in self._inflight:
+            self._inflight[key] = asyncio.ensure_future(self._build(url, size, key))
+            self._inflight[key].add_done_callback(lambda _: self._inflight.pop(key, None))
+        encoded = await asyncio.shield(self._inflight[key])
+        return encoded[fmt]
+
+    async def data_uri(self, url: Optional[str], size: str) -> Optional[str]:
+        """JPEG ``data:`` URI for embedding in rendered resumes, or None if unavailable"""
+        if not self.allowed(url):
+            return None
+        try:
+            data = await self.get(url, size, "jpeg")
+        except ImageFetchError as e:
+            logger.warning(f"Could not embed image {url}: {e}")
+            return None
+        return "data:image/jpeg;base64," + base64.b64encode(data).decode("ascii")
+
+    async def _build(self, url: str, size: str, key: str) -> Dict[str, bytes]:
+        source = await self._fetch(url)
+        try:
+            encoded = await asyncio.to_thread(encode_thumbnails, source, size)
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            raise ImageFetchError(f"Could not decode image: {e}")
+        for fmt, data in encoded.items():
+            await self.cache.put(key, fmt, data)
+        return encoded
+
+    async def _fetch(self, url: str) -> bytes:
+        if self._client is None:
+            raise RuntimeError("ImageProxy.start() has not been called")
+        try:
+            async with self._client.stream("GET", url) as response:
+                if response.status_code != 200:
+                    raise ImageFetchError(f"Upstream answered {response.status_code}")
+                if not response.headers.get("content-type", "").startswith("image/"):
+                    raise ImageFetchError("Upstream did not return an image")
+                chunks, received = [], 0
+                async for chunk in response.aiter_bytes():
+                    received += len(chunk)
+                    if received > self.max_bytes:
+                        raise ImageFetchError(f"Image is larger than {self.max_bytes} bytes")
+                    chunks.append(chunk)
+        except httpx.HTTPError as e:
+            raise ImageFetchError(f"Fetch failed: {e}")
+        return b"".join(chunks)
@@ -0,0 +1,55 @@
+"""Index bootstrap.
+
+``ensure_indexes`` runs on every startup. ``create_indexes`` is a no-op for
+indexes that already exist with the same spec, so this is safe to call
+repeatedly and from several workers at once.
+"""
+import logging
+from typing import Dict, List
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+
+logger = logging.getLogger(__name__)
+
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "linkedin_profiles": [
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+    ],
+    "resumes": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("generated_at", DESCENDING)], name="user_id_generated_at"),
+        IndexModel([("generated_at", DESCENDING)], name="generated_at"),
+        IndexModel(
+            [("user_id", ASCENDING), ("template_id", ASCENDING), ("content_key", ASCENDING)],
+            name="user_template_content",
+        ),
+    ],
+    "resume_versions": [
+        IndexModel([("user_id", ASCENDING), ("version", DESCENDING)], name="user_id_version_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("hash", ASCENDING)], name="user_id_hash"),
+    ],
+    "status_checks": [
+        IndexModel([("timestamp", ASCENDING), ("id", ASCENDING)], name="timestamp_id"),
+    ],
+}
+
+
+async def ensure_indexes(db) -> bool:
+    """Create every declared index; returns False if any could not be built"""
+    ok = True
+    for collection, models in INDEXES.items():
+        try:
+            await db[collection].create_indexes(models)
+        except DuplicateKeyError as e:
+            ok = False
+            logger.error(
+                f"Unique index on {collection} blocked by duplicate documents ({e}); "
+                f"run 'python migrations.py merge-duplicate-profiles' and restart"
+            )
+        except OperationFailure as e:
+            ok = False
+            logger.error(f"Could not create indexes on {collection}: {e}")
+    return ok
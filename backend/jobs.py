@@ -0,0 +1,441 @@
+"""Background job queue.
+
+Long-running work (resume generation) is enqueued and picked up by a pool of
+worker tasks, so request handlers only create the job and return its id.
+Clients poll the job or subscribe to its progress events.
+
+Two backends are provided: ``InMemoryJobBackend`` for a single process and
+``RedisJobBackend`` for deployments where several workers share a queue.
+Failed jobs are retried with exponential backoff up to ``max_attempts`` and
+then moved to a bounded dead-letter list, from which they can be listed and
+replayed.
+
+A popped job is only acknowledged once it has finished (or been pushed back
+for a retry). Redis keeps unacknowledged jobs in a per-process processing
+list (``BLMOVE``); the lists of processes whose heartbeat has lapsed are put
+back on the queue, so a crash does not lose the jobs it was running.
+"""
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+RETRYING = "retrying"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+TERMINAL_STATES = (SUCCEEDED, FAILED)
+
+Progress = Callable[[str], Awaitable[None]]
+Handler = Callable[[Dict[str, Any], Progress], Awaitable[Any]]
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler for failures that retrying cannot fix."""
+
+
+def new_job(kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    now = datetime.utcnow().isoformat()
+    return {
+        "id": str(uuid.uuid4()),
+        "kind": kind,
+        "params": params,
+        "status": QUEUED,
+        "progress": None,
+        "attempts": 0,
+        "result": None,
+        "error": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+class InMemoryJobBackend:
+    """Single-process backend; job state lives in this process only"""
+
+    def __init__(self, ttl: float = 3600, max_dead_letter: int = 1000):
+        self.ttl = ttl
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._expires: Dict[str, float] = {}
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue()
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        # Oldest entries are dropped once it is full
+        self.dead_letter: Deque[Dict[str, Any]] = deque(maxlen=max_dead_letter)
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def save(self, job: Dict[str, Any]):
+        self._jobs[job["id"]] = job
+        self._jobs.move_to_end(job["id"])
+        self._expires[job["id"]] = time.monotonic() + self.ttl
+        for subscriber in self._subscribers.get(job["id"], ()):
+            subscriber.put_nowait(dict(job))
+        self._prune()
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job else None
+
+    async def push(self, job_id: str):
+        self._queue.put_nowait(job_id)
+
+    async def pop(self) -> str:
+        return await self._queue.get()
+
+    async def ack(self, job_id: str):
+        # Nothing outlives this process, so there is nothing to recover
+        pass
+
+    async def bury(self, job: Dict[str, Any]):
+        self.dead_letter.append(job)
+
+    async def dead_letter_size(self) -> int:
+        return len(self.dead_letter)
+
+    async def dead_letters(self, limit: int) -> List[Dict[str, Any]]:
+        """The most recently buried jobs, newest first"""
+        return [dict(job) for job in list(reversed(self.dead_letter))[:limit]]
+
+    async def take_dead_letter(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Remove a buried job from the dead-letter list and return it"""
+        for job in self.dead_letter:
+            if job["id"] == job_id:
+                self.dead_letter.remove(job)
+                return dict(job)
+        return None
+
+    async def subscribe(self, job_id: str) -> "MemorySubscription":
+        updates: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, set()).add(updates)
+        return MemorySubscription(self._subscribers, job_id, updates)
+
+    def _prune(self):
+        # Jobs are saved in update order, so expired ones sit at the front.
+        # An unfinished one is kept for another ttl, at the back, so it does
+        # not hold up the finished jobs behind it.
+        now = time.monotonic()
+        while self._jobs:
+            job_id, job = next(iter(self._jobs.items()))
+            if self._expires[job_id] > now:
+                break
+            if job["status"] in TERMINAL_STATES:
+                self._jobs.popitem(last=False)
+                del self._expires[job_id]
+            else:
+                self._jobs.move_to_end(job_id)
+                self._expires[job_id] = now + self.ttl
+
+
+class RedisJobBackend:
+    """Queue and job state in Redis so any worker process can run any job"""
+
+    def __init__(self, redis_url: str, ttl: float = 3600, prefix: str = "jobs:", max_dead_letter: int = 1000,
+                 heartbeat_interval: float = 10.0):
+        self.redis_url = redis_url
+        self.ttl = ttl
+        self.prefix = prefix
+        self.max_dead_letter = max_dead_letter
+        self.heartbeat_interval = heartbeat_interval
+        self.redis = None
+        # Jobs this process has popped but not acknowledged
+        self.consumer = uuid.uuid4().hex
+        self._processing = f"{prefix}processing:{self.consumer}"
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    async def start(self):
+        import redis.asyncio as aioredis
+
+        self.redis = aioredis.from_url(self.redis_url)
+        await self._beat()
+        await self.recover()
+        self._heartbeat = asyncio.create_task(self._keep_alive())
+
+    async def close(self):
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        if self.redis is not None:
+            # Whatever this process did not finish goes back on the queue now
+            # instead of after its heartbeat lapses
+            await self._requeue(self.consumer)
+            await self.redis.close()
+            self.redis = None
+
+    async def _beat(self):
+        await self.redis.sadd(f"{self.prefix}consumers", self.consumer)
+        await self.redis.set(f"{self.prefix}alive:{self.consumer}", 1, px=max(1, int(3000 * self.heartbeat_interval)))
+
+    async def _keep_alive(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self._beat()
+                await self.recover()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Job queue heartbeat failed: {e}")
+
+    async def recover(self):
+        """Put the unacknowledged jobs of processes that stopped beating back on the queue"""
+        for consumer in await self.redis.smembers(f"{self.prefix}consumers"):
+            consumer = consumer.decode("utf-8")
+            if consumer != self.consumer and not await self.redis.exists(f"{self.prefix}alive:{consumer}"):
+                logger.warning(f"Requeueing the unfinished jobs of job consumer {consumer}")
+                await self._requeue(consumer)
+
+    async def _requeue(self, consumer: str):
+        processing = f"{self.prefix}processing:{consumer}"
+        while await self.redis.lmove(processing, f"{self.prefix}queue", "RIGHT", "RIGHT") is not None:
+            pass
+        await self.redis.srem(f"{self.prefix}consumers", consumer)
+        await self.redis.delete(f"{self.prefix}alive:{consumer}")
+
+    async def save(self, job: Dict[str, Any]):
+        raw = json.dumps(job)
+        await self.redis.set(f"{self.prefix}job:{job['id']}", raw, ex=int(self.ttl))
+        await self.redis.publish(f"{self.prefix}events:{job['id']}", raw)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raw = await self.redis.get(f"{self.prefix}job:{job_id}")
+        return json.loads(raw) if raw else None
+
+    async def push(self, job_id: str):
+        await self.redis.lpush(f"{self.prefix}queue", job_id)
+
+    async def pop(self) -> str:
+        while True:
+            item = await self.redis.blmove(f"{self.prefix}queue", self._processing, 5, "RIGHT", "LEFT")
+            if item is not None:
+                return item.decode("utf-8")
+
+    async def ack(self, job_id: str):
+        await self.redis.lrem(self._processing, 1, job_id)
+
+    async def bury(self, job: Dict[str, Any]):
+        await self.redis.pipeline().lpush(f"{self.prefix}dead", json.dumps(job)).ltrim(
+            f"{self.prefix}dead", 0, self.max_dead_letter - 1
+        ).execute()
+
+    async def dead_letter_size(self) -> int:
+        return await self.redis.llen(f"{self.prefix}dead")
+
+    async def dead_letters(self, limit: int) -> List[Dict[str, Any]]:
+        """The most recently buried jobs, newest first"""
+        return [json.loads(raw) for raw in await self.redis.lrange(f"{self.prefix}dead", 0, limit - 1)]
+
+    async def take_dead_letter(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Remove a buried job from the dead-letter list and return it"""
+        # The list is capped at max_dead_letter entries, so scanning it is cheap
+        for raw in await self.redis.lrange(f"{self.prefix}dead", 0, -1):
+            job = json.loads(raw)
+            if job["id"] == job_id:
+                # LREM removes the entry only once, so concurrent replays of
+                # the same job cannot both succeed
+                return job if await self.redis.lrem(f"{self.prefix}dead", 1, raw) else None
+        return None
+
+    async def subscribe(self, job_id: str) -> "RedisSubscription":
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(f"{self.prefix}events:{job_id}")
+        return RedisSubscription(pubsub)
+
+
+class MemorySubscription:
+    def __init__(self, registry: Dict[str, Set[asyncio.Queue]], job_id: str, updates: asyncio.Queue):
+        self._registry = registry
+        self._job_id = job_id
+        self._updates = updates
+
+    async def next(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """The next update, or None if there is none within ``timeout`` seconds"""
+        try:
+            return await asyncio.wait_for(self._updates.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        subscribers = self._registry.get(self._job_id)
+        if subscribers is not None:
+            subscribers.discard(self._updates)
+            if not subscribers:
+                del self._registry[self._job_id]
+
+
+class RedisSubscription:
+    def __init__(self, pubsub):
+        self._pubsub = pubsub
+
+    async def next(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """The next update, or None if there is none within ``timeout`` seconds"""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            message = await self._pubsub.get_message(timeout=min(remaining, 5.0))
+            if message is not None and message.get("type") == "message":
+                return json.loads(message["data"])
+
+    async def close(self):
+        await self._pubsub.close()
+
+
+class JobQueue:
+    def __init__(self, backend, workers: int = 4, max_attempts: int = 3, retry_backoff: float = 0.5):
+        self.backend = backend
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.handlers: Dict[str, Handler] = {}
+        self._tasks: List[asyncio.Task] = []
+        # Pending retries, kept so they are not garbage collected mid-sleep
+        self._retries: Set[asyncio.Task] = set()
+
+    def register(self, kind: str, handler: Handler):
+        self.handlers[kind] = handler
+
+    async def start(self):
+        await self.backend.start()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def close(self):
+        # A cancelled retry was never acknowledged, so the Redis backend
+        # requeues it with the running jobs when it closes
+        tasks = self._tasks + list(self._retries)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._retries.clear()
+        await self.backend.close()
+
+    async def enqueue(self, kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        if kind not in self.handlers:
+            raise KeyError(f"No handler registered for job kind {kind!r}")
+        job = new_job(kind, params)
+        await self.backend.save(job)
+        await self.backend.push(job["id"])
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self.backend.get(job_id)
+
+    async def dead_letter_size(self) -> int:
+        return await self.backend.dead_letter_size()
+
+    async def dead_letters(self, limit: int = 100) -> List[Dict[str, Any]]:
+        return await self.backend.dead_letters(limit)
+
+    async def replay(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Queue a dead-lettered job again with a fresh set of attempts.
+
+        Returns the requeued job, or None if ``job_id`` is not dead-lettered.
+        """
+        job = await self.backend.take_dead_letter(job_id)
+        if job is None:
+            return None
+        await self._update(job, status=QUEUED, progress=None, attempts=0, result=None, error=None)
+        await self.backend.push(job["id"])
+        return job
+
+    async def events(self, job_id: str, keepalive: float = 15.0,
+                     max_wait: float = 300.0) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Yield the job's current state and then every update until it finishes.
+
+        None is yielded whenever ``keepalive`` seconds pass without an update,
+        and the stream ends after ``max_wait`` seconds even if the job has not
+        finished.
+        """
+        deadline = time.monotonic() + max_wait
+        # Subscribe before reading the current state so no update is missed
+        subscription = await self.backend.subscribe(job_id)
+        try:
+            job = await self.backend.get(job_id)
+            if job is None:
+                return
+            yield job
+            while job["status"] not in TERMINAL_STATES:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                update = await subscription.next(min(keepalive, remaining))
+                if update is None:
+                    if time.monotonic() < deadline:
+                        yield None
+                    continue
+                if update["updated_at"] < job["updated_at"]:
+                    # Published before the state we already sent
+                    continue
+                job = update
+                yield job
+        finally:
+            await subscription.close()
+
+    async def _update(self, job: Dict[str, Any], **changes):
+        job.update(changes, updated_at=datetime.utcnow().isoformat())
+        await self.backend.save(job)
+
+    async def _work(self):
+        while True:
+            job_id = await self.backend.pop()
+            job = await self.backend.get(job_id)
+            if job is None:
+                # Expired while queued
+                await self.backend.ack(job_id)
+                continue
+            retrying = False
+            try:
+                retrying = await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"Job {job_id} crashed the worker loop: {e}")
+            if not retrying:
+                await self.backend.ack(job_id)
+
+    async def _run(self, job: Dict[str, Any]) -> bool:
+        """Run one attempt of ``job``; True if a retry was scheduled"""
+        handler = self.handlers[job["kind"]]
+        await self._update(job, status=RUNNING, attempts=job["attempts"] + 1)
+
+        async def progress(step: str):
+            await self._update(job, progress=step)
+
+        try:
+            result = await handler(job["params"], progress)
+        except PermanentJobError as e:
+            await self._update(job, status=FAILED, error=str(e))
+        except Exception as e:
+            logger.warning(f"Job {job['id']} attempt {job['attempts']} failed: {e}")
+            if job["attempts"] < self.max_attempts:
+                await self._update(job, status=RETRYING, error=str(e))
+                retry = asyncio.create_task(self._retry_later(job))
+                self._retries.add(retry)
+                retry.add_done_callback(self._retries.discard)
+                return True
+            else:
+                await self._update(job, status=FAILED, error=str(e))
+                await self.backend.bury(job)
+        else:
+            await self._update(job, status=SUCCEEDED, result=result, error=None)
+        return False
+
+    async def _retry_later(self, job: Dict[str, Any]):
+        # The delivery stays unacknowledged while waiting, so a crash here
+        # still gets the job requeued
+        await asyncio.sleep(self.retry_backoff * 2 ** (job["attempts"] - 1))
+        await self.backend.push(job["id"])
+        await self.backend.ack(job["id"])
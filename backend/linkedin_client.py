@@ -0,0 +1,269 @@
+"""Shared HTTP client for the LinkedIn OAuth and profile APIs.
+
+One ``httpx.AsyncClient`` lives for the lifetime of the app so logins reuse
+pooled keep-alive connections instead of paying a new TLS handshake each
+time. Base URLs are configurable so the client can be pointed at a local fake
+LinkedIn server.
+
+Every call goes through a concurrency gate and an overall deadline, so a slow
+LinkedIn cannot pile up requests in this process. Transient failures
+(transport errors, 429 and 5xx) are retried with jittered exponential backoff
+while the shared retry budget allows it; the token exchange is only retried
+when the request provably never reached LinkedIn or was refused unprocessed,
+since authorization codes are single-use. A circuit breaker fails calls fast
+with ``LinkedInUnavailable`` while LinkedIn keeps failing.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+from metrics import count_linkedin_rejection, count_linkedin_retry, observe_linkedin, set_linkedin_circuit_state
+from resilience import CircuitBreaker, RetryBudget
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OAUTH_URL = "https://www.linkedin.com/oauth/v2"
+DEFAULT_API_URL = "https://api.linkedin.com/v2"
+
+
+class LinkedInAPIError(Exception):
+    """Raised when LinkedIn answers with an unexpected status code."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class LinkedInUnavailable(LinkedInAPIError):
+    """LinkedIn is failing or overloaded and the call was not (fully) attempted."""
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _RetryableStatus(Exception):
+    def __init__(self, response: httpx.Response):
+        super().__init__(f"LinkedIn answered {response.status_code}")
+        self.response = response
+
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# Answers meaning the request was refused without being processed
+UNPROCESSED_STATUS = {429, 503}
+# Transport errors raised before the request was sent
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class LinkedInClient:
+    def __init__(
+        self,
+        client_id: Optional[str],
+        client_secret: Optional[str],
+        redirect_uri: str,
+        oauth_url: str = DEFAULT_OAUTH_URL,
+        api_url: str = DEFAULT_API_URL,
+        http2: bool = False,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        connect_timeout: float = 3.0,
+        read_timeout: float = 10.0,
+        max_concurrency: int = 32,
+        acquire_timeout: float = 1.0,
+        call_timeout: float = 15.0,
+        max_attempts: int = 3,
+        retry_backoff: float = 0.2,
+        retry_budget_ratio: float = 0.2,
+        breaker_threshold: int = 5,
+        breaker_reset: float = 30.0,
+    ):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.redirect_uri = redirect_uri
+        self.oauth_url = oauth_url.rstrip("/")
+        self.api_url = api_url.rstrip("/")
+        self.http2 = http2
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout, pool=connect_timeout)
+        self.acquire_timeout = acquire_timeout
+        self.call_timeout = call_timeout
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self._gate = asyncio.Semaphore(max_concurrency)
+        self.retry_budget = RetryBudget(ratio=retry_budget_ratio)
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_reset, on_change=self._circuit_changed)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _circuit_changed(self, state: str):
+        set_linkedin_circuit_state(state)
+        log = logger.info if state == CircuitBreaker.CLOSED else logger.warning
+        log(f"LinkedIn circuit breaker is now {state}")
+
+    async def start(self):
+        if self._client is not None:
+            return
+        http2 = self.http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("LINKEDIN_HTTP2 is set but the 'h2' package is missing; using HTTP/1.1")
+                http2 = False
+        self._client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout, http2=http2)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            raise RuntimeError("LinkedInClient.start() has not been called")
+        return self._client
+
+    async def _request(self, call: str, method: str, url: str, idempotent: bool = True, **kwargs) -> httpx.Response:
+        """Send an upstream request through the gate, retries and circuit breaker"""
+        if self.breaker.state == CircuitBreaker.OPEN:
+            count_linkedin_rejection("circuit_open")
+            raise LinkedInUnavailable("LinkedIn is failing; not calling it for now", self.breaker.retry_after())
+        try:
+            await asyncio.wait_for(self._gate.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            count_linkedin_rejection("concurrency")
+            raise LinkedInUnavailable("Too many LinkedIn calls in flight", self.acquire_timeout)
+        try:
+            return await asyncio.wait_for(self._send_with_retries(call, method, url, idempotent, kwargs), self.call_timeout)
+        except asyncio.TimeoutError:
+            self.breaker.record_failure()
+            count_linkedin_rejection("deadline")
+            raise LinkedInUnavailable(f"LinkedIn did not answer within {self.call_timeout:g}s")
+        finally:
+            self._gate.release()
+
+    def _should_retry(self, call: str, idempotent: bool, error: BaseException) -> bool:
+        if isinstance(error, _RetryableStatus):
+            retryable = idempotent or error.response.status_code in UNPROCESSED_STATUS
+        else:
+            retryable = isinstance(error, httpx.TransportError if idempotent else UNSENT_ERRORS)
+        if not retryable:
+            return False
+        if not self.retry_budget.try_spend():
+            count_linkedin_rejection("retry_budget")
+            return False
+        count_linkedin_retry(call)
+        return True
+
+    async def _send_with_retries(self, call: str, method: str, url: str, idempotent: bool,
+                                 kwargs: Dict[str, Any]) -> httpx.Response:
+        self.retry_budget.record_request()
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(self.max_attempts),
+            wait=wait_random_exponential(multiplier=self.retry_backoff, max=5 * self.retry_backoff),
+            retry=retry_if_exception(lambda error: self._should_retry(call, idempotent, error)),
+            reraise=True,
+        )
+        try:
+            async for attempt in retrying:
+                with attempt:
+                    return await self._attempt(call, method, url, **kwargs)
+        except _RetryableStatus as e:
+            # Out of attempts or budget: hand the last answer to the caller
+            return e.response
+
+    async def _attempt(self, call: str, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send one upstream request, recording its latency, status and health"""
+        if not self.breaker.allow():
+            count_linkedin_rejection("circuit_open")
+            raise LinkedInUnavailable("LinkedIn is failing; not calling it for now", self.breaker.retry_after())
+        started = time.perf_counter()
+        status_code = None
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            status_code = response.status_code
+        except httpx.TransportError:
+            self.breaker.record_failure()
+            raise
+        finally:
+            observe_linkedin(call, status_code, time.perf_counter() - started)
+        if status_code in RETRYABLE_STATUS:
+            self.breaker.record_failure()
+            raise _RetryableStatus(response)
+        self.breaker.record_success()
+        return response
+
+    def authorization_url(self, state: Optional[str] = None) -> str:
+        url = (
+            f"{self.oauth_url}/authorization?"
+            f"response_type=code&"
+            f"client_id={self.client_id}&"
+            f"redirect_uri={self.redirect_uri}&"
+            f"scope=openid profile email"
+        )
+        if state:
+            url += f"&state={state}"
+        return url
+
+    async def exchange_code(self, code: str) -> Dict[str, Any]:
+        """Exchange an authorization code for an access token"""
+        response = await self._request(
+            "token",
+            "POST",
+            f"{self.oauth_url}/accessToken",
+            idempotent=False,
+            data={
+                "grant_type": "authorization_code",
+                "code": code,
+                "client_id": self.client_id,
+                "client_secret": self.client_secret,
+                "redirect_uri": self.redirect_uri,
+            },
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        )
+        if response.status_code != 200:
+            raise LinkedInAPIError(f"Failed to get access token ({response.status_code})", response.status_code)
+        return response.json()
+
+    async def fetch_profile(self, access_token: str) -> Tuple[Dict[str, Any], Optional[str]]:
+        """Fetch the member profile and email address concurrently.
+
+        Both calls only need the access token. A failed profile call is an
+        error; a failed email call just leaves the email empty.
+        """
+        headers = {"Authorization": f"Bearer {access_token}"}
+        profile_response, email_response = await asyncio.gather(
+            self._request("profile", "GET", f"{self.api_url}/me", headers=headers),
+            self._request(
+                "email",
+                "GET",
+                f"{self.api_url}/emailAddress?q=members&projection=(elements*(handle~))",
+                headers=headers,
+            ),
+            return_exceptions=True,
+        )
+        if isinstance(profile_response, BaseException):
+            raise profile_response
+        if profile_response.status_code != 200:
+            raise LinkedInAPIError(
+                f"Failed to get profile data ({profile_response.status_code})", profile_response.status_code
+            )
+
+        email = None
+        if isinstance(email_response, BaseException):
+            logger.warning(f"LinkedIn email lookup failed: {email_response}")
+        elif email_response.status_code == 200:
+            elements = email_response.json().get("elements") or []
+            if elements:
+                email = elements[0]["handle~"]["emailAddress"]
+
+        return profile_response.json(), email
@@ -0,0 +1,327 @@
+"""Vectorized scoring of job descriptions against stored profiles.
+
+Every profile becomes a sparse vector over a normalized skill vocabulary: the
+skills it lists, plus known skills mentioned in its experience entries. The
+vectors are L2-normalized and kept as one coordinate list in NumPy arrays
+(slot, column, weight), so scoring a job description against every profile
+is one gather and one ``np.bincount`` instead of a loop over profiles. The
+job side is weighted by inverse document frequency, so a rare skill counts
+for more than one everybody lists.
+
+Updates append the new entries and zero the old ones; the arrays are
+compacted once dead entries outnumber live ones. Like the search index, the
+vectors live in each worker, follow the profile change listeners and are
+rebuilt after a missed invalidation.
+"""
+import asyncio
+import math
+import re
+from collections import Counter
+from typing import Any, AsyncIterator, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+import numpy as np
+
+
+# Spellings that mean the same skill
+SKILL_ALIASES: Dict[str, str] = {
+    "js": "javascript",
+    "ecmascript": "javascript",
+    "ts": "typescript",
+    "node": "node.js",
+    "nodejs": "node.js",
+    "reactjs": "react",
+    "react.js": "react",
+    "vuejs": "vue",
+    "vue.js": "vue",
+    "angularjs": "angular",
+    "golang": "go",
+    "py": "python",
+    "python3": "python",
+    "k8s": "kubernetes",
+    "postgres": "postgresql",
+    "psql": "postgresql",
+    "mongo": "mongodb",
+    "amazon web services": "aws",
+    "google cloud": "gcp",
+    "google cloud platform": "gcp",
+    "microsoft azure": "azure",
+    "c sharp": "c#",
+    "csharp": "c#",
+    "cpp": "c++",
+    "dotnet": ".net",
+    "ml": "machine learning",
+    "dl": "deep learning",
+    "nlp": "natural language processing",
+    "ci/cd": "ci cd",
+    "rest api": "rest",
+    "restful": "rest",
+    "scikit learn": "scikit-learn",
+    "sklearn": "scikit-learn",
+}
+
+# Skills recognized in free text (experience entries, job descriptions) even
+# if no stored profile lists them yet. Names that are also everyday words
+# ("go", "c", "r") are left out so prose does not match them.
+KNOWN_SKILLS: Set[str] = {
+    "python", "java", "javascript", "typescript", "rust", "c++", "c#", "ruby", "php", "scala",
+    "kotlin", "swift", "sql", "bash", "node.js", "react", "vue", "angular", "django", "flask", "fastapi",
+    "spring", "rails", ".net", "graphql", "rest", "grpc", "html", "css", "postgresql", "mysql", "mongodb",
+    "redis", "elasticsearch", "kafka", "rabbitmq", "spark", "hadoop", "airflow", "aws", "gcp", "azure",
+    "docker", "kubernetes", "terraform", "ansible", "linux", "git", "ci cd", "jenkins", "microservices",
+    "machine learning", "deep learning", "natural language processing", "computer vision", "pytorch",
+    "tensorflow", "scikit-learn", "pandas", "numpy", "data analysis", "data engineering", "statistics",
+    "agile", "scrum", "product management", "project management", "leadership", "figma", "ux", "ui",
+}
+
+# Everyday words that profiles also list as skills. Like any name of one or
+# two characters ("go", "c", "r"), they only count in free text when written
+# as an unambiguous alias ("golang"); otherwise "ready to go" would match Go.
+AMBIGUOUS_SKILLS: Set[str] = {
+    "access", "ada", "ant", "assembly", "basic", "chef", "crystal", "elm", "excel", "express", "flow",
+    "hive", "julia", "less", "make", "office", "pig", "puppet", "salt", "shell", "storm", "teams", "word",
+}
+
+# Weight of a listed skill and of one mention in experience text
+SKILL_WEIGHT = 1.0
+EXPERIENCE_WEIGHT = 0.5
+
+# Longest skill name, in words, looked for in free text
+MAX_SKILL_WORDS = 3
+
+WORD_RE = re.compile(r"[a-z0-9.+#/-]+")
+
+
+def _words(text: str) -> List[str]:
+    # Trailing punctuation is dropped but "node.js", ".net" and "c++" survive
+    words = (word.rstrip("./-") for word in WORD_RE.findall(text.lower()))
+    return [word for word in words if word]
+
+
+def normalize_skill(skill: str) -> str:
+    """Canonical vocabulary term for a skill as a user or LinkedIn spelled it"""
+    term = " ".join(_words(skill))
+    return SKILL_ALIASES.get(term, term)
+
+
+def is_ambiguous(term: str) -> bool:
+    """Whether a skill name is also ordinary text, so finding it in prose proves nothing"""
+    return term not in KNOWN_SKILLS and (len(term) <= 2 or term in AMBIGUOUS_SKILLS)
+
+
+def extract_skills(text: str, vocabulary: Mapping[str, Any]) -> Counter:
+    """Count mentions of vocabulary skills (up to MAX_SKILL_WORDS words long) in ``text``.
+
+    Ambiguous names are only counted when spelled as one of their aliases.
+    """
+    words = _words(text)
+    found: Counter = Counter()
+    position = 0
+    while position < len(words):
+        # Prefer the longest match so "machine learning" is not also "learning"
+        for size in range(min(MAX_SKILL_WORDS, len(words) - position), 0, -1):
+            phrase = " ".join(words[position:position + size])
+            term = SKILL_ALIASES.get(phrase, phrase)
+            if term in vocabulary and (phrase != term or not is_ambiguous(term)):
+                found[term] += 1
+                position += size
+                break
+        else:
+            position += 1
+    return found
+
+
+def _experience_text(experience: Any) -> Iterable[str]:
+    for entry in experience or []:
+        if isinstance(entry, Mapping):
+            yield from (value for value in entry.values() if isinstance(value, str))
+        elif isinstance(entry, str):
+            yield entry
+
+
+class MatchIndex:
+    def __init__(self, initial_capacity: int = 1 << 16):
+        # term -> column; columns are never reused
+        self._columns: Dict[str, int] = {}
+        self._terms: List[str] = []
+        for term in sorted(KNOWN_SKILLS):
+            self._column(term)
+        # user_id -> (slot, start, end) of its live entries
+        self._spans: Dict[str, Tuple[int, int, int]] = {}
+        self._slot_users: List[Optional[str]] = []
+        self._free_slots: List[int] = []
+        self._slots = np.zeros(initial_capacity, dtype=np.int32)
+        self._cols = np.zeros(initial_capacity, dtype=np.int32)
+        self._weights = np.zeros(initial_capacity, dtype=np.float32)
+        self._size = 0
+        self._live = 0
+        self._document_frequency = np.zeros(len(self._terms), dtype=np.int32)
+        self._touched: Optional[Set[str]] = None
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._spans)
+
+    def _column(self, term: str) -> int:
+        column = self._columns.get(term)
+        if column is None:
+            column = self._columns[term] = len(self._terms)
+            self._terms.append(term)
+        return column
+
+    def profile_vector(self, profile: Mapping[str, Any]) -> Dict[str, float]:
+        """Unnormalized term weights for ``profile``"""
+        weights: Dict[str, float] = {}
+        for skill in profile.get("skills") or []:
+            term = normalize_skill(skill) if isinstance(skill, str) else ""
+            if term:
+                weights[term] = SKILL_WEIGHT
+        mentions: Counter = Counter()
+        for text in _experience_text(profile.get("experience")):
+            mentions.update(extract_skills(text, KNOWN_SKILLS))
+        for term, count in mentions.items():
+            weights[term] = weights.get(term, 0.0) + EXPERIENCE_WEIGHT * (1 + math.log(count))
+        return weights
+
+    def update(self, profile: Mapping[str, Any]):
+        """(Re)compute the vector of ``profile``"""
+        user_id = profile["user_id"]
+        if self._touched is not None:
+            self._touched.add(user_id)
+        self._remove(user_id)
+
+        weights = self.profile_vector(profile)
+        if not weights:
+            return
+        columns = np.fromiter((self._column(term) for term in weights), dtype=np.int32, count=len(weights))
+        values = np.fromiter(weights.values(), dtype=np.float32, count=len(weights))
+        values /= np.linalg.norm(values)
+
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            self._slot_users[slot] = user_id
+        else:
+            slot = len(self._slot_users)
+            self._slot_users.append(user_id)
+        self._reserve(len(columns))
+        start = self._size
+        end = start + len(columns)
+        self._slots[start:end] = slot
+        self._cols[start:end] = columns
+        self._weights[start:end] = values
+        self._size = end
+        self._live += len(columns)
+        self._spans[user_id] = (slot, start, end)
+
+        if len(self._document_frequency) < len(self._terms):
+            self._document_frequency = np.concatenate([
+                self._document_frequency,
+                np.zeros(len(self._terms) - len(self._document_frequency), dtype=np.int32),
+            ])
+        self._document_frequency[columns] += 1
+
+    def remove(self, user_id: str):
+        if self._touched is not None:
+            self._touched.add(user_id)
+        self._remove(user_id)
+
+    def _remove(self, user_id: str):
+        span = self._spans.pop(user_id, None)
+        if span is None:
+            return
+        slot, start, end = span
+        self._document_frequency[self._cols[start:end]] -= 1
+        self._weights[start:end] = 0
+        self._live -= end - start
+        self._slot_users[slot] = None
+        self._free_slots.append(slot)
+
+    def _reserve(self, count: int):
+        if self._size + count <= len(self._weights):
+            return
+        if self._size - self._live > self._live:
+            self._compact()
+            if self._size + count <= len(self._weights):
+                return
+        capacity = max(2 * len(self._weights), self._size + count)
+        for name in ("_slots", "_cols", "_weights"):
+            grown = np.zeros(capacity, dtype=getattr(self, name).dtype)
+            grown[:self._size] = getattr(self, name)[:self._size]
+            setattr(self, name, grown)
+
+    def _compact(self):
+        """Drop the entries of removed and replaced vectors"""
+        order = sorted(self._spans.items(), key=lambda item: item[1][1])
+        keep = np.concatenate([np.arange(start, end) for _, (_, start, end) in order]) if order else np.zeros(0, dtype=np.int64)
+        size = len(keep)
+        self._slots[:size] = self._slots[keep]
+        self._cols[:size] = self._cols[keep]
+        self._weights[:size] = self._weights[keep]
+        self._weights[size:self._size] = 0
+        position = 0
+        for user_id, (slot, start, end) in order:
+            self._spans[user_id] = (slot, position, position + end - start)
+            position += end - start
+        self._size = size
+
+    async def build(self, profiles: AsyncIterator[Mapping[str, Any]], yield_every: int = 500):
+        """Vectorize every profile from ``profiles``, yielding to the event loop as it goes"""
+        self._touched = set()
+        try:
+            indexed = 0
+            async for profile in profiles:
+                if profile["user_id"] not in self._touched:
+                    self.update(profile)
+                    self._touched.discard(profile["user_id"])
+                indexed += 1
+                if indexed % yield_every == 0:
+                    await asyncio.sleep(0)
+        finally:
+            self._touched = None
+        self.ready = True
+
+    def job_terms(self, description: str) -> List[str]:
+        """Vocabulary skills mentioned in a job description"""
+        return sorted(extract_skills(description, self._columns))
+
+    def score(self, terms: Iterable[str]) -> np.ndarray:
+        """Cosine similarity of every slot with the IDF-weighted job vector"""
+        columns = [self._columns[term] for term in terms if term in self._columns]
+        if not columns or not self._size:
+            return np.zeros(len(self._slot_users))
+        total = max(len(self._spans), 1)
+        frequency = self._document_frequency[columns]
+        job = np.zeros(len(self._terms), dtype=np.float32)
+        job[columns] = np.log1p(total / (1.0 + frequency))
+        job /= np.linalg.norm(job)
+
+        size = self._size
+        contributions = self._weights[:size] * job[self._cols[:size]]
+        return np.bincount(self._slots[:size], weights=contributions, minlength=len(self._slot_users))
+
+    def match(self, description: str, offset: int = 0, limit: int = 20, min_score: float = 0.0,
+              user_ids: Optional[Iterable[str]] = None) -> Tuple[List[str], int, List[Dict[str, Any]]]:
+        """(job skills, number of matching profiles, ranked page of matches)"""
+        terms = self.job_terms(description)
+        scores = self.score(terms)
+        if user_ids is not None:
+            allowed = np.zeros(len(scores), dtype=bool)
+            allowed[[self._spans[user_id][0] for user_id in set(user_ids) if user_id in self._spans]] = True
+            scores = np.where(allowed, scores, 0)
+
+        matching = np.flatnonzero(scores > max(min_score, 0.0))
+        total = len(matching)
+        wanted = min(offset + limit, total)
+        if wanted == 0:
+            return terms, total, []
+        if wanted < total:
+            matching = matching[np.argpartition(-scores[matching], wanted - 1)[:wanted]]
+        ranked = matching[np.argsort(-scores[matching], kind="stable")][offset:wanted]
+
+        job_columns = {self._columns[term] for term in terms}
+        results = []
+        for slot in ranked.tolist():
+            user_id = self._slot_users[slot]
+            _, start, end = self._spans[user_id]
+            matched = sorted(self._terms[column] for column in self._cols[start:end].tolist() if column in job_columns)
+            results.append({"user_id": user_id, "score": round(float(scores[slot]), 4), "matched_skills": matched})
+        return terms, total, results
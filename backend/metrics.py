@@ -0,0 +1,166 @@
+"""Prometheus metrics.
+
+Covers the three places time goes: our own request handling (per route), Mongo
+(per collection and command, via a PyMongo command listener) and the LinkedIn
+upstream (per call). The event-loop lag gauge shows when the process itself
+is saturated.
+
+With several uvicorn workers each process only sees its own samples. When
+``PROMETHEUS_MULTIPROC_DIR`` is set (the entrypoint does this for multi-worker
+mode) prometheus_client writes samples there and ``render_latest`` merges all
+workers, so a scrape answered by any worker covers the whole server.
+"""
+import asyncio
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+from pymongo import monitoring
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "API request latency by route",
+    ["method", "route", "status"],
+)
+MONGO_LATENCY = Histogram(
+    "mongo_operation_duration_seconds",
+    "Mongo command latency by collection",
+    ["collection", "command"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+MONGO_ERRORS = Counter(
+    "mongo_operation_errors_total",
+    "Failed Mongo commands by collection",
+    ["collection", "command"],
+)
+LINKEDIN_LATENCY = Histogram(
+    "linkedin_request_duration_seconds",
+    "LinkedIn upstream call latency",
+    ["call", "status_code"],
+)
+LINKEDIN_RETRIES = Counter(
+    "linkedin_retries_total",
+    "LinkedIn calls retried after a transient failure",
+    ["call"],
+)
+LINKEDIN_REJECTED = Counter(
+    "linkedin_rejected_total",
+    "LinkedIn calls failed fast without reaching the upstream",
+    ["reason"],
+)
+LINKEDIN_CIRCUIT_STATE = Gauge(
+    "linkedin_circuit_state",
+    "LinkedIn circuit breaker state: 0 closed, 1 half-open, 2 open",
+    multiprocess_mode="liveall",
+)
+CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+EVENT_LOOP_LAG = Gauge(
+    "event_loop_lag_seconds",
+    "How late the event loop ran a timer that should have fired immediately",
+    # One series per live worker; a single saturated worker must stay visible
+    multiprocess_mode="liveall",
+)
+
+
+class PrometheusMiddleware:
+    """ASGI middleware timing every HTTP request by its route template"""
+
+    def __init__(self, app, prefix: str = "/api"):
+        self.app = app
+        self.prefix = prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status["code"]),
+            ).observe(time.perf_counter() - started)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Records per-collection latency and failures for every Mongo command"""
+
+    def __init__(self):
+        self._inflight: Dict[Tuple[int, int], str] = {}
+
+    def started(self, event):
+        # getMore carries the cursor id under its own name and the collection
+        # under "collection"; other commands name the collection directly
+        target = event.command.get("collection")
+        if not isinstance(target, str):
+            target = event.command.get(event.command_name)
+        collection = target if isinstance(target, str) else event.database_name
+        self._inflight[(event.request_id, event.operation_id or 0)] = collection
+
+    def _collection(self, event) -> str:
+        return self._inflight.pop((event.request_id, event.operation_id or 0), "unknown")
+
+    def succeeded(self, event):
+        collection = self._collection(event)
+        MONGO_LATENCY.labels(collection, event.command_name).observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        collection = self._collection(event)
+        MONGO_LATENCY.labels(collection, event.command_name).observe(event.duration_micros / 1e6)
+        MONGO_ERRORS.labels(collection, event.command_name).inc()
+
+
+def observe_linkedin(call: str, status_code: Optional[int], seconds: float):
+    LINKEDIN_LATENCY.labels(call, str(status_code) if status_code else "error").observe(seconds)
+
+
+def count_linkedin_retry(call: str):
+    LINKEDIN_RETRIES.labels(call).inc()
+
+
+def count_linkedin_rejection(reason: str):
+    LINKEDIN_REJECTED.labels(reason).inc()
+
+
+def set_linkedin_circuit_state(state: str):
+    LINKEDIN_CIRCUIT_STATE.set(CIRCUIT_STATES[state])
+
+
+async def monitor_event_loop_lag(interval: float = 0.5):
+    loop = asyncio.get_running_loop()
+    while True:
+        scheduled = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.set(max(0.0, loop.time() - scheduled - interval))
+
+
+def multiprocess_enabled() -> bool:
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def mark_worker_dead():
+    """Drop this worker's live gauge series; call when the worker shuts down"""
+    if multiprocess_enabled():
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def render_latest() -> Tuple[bytes, str]:
+    if multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
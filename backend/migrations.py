@@ -0,0 +1,140 @@
+"""One-off data migrations.
+
+Run from the backend directory, e.g.::
+
+    python migrations.py backfill-versions --batch-size 500
+    python migrations.py merge-duplicate-profiles
+"""
+import argparse
+import asyncio
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, UpdateOne
+
+from storage.mongo import MongoVersionRepository
+from versions import record_version
+
+
+logger = logging.getLogger(__name__)
+
+
+async def backfill_resume_versions(db, batch_size: int = 500, rebase_interval: Optional[int] = None) -> int:
+    """Move the profiles of older resumes into ``resume_versions``.
+
+    Covers both earlier formats: resumes that embed their profile and resumes
+    that point at a ``profile_snapshots`` document. Resumes are streamed oldest
+    first and each profile is appended with ``record_version`` exactly as a
+    new resume would be. The resume then gets its ``profile_version`` in place
+    of its own copy.
+
+    Version numbers follow generation order only among the backfilled resumes:
+    a user who already has versions (from resumes generated since versioning
+    shipped) gets the backfilled ones numbered after those, even though they
+    are older, and a profile equal to an existing version reuses its number.
+    Existing versions cannot be renumbered, since resumes refer to them.
+    Converted resumes no longer match the filter, which makes the backfill
+    safe to stop and re-run.
+    """
+    # Same segment length as the server uses for new versions
+    rebase_interval = rebase_interval or int(os.getenv('VERSION_REBASE_INTERVAL', '20'))
+    versions = MongoVersionRepository(db)
+    cursor = db.resumes.find(
+        {"profile_version": {"$exists": False}},
+        {"_id": 1, "user_id": 1, "profile": 1, "profile_hash": 1},
+        batch_size=batch_size,
+    ).sort("generated_at", ASCENDING)
+    resume_ops = []
+    migrated = 0
+
+    async def flush():
+        nonlocal migrated
+        if not resume_ops:
+            return
+        await db.resumes.bulk_write(resume_ops, ordered=False)
+        migrated += len(resume_ops)
+        logger.info(f"Backfilled {migrated} resumes")
+        resume_ops.clear()
+
+    async for resume in cursor:
+        profile = resume.get("profile")
+        if profile is None:
+            snapshot = await db.profile_snapshots.find_one({"_id": resume.get("profile_hash")})
+            if snapshot is None:
+                logger.warning(f"Resume {resume['_id']} has no profile or snapshot, skipped")
+                continue
+            profile = snapshot["profile"]
+        number = await record_version(versions, resume["user_id"], profile, rebase_interval)
+        resume_ops.append(UpdateOne(
+            {"_id": resume["_id"]},
+            {"$set": {"profile_version": number}, "$unset": {"profile": "", "profile_hash": ""}},
+        ))
+        if len(resume_ops) >= batch_size:
+            await flush()
+    await flush()
+    return migrated
+
+
+def _has_value(value) -> bool:
+    return value not in (None, "", [], {})
+
+
+async def merge_duplicate_profiles(db, batch_size: int = 500) -> int:
+    """Collapse repeated ``linkedin_profiles`` documents into one per user_id.
+
+    Every re-login used to insert a new document. For each duplicated user the
+    documents are folded oldest to newest, so newer non-empty values win while
+    fields only an older document has are kept. The profile keeps the ``id``
+    and ``created_at`` of its first document. This has to run before the
+    unique ``user_id`` index can be built.
+    """
+    pipeline = [
+        {"$sort": {"created_at": 1}},
+        {"$group": {"_id": "$user_id", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ]
+    merged = 0
+    async for group in db.linkedin_profiles.aggregate(pipeline, allowDiskUse=True, batchSize=batch_size):
+        docs = await db.linkedin_profiles.find({"_id": {"$in": group["ids"]}}).to_list(None)
+        docs.sort(key=lambda doc: group["ids"].index(doc["_id"]))
+
+        profile = {}
+        for doc in docs:
+            profile.update({key: value for key, value in doc.items() if key != "_id" and _has_value(value)})
+        profile["id"] = docs[0].get("id", profile.get("id"))
+        profile["created_at"] = docs[0].get("created_at", profile.get("created_at"))
+
+        survivor, *duplicates = [doc["_id"] for doc in reversed(docs)]
+        await db.linkedin_profiles.replace_one({"_id": survivor}, profile)
+        await db.linkedin_profiles.delete_many({"_id": {"$in": duplicates}})
+        merged += len(duplicates)
+    return merged
+
+
+MIGRATIONS = {
+    "backfill-versions": backfill_resume_versions,
+    "merge-duplicate-profiles": merge_duplicate_profiles,
+}
+
+
+async def main(name: str, batch_size: int):
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    try:
+        count = await MIGRATIONS[name](client[os.environ['DB_NAME']], batch_size=batch_size)
+        logger.info(f"{name}: {count} documents migrated")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Run a one-off data migration")
+    parser.add_argument("migration", choices=sorted(MIGRATIONS))
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.migration, args.batch_size))
@@ -0,0 +1,58 @@
+"""API models shared by the server and the storage backends."""
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class StatusCheck(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    client_name: str
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
+
+
+class StatusCheckCreate(BaseModel):
+    client_name: str
+
+
+class LinkedInProfile(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    user_id: str
+    first_name: str
+    last_name: str
+    headline: Optional[str] = None
+    email: Optional[str] = None
+    profile_picture: Optional[str] = None
+    location: Optional[str] = None
+    summary: Optional[str] = None
+    experience: List[Dict[str, Any]] = []
+    education: List[Dict[str, Any]] = []
+    skills: List[str] = []
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class ResumeRequest(BaseModel):
+    user_id: str
+    template_id: str
+
+
+class BulkResumeRequest(BaseModel):
+    items: List[ResumeRequest]
+
+
+class JobMatchRequest(BaseModel):
+    description: str = Field(..., min_length=1, max_length=20000)
+    limit: int = Field(20, ge=1)
+    offset: int = Field(0, ge=0)
+    min_score: float = Field(0.0, ge=0.0, le=1.0)
+    # Only score these profiles; every indexed profile when omitted
+    user_ids: Optional[List[str]] = None
+
+
+class ResumeTemplate(BaseModel):
+    id: str
+    name: str
+    description: str
+    preview_image: str
+    style: str
@@ -0,0 +1,183 @@
+"""OAuth ``state`` values and LinkedIn access tokens.
+
+States are single-use and expire after ``state_ttl``. Each one carries its
+issue time and an HMAC, so any worker can check that it was issued here and
+has not expired. With ``REDIS_URL`` every issued state is also a Redis key
+with a TTL and consuming it is an atomic ``DELETE``, so it is single-use
+across workers. Without Redis each worker remembers the states it consumed in
+an ``OrderedDict``; every entry is kept equally long, so insertion order is
+expiry order and expired entries are dropped from the front without scanning.
+
+Access tokens are only ever held Fernet-encrypted (``TokenCipher``), with
+their expiry: in a per-process LRU, in Redis when configured, and durably in
+``storage.tokens`` for profile refresh. Without an encryption key no token is
+kept anywhere.
+
+A stored token is only reused for the browser that completed the login: the
+callback issues it a signed session value (user id and expiry, HMAC'd with the
+state key) for an HttpOnly cookie, and only that value, never a bare user id,
+selects the token to reuse.
+"""
+import base64
+import hashlib
+import hmac
+import logging
+import secrets
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from storage.base import Storage
+from token_cipher import TokenCipher
+
+
+logger = logging.getLogger(__name__)
+
+
+class OAuthStore:
+    def __init__(self, cipher: TokenCipher, storage: Storage, state_secret: Optional[str] = None,
+                 state_ttl: float = 600, max_tokens: int = 10000, redis_url: Optional[str] = None,
+                 key_prefix: str = "oauth:"):
+        self.cipher = cipher
+        # Must be the same in every worker; a random key only suits one process
+        self._state_key = (state_secret or secrets.token_hex(32)).encode()
+        # Its repositories only exist once the storage has started
+        self.storage = storage
+        self.state_ttl = state_ttl
+        self.max_tokens = max_tokens
+        self.redis_url = redis_url
+        self.key_prefix = key_prefix
+        self.redis = None
+        # Consumed state -> monotonic time it can be forgotten, oldest first
+        self._consumed: "OrderedDict[str, float]" = OrderedDict()
+        # user_id -> (expires_at, ciphertext), least recently used first
+        self._tokens: "OrderedDict[str, Tuple[datetime, str]]" = OrderedDict()
+
+    async def start(self):
+        if not self.redis_url or self.redis is not None:
+            return
+        import redis.asyncio as aioredis
+
+        self.redis = aioredis.from_url(self.redis_url)
+
+    async def close(self):
+        if self.redis is not None:
+            await self.redis.close()
+            self.redis = None
+
+    def _sign(self, payload: str) -> str:
+        return hmac.new(self._state_key, payload.encode(), hashlib.sha256).hexdigest()[:32]
+
+    async def create_state(self) -> str:
+        payload = f"{secrets.token_urlsafe(16)}.{int(time.time())}"
+        state = f"{payload}.{self._sign(payload)}"
+        if self.redis is not None:
+            await self.redis.set(f"{self.key_prefix}state:{state}", 1, ex=max(1, int(self.state_ttl)))
+        return state
+
+    async def consume_state(self, state: Optional[str]) -> bool:
+        """True exactly once for a state this store issued, and only before it expires"""
+        payload, _, signature = (state or "").rpartition(".")
+        issued = payload.rpartition(".")[2]
+        if not payload or not hmac.compare_digest(signature, self._sign(payload)) or not issued.isdigit():
+            return False
+        if time.time() - int(issued) > self.state_ttl:
+            return False
+        if self.redis is not None:
+            return await self.redis.delete(f"{self.key_prefix}state:{state}") == 1
+
+        now = time.monotonic()
+        while self._consumed:
+            oldest, forget_at = next(iter(self._consumed.items()))
+            if forget_at > now:
+                break
+            del self._consumed[oldest]
+        if state in self._consumed:
+            return False
+        self._consumed[state] = now + self.state_ttl
+        return True
+
+    def issue_session(self, user_id: str, max_age: int) -> str:
+        """Signed value naming ``user_id`` for a login cookie that lasts ``max_age`` seconds"""
+        encoded = base64.urlsafe_b64encode(user_id.encode()).decode().rstrip("=")
+        payload = f"{encoded}.{int(time.time()) + int(max_age)}"
+        return f"{payload}.{self._sign(f'session:{payload}')}"
+
+    def session_user(self, session: Optional[str]) -> Optional[str]:
+        """The user id of a session value this store issued, if it has not expired"""
+        payload, _, signature = (session or "").rpartition(".")
+        encoded, _, expires = payload.rpartition(".")
+        if not encoded or not hmac.compare_digest(signature, self._sign(f"session:{payload}")):
+            return None
+        if not expires.isdigit() or int(expires) < time.time():
+            return None
+        try:
+            return base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4)).decode()
+        except ValueError:
+            return None
+
+    async def put_token(self, user_id: str, access_token: str, expires_in: Optional[int]) -> bool:
+        """Keep the user's token for reuse; False if it cannot be kept"""
+        if not self.cipher.enabled or not expires_in:
+            return False
+        expires_at = datetime.utcnow() + timedelta(seconds=int(expires_in))
+        ciphertext = self.cipher.encrypt(access_token)
+        self._store_local(user_id, expires_at, ciphertext)
+        if self.redis is not None:
+            try:
+                await self.redis.set(f"{self.key_prefix}token:{user_id}", ciphertext, ex=int(expires_in))
+            except Exception as e:
+                logger.warning(f"OAuth token Redis write failed: {e}")
+        await self.storage.tokens.put(user_id, ciphertext, expires_at)
+        return True
+
+    async def get_token(self, user_id: str) -> Optional[str]:
+        """The user's access token if one is stored and has not expired"""
+        if not self.cipher.enabled:
+            return None
+        ciphertext = await self._load_ciphertext(user_id)
+        return self.cipher.decrypt(ciphertext) if ciphertext else None
+
+    async def delete_token(self, user_id: str):
+        self._tokens.pop(user_id, None)
+        if self.redis is not None:
+            try:
+                await self.redis.delete(f"{self.key_prefix}token:{user_id}")
+            except Exception as e:
+                logger.warning(f"OAuth token Redis delete failed: {e}")
+        await self.storage.tokens.delete(user_id)
+
+    async def _load_ciphertext(self, user_id: str) -> Optional[str]:
+        now = datetime.utcnow()
+        entry = self._tokens.get(user_id)
+        if entry is not None:
+            expires_at, ciphertext = entry
+            if expires_at > now:
+                self._tokens.move_to_end(user_id)
+                return ciphertext
+            del self._tokens[user_id]
+
+        if self.redis is not None:
+            key = f"{self.key_prefix}token:{user_id}"
+            try:
+                ciphertext, ttl = await self.redis.pipeline().get(key).ttl(key).execute()
+            except Exception as e:
+                logger.warning(f"OAuth token Redis read failed: {e}")
+                ciphertext = None
+            if ciphertext is not None and ttl > 0:
+                ciphertext = ciphertext.decode() if isinstance(ciphertext, bytes) else ciphertext
+                self._store_local(user_id, now + timedelta(seconds=ttl), ciphertext)
+                return ciphertext
+
+        record = await self.storage.tokens.get(user_id)
+        if record is None or record["expires_at"] <= now:
+            return None
+        self._store_local(user_id, record["expires_at"], record["token"])
+        return record["token"]
+
+    def _store_local(self, user_id: str, expires_at: datetime, ciphertext: str):
+        self._tokens[user_id] = (expires_at, ciphertext)
+        self._tokens.move_to_end(user_id)
+        while len(self._tokens) > self.max_tokens:
+            self._tokens.popitem(last=False)
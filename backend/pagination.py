@@ -0,0 +1,34 @@
+"""Keyset pagination and NDJSON streaming helpers.
+
+Pages are ordered by ``(timestamp, id)``. The cursor handed to clients is an
+opaque, URL-safe encoding of the last row's sort key, and the next page is
+the rows strictly after it. Unlike skip/limit this costs the same at any
+depth and never repeats or drops rows when new ones are inserted.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Mapping, Tuple
+
+import orjson
+
+
+def encode_cursor(row: Mapping[str, Any]) -> str:
+    raw = json.dumps([row["timestamp"].isoformat(), row["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Inverse of ``encode_cursor``; raises ValueError for malformed cursors"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(timestamp), str(row_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+async def ndjson_rows(rows: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """Yield one JSON line per document as the storage backend produces it"""
+    async for row in rows:
+        yield orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE)
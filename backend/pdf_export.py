@@ -0,0 +1,129 @@
+"""PDF export pipeline.
+
+Rasterizing HTML to PDF is CPU-bound, so it never runs on the event loop that
+serves the API. Jobs are handed to a bounded process pool; the exporter caps
+how many jobs may be waiting for a worker and how long a single job may take.
+"""
+import asyncio
+import io
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class ExportQueueFull(Exception):
+    """Raised when the pool already has as many jobs as it may queue."""
+
+
+class ExportTimeout(Exception):
+    """Raised when a job does not finish within the configured timeout."""
+
+
+def _warm_worker():
+    # Pay the import cost once per worker instead of on the first job.
+    import xhtml2pdf.pisa  # noqa: F401
+
+
+def html_to_pdf(html: str) -> bytes:
+    """Convert rendered resume HTML to PDF bytes (runs in a worker process)"""
+    from xhtml2pdf import pisa
+
+    buffer = io.BytesIO()
+    result = pisa.CreatePDF(html, dest=buffer, encoding="utf-8")
+    if result.err:
+        raise RuntimeError(f"PDF conversion failed with {result.err} error(s)")
+    return buffer.getvalue()
+
+
+class PdfExporter:
+    """Runs ``html_to_pdf`` in a process pool with queue and time limits"""
+
+    def __init__(self, pool_size: int, max_queue: int, job_timeout: float):
+        self.pool_size = pool_size
+        self.max_queue = max_queue
+        self.job_timeout = job_timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """Jobs currently running or waiting for a worker"""
+        return self._pending
+
+    def start(self):
+        if self._executor is None:
+            # "spawn" keeps workers from inheriting the event loop and the
+            # Mongo client's sockets and threads.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.pool_size,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_worker,
+            )
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _release(self):
+        self._pending -= 1
+
+    def _replace(self, broken: ProcessPoolExecutor):
+        # Concurrent jobs see the same broken pool; only the first replaces it
+        if self._executor is broken:
+            # shutdown() does not stop a running job, so the workers are
+            # killed outright; jobs still running on them fail with
+            # BrokenProcessPool and are retried on the new pool
+            workers = list((getattr(broken, "_processes", None) or {}).values())
+            broken.shutdown(wait=False, cancel_futures=True)
+            for worker in workers:
+                worker.terminate()
+            self._executor = None
+            self.start()
+
+    def _check_queue(self):
+        if self._pending >= self.pool_size + self.max_queue:
+            raise ExportQueueFull()
+
+    async def export(self, html: str) -> bytes:
+        self._check_queue()
+        try:
+            return await self._run(html)
+        except BrokenProcessPool:
+            # A worker died (killed, out of memory); the pool is unusable
+            # until it is replaced, so retry once on a new one, provided the
+            # new pool has room for the job
+            logger.warning("PDF export pool broke, retrying on a new pool")
+            self._check_queue()
+            return await self._run(html)
+
+    async def _run(self, html: str) -> bytes:
+        self.start()
+        executor = self._executor
+        try:
+            future = executor.submit(html_to_pdf, html)
+        except BrokenProcessPool:
+            self._replace(executor)
+            raise
+        # The slot is held until the job is really done, not just given up on
+        self._pending += 1
+        loop = asyncio.get_running_loop()
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release))
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.job_timeout)
+        except asyncio.TimeoutError:
+            # A job that has not started yet is dropped; a running one can
+            # only be stopped by killing its worker, which means replacing
+            # the pool
+            if not future.cancel() and not future.done():
+                logger.warning(f"PDF export exceeded {self.job_timeout}s, replacing its worker pool")
+                self._replace(executor)
+            raise ExportTimeout()
+        except BrokenProcessPool:
+            self._replace(executor)
+            raise
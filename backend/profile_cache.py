@@ -0,0 +1,171 @@
+"""Read-through cache in front of ``db.linkedin_profiles``.
+
+Profiles are kept in a per-process LRU with a TTL. When ``REDIS_URL`` is
+configured a shared Redis tier sits behind it so several workers reuse each
+other's reads; invalidations are published on a Redis channel so every worker
+drops its local copy at once instead of waiting for the TTL.
+
+Listeners registered with ``add_listener`` are called with the user id of
+every invalidated profile, in the writing worker and (through the Redis
+channel) in every other one, so derived in-memory state such as the search
+index can follow profile writes.
+
+If the channel connection drops, the worker resubscribes with backoff, then
+clears its local tier and calls the ``add_resync_listener`` callbacks, since
+invalidations sent in between were missed.
+Callers get their own copy of a cached profile and may change it freely.
+"""
+import asyncio
+import copy
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from storage.codec import dumps, loads
+
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "profile-cache:invalidate"
+
+
+class ProfileCache:
+    """Per-process TTL/LRU cache with an optional shared Redis tier"""
+
+    def __init__(self, ttl: float = 60, max_entries: int = 1024, redis_url: Optional[str] = None,
+                 key_prefix: str = "profile:"):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.redis_url = redis_url
+        self.key_prefix = key_prefix
+        self.redis = None
+        self._local: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._listener: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[str], Awaitable[None]]] = []
+        self._resync_listeners: List[Callable[[], Awaitable[None]]] = []
+        # Tags published invalidations so a worker can skip its own echo
+        self._origin = uuid.uuid4().hex
+        self.stats = {"local_hits": 0, "redis_hits": 0, "misses": 0, "invalidations": 0}
+
+    async def start(self):
+        if not self.redis_url or self.redis is not None:
+            return
+        import redis.asyncio as aioredis
+
+        self.redis = aioredis.from_url(self.redis_url)
+        self._listener = asyncio.create_task(self._listen_for_invalidations())
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        if self.redis is not None:
+            await self.redis.close()
+            self.redis = None
+
+    def add_listener(self, callback: Callable[[str], Awaitable[None]]):
+        """Call ``callback(user_id)`` whenever a profile is invalidated"""
+        self._listeners.append(callback)
+
+    def add_resync_listener(self, callback: Callable[[], Awaitable[None]]):
+        """Call ``callback()`` after invalidations may have been missed (a reconnect)"""
+        self._resync_listeners.append(callback)
+
+    async def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._local.get(user_id)
+        if entry is not None:
+            expires_at, profile = entry
+            if expires_at > time.monotonic():
+                self._local.move_to_end(user_id)
+                self.stats["local_hits"] += 1
+                return copy.deepcopy(profile)
+            del self._local[user_id]
+
+        if self.redis is not None:
+            try:
+                raw = await self.redis.get(self.key_prefix + user_id)
+            except Exception as e:
+                logger.warning(f"Profile cache Redis read failed: {e}")
+                raw = None
+            if raw is not None:
+                profile = loads(raw)
+                self._store_local(user_id, copy.deepcopy(profile))
+                self.stats["redis_hits"] += 1
+                return profile
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, user_id: str, profile: Dict[str, Any]):
+        self._store_local(user_id, copy.deepcopy(profile))
+        if self.redis is not None:
+            try:
+                await self.redis.set(self.key_prefix + user_id, dumps(profile), ex=max(1, int(self.ttl)))
+            except Exception as e:
+                logger.warning(f"Profile cache Redis write failed: {e}")
+
+    async def invalidate(self, user_id: str):
+        self._local.pop(user_id, None)
+        self.stats["invalidations"] += 1
+        if self.redis is not None:
+            try:
+                await self.redis.delete(self.key_prefix + user_id)
+                await self.redis.publish(INVALIDATION_CHANNEL, f"{self._origin}:{user_id}")
+            except Exception as e:
+                logger.warning(f"Profile cache Redis invalidation failed: {e}")
+        await self._notify(user_id)
+
+    async def _notify(self, user_id: str):
+        for callback in self._listeners:
+            try:
+                await callback(user_id)
+            except Exception as e:
+                logger.warning(f"Profile change listener failed for {user_id}: {e}")
+
+    def _store_local(self, user_id: str, profile: Dict[str, Any]):
+        self._local[user_id] = (time.monotonic() + self.ttl, profile)
+        self._local.move_to_end(user_id)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    async def _listen_for_invalidations(self, max_backoff: float = 30.0):
+        backoff = 0.5
+        reconnecting = False
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                if reconnecting:
+                    # Anything could have changed while we were not listening
+                    self._local.clear()
+                    logger.info("Profile cache invalidation listener resubscribed")
+                    for callback in self._resync_listeners:
+                        try:
+                            await callback()
+                        except Exception as e:
+                            logger.warning(f"Profile resync listener failed: {e}")
+                reconnecting = False
+                backoff = 0.5
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        data = message["data"]
+                        if isinstance(data, bytes):
+                            data = data.decode("utf-8")
+                        origin, _, user_id = data.partition(":")
+                        self._local.pop(user_id, None)
+                        if origin != self._origin:
+                            await self._notify(user_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Profile cache invalidation listener lost Redis, retrying in {backoff:.1f}s: {e}")
+            finally:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+            reconnecting = True
+            await asyncio.sleep(backoff)
+            backoff = min(2 * backoff, max_backoff)
@@ -0,0 +1,28 @@
+"""Field-level sync of LinkedIn data into stored profiles.
+
+LinkedIn is the source of truth only for ``SYNCED_FIELDS``; everything else on
+a profile (summary, experience, skills, ...) is owned by the user and never
+overwritten by a login or a refresh. A sync writes just the synced fields whose
+value actually changed, and nothing at all when none did.
+"""
+from typing import Any, Dict, Mapping, Optional
+
+
+SYNCED_FIELDS = ("first_name", "last_name", "headline", "email", "profile_picture")
+
+
+def linkedin_fields(profile_data: Mapping[str, Any], email: Optional[str]) -> Dict[str, Any]:
+    """Map a LinkedIn ``/me`` payload (plus email) onto ``SYNCED_FIELDS``"""
+    return {
+        "first_name": profile_data.get("localizedFirstName", ""),
+        "last_name": profile_data.get("localizedLastName", ""),
+        "headline": profile_data.get("localizedHeadline", ""),
+        "email": email,
+        "profile_picture": profile_data.get("profilePicture", {}).get("displayImage", ""),
+    }
+
+
+def diff_fields(stored: Mapping[str, Any], incoming: Mapping[str, Any]) -> Dict[str, Any]:
+    """The entries of ``incoming`` whose value differs from ``stored``"""
+    return {field: value for field, value in incoming.items() if stored.get(field) != value}
+
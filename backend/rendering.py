@@ -0,0 +1,94 @@
+"""Server-side resume rendering.
+
+Resume templates live in ``templates/`` next to this module. They are compiled
+once by ``load_templates`` (called from the startup hook) and the compiled
+objects are reused for every render, so rendering a resume is a single pass
+over an already-built template.
+"""
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional
+
+from jinja2 import Environment, FileSystemLoader, Template, select_autoescape
+
+
+TEMPLATES_DIR = Path(__file__).parent / 'templates'
+
+# Bump a template's version whenever its markup changes so anything keyed on
+# (template_id, version) is regenerated.
+TEMPLATE_VERSIONS: Dict[str, int] = {
+    "modern": 2,
+    "classic": 2,
+    "elegant": 2,
+}
+
+# Templates that show the profile picture; the others render without it
+PHOTO_TEMPLATES = frozenset({"modern", "elegant"})
+
+# Profile fields the templates read; nothing else influences the output.
+RENDER_FIELDS = (
+    "first_name",
+    "last_name",
+    "headline",
+    "email",
+    "location",
+    "summary",
+    "profile_picture",
+    "experience",
+    "education",
+    "skills",
+)
+
+_env = Environment(
+    loader=FileSystemLoader(str(TEMPLATES_DIR)),
+    autoescape=select_autoescape(["html"]),
+    trim_blocks=True,
+    lstrip_blocks=True,
+    auto_reload=False,
+)
+_compiled: Dict[str, Template] = {}
+
+
+class UnknownTemplateError(KeyError):
+    """Raised when a resume is rendered with a template id we do not ship."""
+
+
+def load_templates() -> Dict[str, Template]:
+    """Compile every resume template once and keep the compiled objects"""
+    for template_id in TEMPLATE_VERSIONS:
+        if template_id not in _compiled:
+            _compiled[template_id] = _env.get_template(f"{template_id}.html")
+    return _compiled
+
+
+def get_template(template_id: str) -> Template:
+    if template_id not in TEMPLATE_VERSIONS:
+        raise UnknownTemplateError(template_id)
+    if template_id not in _compiled:
+        load_templates()
+    return _compiled[template_id]
+
+
+def render_context(profile: Mapping[str, Any]) -> Dict[str, Any]:
+    """Reduce a stored profile document to the fields the templates use"""
+    context = {field: profile.get(field) for field in RENDER_FIELDS}
+    for field in ("experience", "education", "skills"):
+        context[field] = context[field] or []
+    context["full_name"] = " ".join(
+        part for part in (profile.get("first_name"), profile.get("last_name")) if part
+    )
+    return context
+
+
+def render_resume_html(profile: Mapping[str, Any], template_id: str, picture_src: Optional[str] = None) -> str:
+    """Render a stored profile with one of the resume templates.
+
+    ``picture_src`` replaces the profile picture URL, e.g. with a ``data:`` URI
+    so the rendered page needs no outbound fetch; an empty string leaves the
+    picture out.
+    """
+    context = render_context(profile)
+    if template_id not in PHOTO_TEMPLATES:
+        context["profile_picture"] = None
+    elif picture_src is not None:
+        context["profile_picture"] = picture_src or None
+    return get_template(template_id).render(context)
@@ -0,0 +1,108 @@
+"""Retry budget and circuit breaker for calls to upstream services.
+
+A ``RetryBudget`` caps retries at a fraction of recent first attempts, so a
+struggling upstream sees at most that much extra load from us instead of
+every request multiplying into several. A ``CircuitBreaker`` stops calling an
+upstream after consecutive failures and fails fast until ``reset_timeout`` has
+passed; then one probe call decides whether it closes again.
+"""
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+
+class RetryBudget:
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 1.0, window: float = 10.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.window = window
+        self._requests: Deque[float] = deque()
+        self._retries: Deque[float] = deque()
+
+    def _prune(self, now: float):
+        cutoff = now - self.window
+        for events in (self._requests, self._retries):
+            while events and events[0] < cutoff:
+                events.popleft()
+
+    def record_request(self):
+        now = time.monotonic()
+        self._prune(now)
+        self._requests.append(now)
+
+    def try_spend(self) -> bool:
+        """Take one retry from the budget; False if it is used up"""
+        now = time.monotonic()
+        self._prune(now)
+        allowed = max(self.min_per_second * self.window, self.ratio * len(self._requests))
+        if len(self._retries) >= allowed:
+            return False
+        self._retries.append(now)
+        return True
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 on_change: Optional[Callable[[str], None]] = None):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.on_change = on_change
+        self.failures = 0
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._set_state(self.HALF_OPEN)
+        return self._state
+
+    def retry_after(self) -> float:
+        """Seconds until an open breaker lets a probe through"""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; in half-open only one probe at a time does"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.OPEN:
+            return False
+        now = time.monotonic()
+        # A probe that never reported back (cancelled) stops blocking after reset_timeout
+        if self._probe_started is None or now - self._probe_started >= self.reset_timeout:
+            self._probe_started = now
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self._probe_started = None
+        if self._state != self.CLOSED:
+            self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        self.failures += 1
+        self._probe_started = None
+        if self._state == self.HALF_OPEN or (self._state == self.CLOSED and self.failures >= self.failure_threshold):
+            self._opened_at = time.monotonic()
+            self._set_state(self.OPEN)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "retry_after": round(self.retry_after(), 1),
+        }
+
+    def _set_state(self, state: str):
+        self._state = state
+        if self.on_change is not None:
+            self.on_change(state)
@@ -0,0 +1,682 @@
+"""In-process inverted index for searching stored profiles.
+
+Skills, headline, location, summary and experience entries are tokenized into
+weighted term frequencies; fields carry different weights so a skill match
+outranks a word buried in a job description. Queries are AND across terms and
+ranked with BM25. The last query term also matches as a prefix (type-ahead),
+as does any term written as ``term*``.
+
+Postings live in NumPy arrays. A new document is appended to a small tail
+buffer, which is sorted into an immutable segment (term ids, offsets, doc ids,
+frequencies) once it holds ``flush_postings`` postings, and segments of
+similar size are merged on the default executor. Replacing or removing a
+profile only clears its bit in the live-document mask: its postings, and its
+share of the document frequencies, go when its segment is next merged, and a
+segment that is a quarter dead is rewritten on its own. Terms no stored
+posting uses any more then leave the vocabulary. Prefixes are expanded through
+a large sorted vocabulary plus a small sorted list of recent terms that is
+folded into it once it grows, so a new term never shifts the whole list.
+
+A search resolves its terms on the event loop and scores on the executor,
+against the segments that existed when it started. A conjunction is driven by
+its rarest clause, whose documents are looked up in the other clauses'
+postings. A single clause (one word or one prefix) is read in blocks of
+BLOCK_SIZE postings, highest score bound first, and stops once no block left
+can reach the requested page; only the match count reads all of its postings.
+
+The index lives in each worker's memory. It is built from storage at startup
+and kept current through the profile change listeners, so a write is
+searchable as soon as its invalidation reaches the worker. Several workers
+only agree with each other through the Redis invalidation channel (the server
+refuses to run more than one without it), and a worker that lost the channel
+rebuilds its indexes from storage once it is back.
+"""
+import asyncio
+import bisect
+import heapq
+import logging
+import math
+import re
+from typing import Any, AsyncIterator, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+FIELD_WEIGHTS: Dict[str, float] = {
+    "skills": 3.0,
+    "headline": 2.0,
+    "location": 1.5,
+    "experience": 1.0,
+    "summary": 0.5,
+}
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Prefix matches count for less than exact ones
+PREFIX_PENALTY = 0.7
+
+# Postings per block of the score bounds used to stop reading early
+BLOCK_SIZE = 128
+
+# Two adjacent segments are merged once the newer one is at least this
+# fraction of the older one's size
+MERGE_RATIO = 0.5
+
+# Queries over fewer postings than this are scored on the event loop; the
+# hop to the executor would cost more than the scoring
+INLINE_POSTINGS = 1 << 14
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+def _field_text(value: Any) -> Iterable[str]:
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, Mapping):
+        for item in value.values():
+            yield from _field_text(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _field_text(item)
+
+
+def profile_terms(profile: Mapping[str, Any]) -> Dict[str, float]:
+    """Weighted term frequencies of the searchable fields of a profile"""
+    terms: Dict[str, float] = {}
+    for field, weight in FIELD_WEIGHTS.items():
+        for text in _field_text(profile.get(field)):
+            for token in tokenize(text):
+                terms[token] = terms.get(token, 0.0) + weight
+    return terms
+
+
+def _ranges(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Concatenation of ``arange(start, end)`` for every pair"""
+    counts = ends - starts
+    total = int(counts.sum())
+    if not total:
+        return np.zeros(0, dtype=np.int64)
+    return np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(total)
+
+
+def _bm25(weights, freqs: np.ndarray, lengths: np.ndarray, average_length: float) -> np.ndarray:
+    return weights * freqs * (K1 + 1) / (freqs + K1 * (1 - B + B * lengths / average_length))
+
+
+class _Segment:
+    """Immutable postings of the documents ``lo <= doc < hi``.
+
+    Term ``term_ids[i]`` owns ``docs[offsets[i]:offsets[i + 1]]`` (ascending)
+    and the matching weighted frequencies. Each term's postings are also cut
+    into blocks of BLOCK_SIZE; a block's largest frequency and shortest
+    document bound the score of any posting in it.
+    """
+
+    def __init__(self, lo: int, hi: int, terms: np.ndarray, docs: np.ndarray, freqs: np.ndarray,
+                 lengths: np.ndarray):
+        # Stable, so each term keeps its documents in ascending order
+        order = np.argsort(terms, kind="stable")
+        terms = terms[order]
+        self.lo = lo
+        self.hi = hi
+        self.docs = docs[order]
+        self.freqs = freqs[order]
+        starts = np.flatnonzero(np.diff(terms, prepend=-1))
+        self.term_ids = terms[starts]
+        self.offsets = np.append(starts, len(terms)).astype(np.int64)
+
+        counts = -(-np.diff(self.offsets) // BLOCK_SIZE)
+        self.block_offsets = np.append(0, np.cumsum(counts)).astype(np.int64)
+        block_in_term = np.arange(self.block_offsets[-1]) - np.repeat(self.block_offsets[:-1], counts)
+        self.block_starts = np.repeat(self.offsets[:-1], counts) + BLOCK_SIZE * block_in_term
+        self.block_ends = np.minimum(self.block_starts + BLOCK_SIZE, np.repeat(self.offsets[1:], counts))
+        if len(self.docs):
+            self.block_max_freq = np.maximum.reduceat(self.freqs, self.block_starts)
+            self.block_min_length = np.minimum.reduceat(lengths[self.docs], self.block_starts)
+        else:
+            self.block_max_freq = np.zeros(0, dtype=np.float32)
+            self.block_min_length = np.zeros(0, dtype=np.float32)
+        # Documents in range removed since the segment was written
+        self.dead = 0
+
+    @property
+    def postings(self) -> int:
+        return len(self.docs)
+
+    def find(self, term_ids: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(positions, weights) of those of ``term_ids`` (sorted) this segment has"""
+        positions = np.searchsorted(self.term_ids, term_ids)
+        found = positions < len(self.term_ids)
+        found[found] = self.term_ids[positions[found]] == term_ids[found]
+        return positions[found], weights[found]
+
+    def gather(self, positions: np.ndarray, weights: np.ndarray, view: "_View") -> Tuple[np.ndarray, np.ndarray]:
+        """Live documents and scores of every posting of the given terms"""
+        starts, ends = self.offsets[positions], self.offsets[positions + 1]
+        index = _ranges(starts, ends)
+        return view.score(self.docs[index], self.freqs[index], np.repeat(weights, ends - starts), self.dead)
+
+
+def _merge_segments(segments: List[_Segment], live: np.ndarray,
+                    lengths: np.ndarray) -> Tuple[_Segment, np.ndarray, np.ndarray]:
+    """The live postings of adjacent ``segments`` (oldest first) as one segment.
+
+    ``live`` covers ``segments[0].lo`` up to ``segments[-1].hi``. Also returns
+    the term ids of the dropped postings and how many each lost.
+    """
+    lo = segments[0].lo
+    terms = np.concatenate([np.repeat(segment.term_ids, np.diff(segment.offsets)) for segment in segments])
+    docs = np.concatenate([segment.docs for segment in segments])
+    freqs = np.concatenate([segment.freqs for segment in segments])
+    keep = live[docs - lo]
+    dropped, counts = np.unique(terms[~keep], return_counts=True)
+    merged = _Segment(lo, segments[-1].hi, terms[keep], docs[keep], freqs[keep], lengths)
+    return merged, dropped, counts
+
+
+def _best_per_doc(docs: np.ndarray, scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """One entry per document, with its highest score, in document order"""
+    order = np.lexsort((-scores, docs))
+    docs, scores = docs[order], scores[order]
+    first = np.ones(len(docs), dtype=bool)
+    first[1:] = docs[1:] != docs[:-1]
+    return docs[first], scores[first]
+
+
+def _top(docs: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """The ``k`` best documents, best first; ties go to the older document"""
+    if len(docs) > k:
+        best = np.argpartition(-scores, k - 1)[:k]
+        docs, scores = docs[best], scores[best]
+    order = np.lexsort((docs, -scores))
+    return docs[order], scores[order]
+
+
+class _View:
+    """What one search reads: the index as it was when the search started"""
+
+    def __init__(self, segments: List[_Segment], tail: Tuple[np.ndarray, np.ndarray, np.ndarray],
+                 lengths: np.ndarray, live: np.ndarray, average_length: float):
+        self.segments = segments
+        self.tail_terms, self.tail_docs, self.tail_freqs = tail
+        self.lengths = lengths
+        self.live = live
+        self.average_length = average_length
+
+    def score(self, docs: np.ndarray, freqs: np.ndarray, weights, dead: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        if dead:
+            alive = self.live[docs]
+            docs, freqs = docs[alive], freqs[alive]
+            if not np.isscalar(weights):
+                weights = weights[alive]
+        return docs, _bm25(weights, freqs, self.lengths[docs], self.average_length)
+
+    def tail_postings(self, term_ids: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        matches = np.flatnonzero(np.isin(self.tail_terms, term_ids))
+        weights = weights[np.searchsorted(term_ids, self.tail_terms[matches])]
+        return self.score(self.tail_docs[matches], self.tail_freqs[matches], weights)
+
+    def run(self, clauses: List[Tuple[np.ndarray, np.ndarray, int]], k: int) -> Tuple[int, np.ndarray, np.ndarray]:
+        """(number of matches, best ``k`` documents, their scores)"""
+        if len(clauses) == 1:
+            return self._run_clause(clauses[0][0], clauses[0][1], k)
+        return self._run_conjunction(clauses, k)
+
+    def _run_clause(self, term_ids: np.ndarray, weights: np.ndarray, k: int) -> Tuple[int, np.ndarray, np.ndarray]:
+        tail_docs, tail_scores = self.tail_postings(term_ids, weights)
+        found = [segment.find(term_ids, weights) for segment in self.segments]
+
+        if len(term_ids) == 1:
+            total = len(tail_docs)
+            for segment, (positions, _) in zip(self.segments, found):
+                for start, end in zip(segment.offsets[positions].tolist(), segment.offsets[positions + 1].tolist()):
+                    total += end - start if not segment.dead else int(np.count_nonzero(self.live[segment.docs[start:end]]))
+        else:
+            seen = np.zeros(len(self.live), dtype=bool)
+            seen[tail_docs] = True
+            for segment, (positions, _) in zip(self.segments, found):
+                for start, end in zip(segment.offsets[positions].tolist(), segment.offsets[positions + 1].tolist()):
+                    seen[segment.docs[start:end]] = True
+            total = int(np.count_nonzero(seen & self.live))
+
+        # Every block of every term, with the best score a posting in it can have
+        block_segments, blocks, block_weights, bounds = [], [], [], []
+        for number, (segment, (positions, term_weights)) in enumerate(zip(self.segments, found)):
+            first, last = segment.block_offsets[positions], segment.block_offsets[positions + 1]
+            index = _ranges(first, last)
+            weight = np.repeat(term_weights, last - first)
+            block_segments.append(np.full(len(index), number, dtype=np.int32))
+            blocks.append(index)
+            block_weights.append(weight)
+            bounds.append(_bm25(weight, segment.block_max_freq[index], segment.block_min_length[index],
+                                self.average_length))
+        block_segments = np.concatenate(block_segments) if block_segments else np.zeros(0, dtype=np.int32)
+        blocks = np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.int64)
+        block_weights = np.concatenate(block_weights) if block_weights else np.zeros(0)
+        bounds = np.concatenate(bounds) if bounds else np.zeros(0)
+        order = np.argsort(-bounds, kind="stable")
+
+        docs, scores = [tail_docs], [tail_scores]
+        read = 0
+        batch = max(8, -(-2 * k // BLOCK_SIZE))
+        while read < len(order):
+            chunk = order[read:read + batch]
+            read += len(chunk)
+            batch *= 2
+            for number in np.unique(block_segments[chunk]).tolist():
+                picked = chunk[block_segments[chunk] == number]
+                segment = self.segments[number]
+                starts, ends = segment.block_starts[blocks[picked]], segment.block_ends[blocks[picked]]
+                index = _ranges(starts, ends)
+                block_docs, block_scores = self.score(
+                    segment.docs[index], segment.freqs[index], np.repeat(block_weights[picked], ends - starts),
+                    segment.dead,
+                )
+                docs.append(block_docs)
+                scores.append(block_scores)
+            if read == len(order):
+                break
+            docs, scores = [np.concatenate(docs)], [np.concatenate(scores)]
+            if len(term_ids) > 1:
+                docs[0], scores[0] = _best_per_doc(docs[0], scores[0])
+            if len(scores[0]) >= k:
+                kth = np.partition(scores[0], len(scores[0]) - k)[len(scores[0]) - k]
+                # No posting left can reach the page, nor raise the best
+                # score of a document already on it
+                if bounds[order[read]] < kth:
+                    break
+
+        docs, scores = np.concatenate(docs), np.concatenate(scores)
+        if len(term_ids) > 1:
+            docs, scores = _best_per_doc(docs, scores)
+        return (total, *_top(docs, scores, k))
+
+    def _run_conjunction(self, clauses: List[Tuple[np.ndarray, np.ndarray, int]],
+                         k: int) -> Tuple[int, np.ndarray, np.ndarray]:
+        clauses = sorted(clauses, key=lambda clause: clause[2])
+        term_ids, weights, _ = clauses[0]
+        docs, scores = [], []
+        for segment in self.segments:
+            segment_docs, segment_scores = segment.gather(*segment.find(term_ids, weights), self)
+            docs.append(segment_docs)
+            scores.append(segment_scores)
+        tail_docs, tail_scores = self.tail_postings(term_ids, weights)
+        candidates, totals = np.concatenate(docs + [tail_docs]), np.concatenate(scores + [tail_scores])
+        # Segments and then the tail hold ascending document ranges, so one
+        # term's documents are already in order
+        if len(term_ids) > 1:
+            candidates, totals = _best_per_doc(candidates, totals)
+
+        for term_ids, weights, _ in clauses[1:]:
+            best = np.full(len(candidates), -1.0)
+            for segment in self.segments:
+                lo, hi = np.searchsorted(candidates, [segment.lo, segment.hi]).tolist()
+                if lo == hi:
+                    continue
+                positions, term_weights = segment.find(term_ids, weights)
+                inside, target = candidates[lo:hi], best[lo:hi]
+                for start, end, weight in zip(segment.offsets[positions].tolist(),
+                                              segment.offsets[positions + 1].tolist(), term_weights.tolist()):
+                    term_docs, term_freqs = segment.docs[start:end], segment.freqs[start:end]
+                    # Search the shorter list in the longer one
+                    if len(term_docs) < len(inside):
+                        at = np.searchsorted(inside, term_docs)
+                        hit = at < len(inside)
+                        hit[hit] = inside[at[hit]] == term_docs[hit]
+                        at, matched, freqs = at[hit], term_docs[hit], term_freqs[hit]
+                    else:
+                        at = np.searchsorted(term_docs, inside)
+                        hit = at < len(term_docs)
+                        hit[hit] = term_docs[at[hit]] == inside[hit]
+                        matched, freqs, at = inside[hit], term_freqs[at[hit]], np.flatnonzero(hit)
+                    target[at] = np.maximum(target[at], _bm25(weight, freqs, self.lengths[matched],
+                                                                self.average_length))
+            tail_docs, tail_scores = self.tail_postings(term_ids, weights)
+            at = np.searchsorted(candidates, tail_docs)
+            hit = at < len(candidates)
+            hit[hit] = candidates[at[hit]] == tail_docs[hit]
+            np.maximum.at(best, at[hit], tail_scores[hit])
+
+            matched = best >= 0
+            candidates, totals = candidates[matched], totals[matched] + best[matched]
+            if not len(candidates):
+                break
+        return (len(candidates), *_top(candidates, totals, k))
+
+
+class SearchIndex:
+    def __init__(self, max_prefix_terms: int = 64, flush_postings: int = 1 << 17):
+        self.max_prefix_terms = max_prefix_terms
+        self.flush_postings = flush_postings
+        # Documents: one per indexed version of a profile; ids are never reused
+        self._doc_ids: Dict[str, int] = {}
+        self._doc_users: List[Optional[str]] = []
+        self._doc_length = np.zeros(1024, dtype=np.float32)
+        self._live = np.zeros(1024, dtype=bool)
+        self._total_length = 0.0
+        # Removed documents whose postings are still stored
+        self._dead = 0
+        # Terms: ids are never reused; _df counts stored postings, live or not
+        self._terms: Dict[str, int] = {}
+        self._term_names: List[Optional[str]] = []
+        self._df = np.zeros(1024, dtype=np.int32)
+        self._vocabulary: List[str] = []
+        self._recent_terms: List[str] = []
+        # Entries of the two lists above that are no longer terms
+        self._pruned = 0
+        # Postings of the documents from _tail_lo on, in insertion order
+        self._tail_lo = 0
+        self._tail_dead = 0
+        self._tail_size = 0
+        self._new_tail(min(flush_postings, 1 << 12))
+        self._segments: List[_Segment] = []
+        self._segment_starts: List[int] = []
+        self._merging: Optional[asyncio.Task] = None
+        # Profiles written while the initial build is running; the build
+        # skips them so it cannot overwrite a newer version with an older one
+        self._touched: Optional[Set[str]] = None
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._doc_ids)
+
+    def update(self, profile: Mapping[str, Any]):
+        """Index ``profile``, replacing whatever was indexed for its user"""
+        user_id = profile["user_id"]
+        if self._touched is not None:
+            self._touched.add(user_id)
+        self._remove(user_id)
+
+        terms = profile_terms(profile)
+        doc = len(self._doc_users)
+        self._reserve_docs(doc + 1)
+        length = sum(terms.values())
+        self._doc_users.append(user_id)
+        self._doc_ids[user_id] = doc
+        self._doc_length[doc] = length
+        self._live[doc] = True
+        self._total_length += length
+        if terms:
+            term_ids = np.fromiter((self._term_id(term) for term in terms), dtype=np.int32, count=len(terms))
+            self._df[term_ids] += 1
+            self._append_tail(term_ids, doc, np.fromiter(terms.values(), dtype=np.float32, count=len(terms)))
+            if self._tail_size >= self.flush_postings:
+                self._flush()
+
+    def remove(self, user_id: str):
+        if self._touched is not None:
+            self._touched.add(user_id)
+        self._remove(user_id)
+
+    def _remove(self, user_id: str):
+        doc = self._doc_ids.pop(user_id, None)
+        if doc is None:
+            return
+        self._live[doc] = False
+        self._doc_users[doc] = None
+        self._total_length -= float(self._doc_length[doc])
+        if doc >= self._tail_lo:
+            self._tail_dead += 1
+            self._dead += 1
+            return
+        index = bisect.bisect_right(self._segment_starts, doc) - 1
+        if index >= 0 and doc < self._segments[index].hi:
+            self._segments[index].dead += 1
+            self._dead += 1
+            self._maybe_merge()
+
+    def _reserve_docs(self, count: int):
+        if count <= len(self._live):
+            return
+        capacity = max(2 * len(self._live), count)
+        for name in ("_doc_length", "_live"):
+            grown = np.zeros(capacity, dtype=getattr(self, name).dtype)
+            grown[:len(self._doc_users)] = getattr(self, name)[:len(self._doc_users)]
+            setattr(self, name, grown)
+
+    def _term_id(self, term: str) -> int:
+        term_id = self._terms.get(term)
+        if term_id is not None:
+            return term_id
+        term_id = len(self._term_names)
+        if term_id == len(self._df):
+            self._df = np.concatenate([self._df, np.zeros(len(self._df), dtype=np.int32)])
+        self._term_names.append(term)
+        self._terms[term] = term_id
+        if self._listed(term):
+            # Pruned earlier and not yet compacted away
+            self._pruned -= 1
+        else:
+            bisect.insort(self._recent_terms, term)
+            if len(self._recent_terms) > max(1024, len(self._vocabulary) // 16):
+                self._compact_vocabulary()
+        return term_id
+
+    def _listed(self, term: str) -> bool:
+        for vocabulary in (self._vocabulary, self._recent_terms):
+            index = bisect.bisect_left(vocabulary, term)
+            if index < len(vocabulary) and vocabulary[index] == term:
+                return True
+        return False
+
+    def _compact_vocabulary(self):
+        vocabulary = self._vocabulary + self._recent_terms
+        # Two sorted runs: the sort merges them in linear time
+        vocabulary.sort()
+        if self._pruned:
+            vocabulary = [term for term in vocabulary if term in self._terms]
+            self._pruned = 0
+        self._vocabulary = vocabulary
+        self._recent_terms = []
+
+    def _drop_postings(self, term_ids: np.ndarray, counts: np.ndarray):
+        """Forget ``counts`` stored postings of each of ``term_ids``; unused terms leave the vocabulary"""
+        self._df[term_ids] -= counts
+        for term_id in term_ids[self._df[term_ids] == 0].tolist():
+            del self._terms[self._term_names[term_id]]
+            self._term_names[term_id] = None
+            self._pruned += 1
+        if self._pruned > max(1024, (len(self._vocabulary) + len(self._recent_terms)) // 4):
+            self._compact_vocabulary()
+
+    def _new_tail(self, capacity: int):
+        # New arrays rather than reused ones: a search running on the
+        # executor may still be reading the old ones
+        self._tail_terms = np.zeros(capacity, dtype=np.int32)
+        self._tail_docs = np.zeros(capacity, dtype=np.int32)
+        self._tail_freqs = np.zeros(capacity, dtype=np.float32)
+
+    def _append_tail(self, term_ids: np.ndarray, doc: int, freqs: np.ndarray):
+        start = self._tail_size
+        end = start + len(term_ids)
+        if end > len(self._tail_terms):
+            capacity = max(2 * len(self._tail_terms), end)
+            for name in ("_tail_terms", "_tail_docs", "_tail_freqs"):
+                grown = np.zeros(capacity, dtype=getattr(self, name).dtype)
+                grown[:start] = getattr(self, name)[:start]
+                setattr(self, name, grown)
+        self._tail_terms[start:end] = term_ids
+        self._tail_docs[start:end] = doc
+        self._tail_freqs[start:end] = freqs
+        self._tail_size = end
+
+    def _flush(self):
+        """Sort the tail into a new segment"""
+        size = self._tail_size
+        terms, docs, freqs = self._tail_terms[:size], self._tail_docs[:size], self._tail_freqs[:size]
+        keep = self._live[docs]
+        if not keep.all():
+            self._drop_postings(*np.unique(terms[~keep], return_counts=True))
+        segment = _Segment(self._tail_lo, len(self._doc_users), terms[keep], docs[keep], freqs[keep],
+                           self._doc_length)
+        self._dead -= self._tail_dead
+        self._tail_lo = len(self._doc_users)
+        self._tail_dead = 0
+        self._tail_size = 0
+        self._new_tail(len(self._tail_terms))
+        if segment.postings:
+            self._set_segments(self._segments + [segment])
+            self._maybe_merge()
+
+    def _set_segments(self, segments: List[_Segment]):
+        self._segments = segments
+        self._segment_starts = [segment.lo for segment in segments]
+
+    def _merge_plan(self) -> Optional[List[_Segment]]:
+        """Adjacent segments to merge next, if any"""
+        segments = self._segments
+        for index in range(len(segments) - 1, 0, -1):
+            if segments[index].postings >= MERGE_RATIO * segments[index - 1].postings:
+                return segments[index - 1:index + 1]
+        for segment in segments:
+            if 4 * segment.dead > segment.hi - segment.lo:
+                return [segment]
+        return None
+
+    def _maybe_merge(self):
+        if self._merging is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Not serving (scripts, tests): merge in place
+            while True:
+                plan = self._merge_plan()
+                if plan is None:
+                    return
+                live = self._live[plan[0].lo:plan[-1].hi].copy()
+                self._finish_merge(plan, live, _merge_segments(plan, live, self._doc_length))
+        plan = self._merge_plan()
+        if plan is not None:
+            self._merging = loop.create_task(self._merge(plan))
+
+    async def _merge(self, plan: List[_Segment]):
+        try:
+            live = self._live[plan[0].lo:plan[-1].hi].copy()
+            result = await asyncio.get_running_loop().run_in_executor(
+                None, _merge_segments, plan, live, self._doc_length
+            )
+            self._finish_merge(plan, live, result)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Search index merge failed: {e!r}")
+            return
+        finally:
+            self._merging = None
+        self._maybe_merge()
+
+    def _finish_merge(self, plan: List[_Segment], live: np.ndarray, result: Tuple[_Segment, np.ndarray, np.ndarray]):
+        segment, dropped, counts = result
+        lo, hi = plan[0].lo, plan[-1].hi
+        index = next(number for number, existing in enumerate(self._segments) if existing is plan[0])
+        replacement = []
+        if segment.postings:
+            # Removed while the merge ran, so still stored in the new segment
+            segment.dead = int(np.count_nonzero(live & ~self._live[lo:hi]))
+            replacement.append(segment)
+        self._dead += segment.dead - sum(old.dead for old in plan)
+        self._set_segments(self._segments[:index] + replacement + self._segments[index + len(plan):])
+        if len(dropped):
+            self._drop_postings(dropped, counts)
+
+    def close(self):
+        """Cancel a merge still running in the background"""
+        if self._merging is not None:
+            self._merging.cancel()
+            self._merging = None
+
+    async def build(self, profiles: AsyncIterator[Mapping[str, Any]], yield_every: int = 500):
+        """Index every profile from ``profiles``, yielding to the event loop as it goes"""
+        self._touched = set()
+        try:
+            indexed = 0
+            async for profile in profiles:
+                if profile["user_id"] not in self._touched:
+                    self.update(profile)
+                    # update() marked it; the build itself does not count as a write
+                    self._touched.discard(profile["user_id"])
+                indexed += 1
+                if indexed % yield_every == 0:
+                    await asyncio.sleep(0)
+        finally:
+            self._touched = None
+        self.ready = True
+
+    def _expand(self, term: str) -> List[str]:
+        sources = [
+            map(vocabulary.__getitem__, range(bisect.bisect_left(vocabulary, term), len(vocabulary)))
+            for vocabulary in (self._vocabulary, self._recent_terms)
+        ]
+        matches = []
+        for candidate in heapq.merge(*sources):
+            if not candidate.startswith(term):
+                break
+            if candidate in self._terms:
+                matches.append(candidate)
+                if len(matches) == self.max_prefix_terms:
+                    break
+        return matches
+
+    def _clauses(self, query: str, prefix: bool) -> Optional[List[Tuple[np.ndarray, np.ndarray, int]]]:
+        """(term ids, BM25 weights, stored postings) per query word; None if one cannot match"""
+        words = query.lower().split()
+        total_docs = len(self._doc_ids) + self._dead
+        clauses = []
+        seen = set()
+        for position, word in enumerate(words):
+            wildcard = word.endswith("*") or (prefix and position == len(words) - 1)
+            for token in tokenize(word):
+                if (token, wildcard) in seen:
+                    continue
+                seen.add((token, wildcard))
+                # term -> weight of a match on it for this clause
+                clause = {token: 1.0} if token in self._terms else {}
+                if wildcard:
+                    for term in self._expand(token):
+                        clause.setdefault(term, PREFIX_PENALTY)
+                if not clause:
+                    return None
+                term_ids = np.fromiter((self._terms[term] for term in clause), dtype=np.int32, count=len(clause))
+                order = np.argsort(term_ids)
+                frequency = self._df[term_ids[order]].astype(np.float64)
+                idf = np.log1p((total_docs - frequency + 0.5) / (frequency + 0.5))
+                weights = idf * np.fromiter(clause.values(), dtype=np.float64, count=len(clause))[order]
+                clauses.append((term_ids[order], weights, int(frequency.sum())))
+        return clauses
+
+    async def search(self, query: str, offset: int = 0, limit: int = 20, prefix: bool = True) -> Tuple[int, List[Tuple[str, float]]]:
+        """(number of matches, [(user_id, score)] for the requested page)"""
+        clauses = self._clauses(query, prefix)
+        if not clauses:
+            return 0, []
+        size = self._tail_size
+        view = _View(
+            self._segments,
+            (self._tail_terms[:size], self._tail_docs[:size], self._tail_freqs[:size]),
+            self._doc_length,
+            self._live,
+            (self._total_length / len(self._doc_ids) if self._doc_ids else 0.0) or 1.0,
+        )
+        if sum(postings for _, _, postings in clauses) <= INLINE_POSTINGS:
+            total, docs, scores = view.run(clauses, offset + limit)
+        else:
+            total, docs, scores = await asyncio.get_running_loop().run_in_executor(
+                None, view.run, clauses, offset + limit
+            )
+
+        hits = []
+        for doc, score in zip(docs[offset:].tolist(), scores[offset:].tolist()):
+            # Removed while the search ran
+            user_id = self._doc_users[doc]
+            if user_id is not None:
+                hits.append((user_id, round(score, 4)))
+        return total, hits
@@ -1,32 +1,66 @@
 from fastapi import FastAPI, APIRouter, HTTPException, Request, Query
-from fastapi.responses import RedirectResponse, HTMLResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse, RedirectResponse, HTMLResponse, Response, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from contextlib import asynccontextmanager
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
+from collections import Counter
 import uuid
 from datetime import datetime
-import httpx
+import asyncio
 import json
+import tempfile
+from urllib.parse import urlencode
+
+import httpx
+
+from artifact_cache import ArtifactCache, artifact_key
+from image_proxy import FORMATS, IMAGE_SIZES, ImageFetchError, ImageNotAllowed, ImageProxy, etag_matches, image_etag
+from jobs import TERMINAL_STATES, InMemoryJobBackend, JobQueue, PermanentJobError, RedisJobBackend
+from linkedin_client import DEFAULT_API_URL, DEFAULT_OAUTH_URL, LinkedInAPIError, LinkedInClient, LinkedInUnavailable
+from match_index import MatchIndex
+from metrics import MongoCommandMetrics, PrometheusMiddleware, mark_worker_dead, monitor_event_loop_lag, render_latest
+from models import BulkResumeRequest, JobMatchRequest, LinkedInProfile, ResumeRequest, ResumeTemplate, StatusCheck, StatusCheckCreate
+from oauth_store import OAuthStore
+from pagination import decode_cursor, encode_cursor, ndjson_rows
+from pdf_export import ExportQueueFull, ExportTimeout, PdfExporter
+from profile_cache import ProfileCache
+from profile_sync import SYNCED_FIELDS, diff_fields, linkedin_fields
+from rendering import PHOTO_TEMPLATES, TEMPLATE_VERSIONS, load_templates, render_resume_html
+from search_index import SearchIndex
+from storage import create_storage
+from token_cipher import TokenCipher
+from versions import load_versions, make_patch, record_version, resume_profile
+from write_buffer import BufferFull, WriteBehindBuffer
 
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Number of uvicorn worker processes (uvicorn reads the same variable); every
+# worker builds its own clients, pools and caches in the lifespan handler
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', '1'))
 
-# Create the main app without a prefix
-app = FastAPI()
+# Storage backend: "mongo" (default) or the embedded "sqlite"
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'mongo')
+SQLITE_PATH = os.getenv('SQLITE_PATH', str(ROOT_DIR / 'resume_builder.db'))
+
+storage = create_storage(
+    STORAGE_BACKEND,
+    mongo_url=os.getenv('MONGO_URL'),
+    db_name=os.getenv('DB_NAME'),
+    sqlite_path=SQLITE_PATH,
+    profile_fields=list(LinkedInProfile.model_fields),
+    status_fields=list(StatusCheck.model_fields),
+    event_listeners=[MongoCommandMetrics()],
+)
 
 # Create a router with the /api prefix
-api_router = APIRouter(prefix="/api")
+api_router = APIRouter(prefix="/api", default_response_class=ORJSONResponse)
 
 # LinkedIn OAuth Configuration
 LINKEDIN_CLIENT_ID = os.getenv('LINKEDIN_CLIENT_ID')
@@ -37,234 +71,1082 @@ FRONTEND_URL = os.getenv('FRONTEND_URL', FRONTEND_URL_DEFAULT)
 BACKEND_URL_DEFAULT = "https://cf80c52e-5751-499f-940c-f2a1ff6b2f54.preview.emergentagent.com/api"
 BACKEND_URL = os.getenv('BACKEND_URL', BACKEND_URL_DEFAULT)
 REDIRECT_URI = f"{FRONTEND_URL}/api/auth/linkedin/callback"
+LINKEDIN_OAUTH_URL = os.getenv('LINKEDIN_OAUTH_URL', DEFAULT_OAUTH_URL)
+LINKEDIN_API_URL = os.getenv('LINKEDIN_API_URL', DEFAULT_API_URL)
+LINKEDIN_HTTP2 = os.getenv('LINKEDIN_HTTP2', 'false').lower() == 'true'
+LINKEDIN_MAX_CONNECTIONS = int(os.getenv('LINKEDIN_MAX_CONNECTIONS', '100'))
+LINKEDIN_MAX_KEEPALIVE = int(os.getenv('LINKEDIN_MAX_KEEPALIVE', '20'))
+LINKEDIN_CONNECT_TIMEOUT = float(os.getenv('LINKEDIN_CONNECT_TIMEOUT', '3'))
+LINKEDIN_READ_TIMEOUT = float(os.getenv('LINKEDIN_READ_TIMEOUT', '10'))
+# Outbound protection: calls in flight, whole-call deadline, retries and breaker
+LINKEDIN_MAX_CONCURRENCY = int(os.getenv('LINKEDIN_MAX_CONCURRENCY', '32'))
+LINKEDIN_ACQUIRE_TIMEOUT = float(os.getenv('LINKEDIN_ACQUIRE_TIMEOUT', '1'))
+LINKEDIN_CALL_TIMEOUT = float(os.getenv('LINKEDIN_CALL_TIMEOUT', '15'))
+LINKEDIN_MAX_ATTEMPTS = int(os.getenv('LINKEDIN_MAX_ATTEMPTS', '3'))
+LINKEDIN_RETRY_BACKOFF = float(os.getenv('LINKEDIN_RETRY_BACKOFF', '0.2'))
+LINKEDIN_RETRY_BUDGET_RATIO = float(os.getenv('LINKEDIN_RETRY_BUDGET_RATIO', '0.2'))
+LINKEDIN_BREAKER_THRESHOLD = int(os.getenv('LINKEDIN_BREAKER_THRESHOLD', '5'))
+LINKEDIN_BREAKER_RESET = float(os.getenv('LINKEDIN_BREAKER_RESET', '30'))
+
+linkedin_client = LinkedInClient(
+    LINKEDIN_CLIENT_ID,
+    LINKEDIN_CLIENT_SECRET,
+    REDIRECT_URI,
+    oauth_url=LINKEDIN_OAUTH_URL,
+    api_url=LINKEDIN_API_URL,
+    http2=LINKEDIN_HTTP2,
+    max_connections=LINKEDIN_MAX_CONNECTIONS,
+    max_keepalive_connections=LINKEDIN_MAX_KEEPALIVE,
+    connect_timeout=LINKEDIN_CONNECT_TIMEOUT,
+    read_timeout=LINKEDIN_READ_TIMEOUT,
+    max_concurrency=LINKEDIN_MAX_CONCURRENCY,
+    acquire_timeout=LINKEDIN_ACQUIRE_TIMEOUT,
+    call_timeout=LINKEDIN_CALL_TIMEOUT,
+    max_attempts=LINKEDIN_MAX_ATTEMPTS,
+    retry_backoff=LINKEDIN_RETRY_BACKOFF,
+    retry_budget_ratio=LINKEDIN_RETRY_BUDGET_RATIO,
+    breaker_threshold=LINKEDIN_BREAKER_THRESHOLD,
+    breaker_reset=LINKEDIN_BREAKER_RESET,
+)
+
+# Stored LinkedIn access tokens (for profile refresh) are encrypted with this
+# key; without it tokens are not kept and a refresh needs a new login
+token_cipher = TokenCipher(os.getenv('TOKEN_ENCRYPTION_KEY'))
+
+# OAuth state and token store; states are signed with OAUTH_STATE_SECRET
+# (falling back to the LinkedIn client secret), which every worker must share
+OAUTH_STATE_TTL = float(os.getenv('OAUTH_STATE_TTL', '600'))
+OAUTH_TOKEN_CACHE_ENTRIES = int(os.getenv('OAUTH_TOKEN_CACHE_ENTRIES', '10000'))
+# HttpOnly cookie that lets the browser that logged in reuse its stored token
+SESSION_COOKIE = "linkedin_session"
+
+# PDF export pool configuration
+# Each worker has its own pool, so the default splits the cores between workers
+PDF_POOL_SIZE = int(os.getenv('PDF_POOL_SIZE', max(1, min(2, (os.cpu_count() or 1) // WEB_CONCURRENCY))))
+PDF_MAX_QUEUE = int(os.getenv('PDF_MAX_QUEUE', '16'))
+PDF_JOB_TIMEOUT = float(os.getenv('PDF_JOB_TIMEOUT', '30'))
+
+pdf_exporter = PdfExporter(PDF_POOL_SIZE, PDF_MAX_QUEUE, PDF_JOB_TIMEOUT)
+
+# Status check listing
+STATUS_PAGE_DEFAULT = int(os.getenv('STATUS_PAGE_DEFAULT', '100'))
+STATUS_PAGE_MAX = int(os.getenv('STATUS_PAGE_MAX', '1000'))
+STATUS_STREAM_BATCH = int(os.getenv('STATUS_STREAM_BATCH', '500'))
+
+# Status check ingestion
+STATUS_BATCH_MAX_ITEMS = int(os.getenv('STATUS_BATCH_MAX_ITEMS', '1000'))
+STATUS_WRITE_BEHIND = os.getenv('STATUS_WRITE_BEHIND', 'false').lower() == 'true'
+STATUS_BUFFER_MAX_BATCH = int(os.getenv('STATUS_BUFFER_MAX_BATCH', '500'))
+STATUS_BUFFER_FLUSH_INTERVAL = float(os.getenv('STATUS_BUFFER_FLUSH_INTERVAL', '1.0'))
+STATUS_BUFFER_MAX_PENDING = int(os.getenv('STATUS_BUFFER_MAX_PENDING', '10000'))
+STATUS_BUFFER_OVERFLOW = os.getenv('STATUS_BUFFER_OVERFLOW', 'block')
+
+async def write_status_checks(documents: List[Dict[str, Any]]) -> int:
+    # Resolved per flush: the Mongo repositories only exist once storage has started
+    failed = await storage.statuses.insert_many(documents)
+    return len(documents) - len(failed)
+
+status_buffer = WriteBehindBuffer(
+    write_status_checks,
+    max_batch=STATUS_BUFFER_MAX_BATCH,
+    flush_interval=STATUS_BUFFER_FLUSH_INTERVAL,
+    max_pending=STATUS_BUFFER_MAX_PENDING,
+    overflow=STATUS_BUFFER_OVERFLOW,
+) if STATUS_WRITE_BEHIND else None
+
+# Profile version history: a full base is stored at least this often
+VERSION_REBASE_INTERVAL = int(os.getenv('VERSION_REBASE_INTERVAL', '20'))
+VERSION_LIST_MAX = int(os.getenv('VERSION_LIST_MAX', '500'))
+
+# Health probes
+HEALTH_CHECK_TIMEOUT = float(os.getenv('HEALTH_CHECK_TIMEOUT', '2'))
+
+# Bulk resume generation
+BULK_MAX_ITEMS = int(os.getenv('BULK_MAX_ITEMS', '1000'))
+BULK_CONCURRENCY = int(os.getenv('BULK_CONCURRENCY', '8'))
+BULK_INSERT_BATCH = int(os.getenv('BULK_INSERT_BATCH', '100'))
+
+# Profile read-through cache configuration
+PROFILE_CACHE_TTL = float(os.getenv('PROFILE_CACHE_TTL', '60'))
+PROFILE_CACHE_MAX_ENTRIES = int(os.getenv('PROFILE_CACHE_MAX_ENTRIES', '1024'))
+REDIS_URL = os.getenv('REDIS_URL')
+
+profile_cache = ProfileCache(PROFILE_CACHE_TTL, PROFILE_CACHE_MAX_ENTRIES, redis_url=REDIS_URL)
+oauth_store = OAuthStore(
+    token_cipher,
+    storage,
+    state_secret=os.getenv('OAUTH_STATE_SECRET') or LINKEDIN_CLIENT_SECRET,
+    state_ttl=OAUTH_STATE_TTL,
+    max_tokens=OAUTH_TOKEN_CACHE_ENTRIES,
+    redis_url=REDIS_URL,
+)
+
+# Profile search index configuration
+SEARCH_PAGE_MAX = int(os.getenv('SEARCH_PAGE_MAX', '100'))
+SEARCH_BUILD_BATCH = int(os.getenv('SEARCH_BUILD_BATCH', '1000'))
+SEARCH_MAX_PREFIX_TERMS = int(os.getenv('SEARCH_MAX_PREFIX_TERMS', '64'))
 
-# Define Models
-class StatusCheck(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    client_name: str
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
-
-class StatusCheckCreate(BaseModel):
-    client_name: str
-
-class LinkedInProfile(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    user_id: str
-    first_name: str
-    last_name: str
-    headline: Optional[str] = None
-    email: Optional[str] = None
-    profile_picture: Optional[str] = None
-    location: Optional[str] = None
-    summary: Optional[str] = None
-    experience: List[Dict[str, Any]] = []
-    education: List[Dict[str, Any]] = []
-    skills: List[str] = []
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-
-class ResumeTemplate(BaseModel):
-    id: str
-    name: str
-    description: str
-    preview_image: str
-    style: str
+search_index = SearchIndex(max_prefix_terms=SEARCH_MAX_PREFIX_TERMS)
+
+# Job description matching configuration
+MATCH_PAGE_MAX = int(os.getenv('MATCH_PAGE_MAX', '100'))
+MATCH_MAX_USER_IDS = int(os.getenv('MATCH_MAX_USER_IDS', '10000'))
+
+match_index = MatchIndex()
+
+# Background job queue configuration
+JOB_BACKEND = os.getenv('JOB_BACKEND', 'memory')
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '4'))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+JOB_RETRY_BACKOFF = float(os.getenv('JOB_RETRY_BACKOFF', '0.5'))
+JOB_TTL = float(os.getenv('JOB_TTL', '3600'))
+JOB_DEAD_LETTER_MAX = int(os.getenv('JOB_DEAD_LETTER_MAX', '1000'))
+# Progress streams send a comment this often while idle, and end after the max wait
+JOB_EVENTS_KEEPALIVE = float(os.getenv('JOB_EVENTS_KEEPALIVE', '15'))
+JOB_EVENTS_MAX_WAIT = float(os.getenv('JOB_EVENTS_MAX_WAIT', '300'))
+
+job_queue = JobQueue(
+    RedisJobBackend(REDIS_URL, ttl=JOB_TTL, max_dead_letter=JOB_DEAD_LETTER_MAX) if JOB_BACKEND == 'redis'
+    else InMemoryJobBackend(ttl=JOB_TTL, max_dead_letter=JOB_DEAD_LETTER_MAX),
+    workers=JOB_WORKERS,
+    max_attempts=JOB_MAX_ATTEMPTS,
+    retry_backoff=JOB_RETRY_BACKOFF,
+)
+
+# Rendered artifact cache configuration
+ARTIFACT_CACHE_DIR = Path(os.getenv('ARTIFACT_CACHE_DIR', Path(tempfile.gettempdir()) / 'resume-artifacts'))
+ARTIFACT_CACHE_MEMORY_ITEMS = int(os.getenv('ARTIFACT_CACHE_MEMORY_ITEMS', '256'))
+ARTIFACT_CACHE_DISK_MB = int(os.getenv('ARTIFACT_CACHE_DISK_MB', '512'))
+
+artifact_cache = ArtifactCache(
+    ARTIFACT_CACHE_DIR,
+    memory_items=ARTIFACT_CACHE_MEMORY_ITEMS,
+    disk_max_bytes=ARTIFACT_CACHE_DISK_MB * 1024 * 1024,
+)
+
+# Image proxy: resized profile pictures and template previews
+IMAGE_CACHE_DIR = Path(os.getenv('IMAGE_CACHE_DIR', Path(tempfile.gettempdir()) / 'resume-images'))
+IMAGE_CACHE_MEMORY_ITEMS = int(os.getenv('IMAGE_CACHE_MEMORY_ITEMS', '512'))
+IMAGE_CACHE_DISK_MB = int(os.getenv('IMAGE_CACHE_DISK_MB', '256'))
+IMAGE_PROXY_HOSTS = os.getenv('IMAGE_PROXY_HOSTS', 'media.licdn.com,images.pexels.com').split(',')
+IMAGE_PROXY_MAX_MB = int(os.getenv('IMAGE_PROXY_MAX_MB', '5'))
+IMAGE_PROXY_TIMEOUT = float(os.getenv('IMAGE_PROXY_TIMEOUT', '10'))
+
+image_cache = ArtifactCache(
+    IMAGE_CACHE_DIR,
+    memory_items=IMAGE_CACHE_MEMORY_ITEMS,
+    disk_max_bytes=IMAGE_CACHE_DISK_MB * 1024 * 1024,
+)
+image_proxy = ImageProxy(
+    image_cache,
+    IMAGE_PROXY_HOSTS,
+    max_bytes=IMAGE_PROXY_MAX_MB * 1024 * 1024,
+    timeout=IMAGE_PROXY_TIMEOUT,
+)
+
+RESUME_TEMPLATES = [
+    {
+        "id": "modern",
+        "name": "Modern Professional",
+        "description": "Clean, modern design perfect for tech and creative industries",
+        "preview_image": "https://images.pexels.com/photos/270238/pexels-photo-270238.png",
+        "style": "modern"
+    },
+    {
+        "id": "classic",
+        "name": "Classic Executive",
+        "description": "Traditional format ideal for corporate and executive positions",
+        "preview_image": "https://images.pexels.com/photos/5922215/pexels-photo-5922215.jpeg",
+        "style": "classic"
+    },
+    {
+        "id": "elegant",
+        "name": "Elegant Minimalist",
+        "description": "Sophisticated design with subtle elegance for all industries",
+        "preview_image": "https://images.pexels.com/photos/8534381/pexels-photo-8534381.jpeg",
+        "style": "elegant"
+    }
+]
+
+def proxied_image_url(url: Optional[str], size: str) -> Optional[str]:
+    """Public URL of ``url`` through the image proxy; URLs it may not fetch are kept as-is"""
+    if not image_proxy.allowed(url):
+        return url
+    return f"{BACKEND_URL}/images?{urlencode({'url': url, 'size': size})}"
+
+# Template cards show the resized previews instead of full-size Pexels photos
+TEMPLATE_LISTING = [
+    {**template, "preview_image": proxied_image_url(template["preview_image"], "preview")}
+    for template in RESUME_TEMPLATES
+]
 
 # LinkedIn OAuth Routes
 @api_router.get("/auth/linkedin")
-async def login_linkedin():
-    """Initiate LinkedIn OAuth flow"""
-    auth_url = (
-        f"https://www.linkedin.com/oauth/v2/authorization?"
-        f"response_type=code&"
-        f"client_id={LINKEDIN_CLIENT_ID}&"
-        f"redirect_uri={REDIRECT_URI}&"
-        f"scope=openid profile email"
-    )
-    return {"auth_url": auth_url}
+async def login_linkedin(request: Request):
+    """Initiate LinkedIn OAuth flow.
+
+    A browser holding the session cookie from an earlier login, whose stored
+    token is still valid, is signed in with that token: the profile is
+    re-synced and ``auth_url`` points straight back to the frontend, skipping
+    the authorization redirect and the code exchange.
+    """
+    user_id = oauth_store.session_user(request.cookies.get(SESSION_COOKIE))
+    if user_id:
+        access_token = await oauth_store.get_token(user_id)
+        if access_token and await sync_with_stored_token(user_id, access_token):
+            return {
+                "auth_url": f"{FRONTEND_URL}/?success=true&user_id={user_id}",
+                "user_id": user_id,
+                "reused_token": True,
+            }
+    state = await oauth_store.create_state()
+    return {"auth_url": linkedin_client.authorization_url(state)}
+
+async def sync_with_stored_token(user_id: str, access_token: str) -> bool:
+    """Re-sync a returning user's profile; False if the full login flow is needed"""
+    try:
+        profile_data, email_data = await linkedin_client.fetch_profile(access_token)
+    except LinkedInAPIError as e:
+        if e.status_code == 401:
+            await oauth_store.delete_token(user_id)
+        return False
+    except httpx.HTTPError:
+        return False
+    if str(profile_data.get("id", "")) != user_id:
+        return False
+    stored = await storage.profiles.get(user_id)
+    await sync_linkedin_profile(user_id, linkedin_fields(profile_data, email_data), stored)
+    return True
 
 @api_router.get("/auth/linkedin/callback")
 async def linkedin_callback(code: str, state: Optional[str] = None):
     """Handle LinkedIn OAuth callback"""
+    if not await oauth_store.consume_state(state):
+        # Missing, forged, expired or replayed: not a login this server started
+        logger.warning("LinkedIn callback with an invalid OAuth state")
+        return RedirectResponse(url=f"{FRONTEND_URL}/?error=state")
     try:
-        async with httpx.AsyncClient() as client:
-            # Exchange code for access token
-            token_response = await client.post(
-                "https://www.linkedin.com/oauth/v2/accessToken",
-                data={
-                    "grant_type": "authorization_code",
-                    "code": code,
-                    "client_id": LINKEDIN_CLIENT_ID,
-                    "client_secret": LINKEDIN_CLIENT_SECRET,
-                    "redirect_uri": REDIRECT_URI
-                },
-                headers={
-                    "Content-Type": "application/x-www-form-urlencoded"
-                }
-            )
-            
-            if token_response.status_code != 200:
-                raise HTTPException(status_code=400, detail="Failed to get access token")
-            
-            token_data = token_response.json()
-            access_token = token_data["access_token"]
-            
-            # Get basic profile information
-            profile_response = await client.get(
-                "https://api.linkedin.com/v2/me",
-                headers={"Authorization": f"Bearer {access_token}"}
-            )
-            
-            if profile_response.status_code != 200:
-                raise HTTPException(status_code=400, detail="Failed to get profile data")
-            
-            profile_data = profile_response.json()
-            
-            # Get email address
-            email_response = await client.get(
-                "https://api.linkedin.com/v2/emailAddress?q=members&projection=(elements*(handle~))",
-                headers={"Authorization": f"Bearer {access_token}"}
-            )
-            
-            email_data = None
-            if email_response.status_code == 200:
-                email_result = email_response.json()
-                if "elements" in email_result and len(email_result["elements"]) > 0:
-                    email_data = email_result["elements"][0]["handle~"]["emailAddress"]
-            
-            # Process and save profile data
-            linkedin_profile = LinkedInProfile(
-                user_id=str(profile_data.get("id", "")),
-                first_name=profile_data.get("localizedFirstName", ""),
-                last_name=profile_data.get("localizedLastName", ""),
-                headline=profile_data.get("localizedHeadline", ""),
-                email=email_data,
-                profile_picture=profile_data.get("profilePicture", {}).get("displayImage", ""),
+        token_data = await linkedin_client.exchange_code(code)
+        access_token = token_data["access_token"]
+
+        # Profile and email are fetched concurrently on the shared client
+        profile_data, email_data = await linkedin_client.fetch_profile(access_token)
+        user_id = str(profile_data.get("id", ""))
+
+        expires_in = token_data.get("expires_in")
+        token_kept = await oauth_store.put_token(user_id, access_token, expires_in)
+
+        # A re-login updates the existing profile in place, and only the
+        # fields whose value changed on LinkedIn's side
+        stored = await storage.profiles.get(user_id)
+        await sync_linkedin_profile(user_id, linkedin_fields(profile_data, email_data), stored)
+        
+        # Redirect back to frontend with success
+        redirect_url = f"{FRONTEND_URL}/?success=true&user_id={user_id}"
+        response = RedirectResponse(url=redirect_url)
+        if token_kept:
+            # Only this browser may reuse the stored token on its next login
+            response.set_cookie(
+                SESSION_COOKIE, oauth_store.issue_session(user_id, int(expires_in)), max_age=int(expires_in),
+                path="/api/auth", httponly=True, samesite="lax", secure=FRONTEND_URL.startswith("https://"),
             )
-            
-            # Save to database
-            await db.linkedin_profiles.insert_one(linkedin_profile.dict())
-            
-            # Redirect back to frontend with success
-            redirect_url = f"{FRONTEND_URL}/?success=true&user_id={linkedin_profile.user_id}"
-            return RedirectResponse(url=redirect_url)
-            
+        return response
+
+    except LinkedInUnavailable as e:
+        logger.warning(f"LinkedIn callback failed fast: {e}")
+        return RedirectResponse(url=f"{FRONTEND_URL}/?error=unavailable")
     except Exception as e:
         logger.error(f"LinkedIn callback error: {str(e)}")
         redirect_url = f"{FRONTEND_URL}/?error=true"
         return RedirectResponse(url=redirect_url)
 
+async def sync_linkedin_profile(
+    user_id: str, fields: Dict[str, Any], stored: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Write LinkedIn's current values for the synced fields; returns what changed"""
+    profile_doc = LinkedInProfile(user_id=user_id, **fields).dict()
+    synced = {field: profile_doc[field] for field in SYNCED_FIELDS}
+
+    if stored is None:
+        # Upsert so a concurrent first login cannot create a second document
+        await storage.profiles.upsert(
+            user_id,
+            synced,
+            {
+                field: value for field, value in profile_doc.items()
+                if field not in SYNCED_FIELDS and field != "user_id"
+            },
+        )
+        changes = synced
+    else:
+        changes = diff_fields(stored, synced)
+        if not changes:
+            return changes
+        await storage.profiles.update(user_id, changes)
+
+    # Cached profiles hold every field, so any change invalidates them;
+    # rendered artifacts are keyed on RENDER_FIELDS and stay valid otherwise
+    await profile_cache.invalidate(user_id)
+    return changes
+
+async def load_profile(user_id: str) -> Optional[Dict[str, Any]]:
+    """Read a profile through the profile cache"""
+    profile = await profile_cache.get(user_id)
+    if profile is None:
+        profile = await storage.profiles.get(user_id)
+        if profile is not None:
+            await profile_cache.set(user_id, profile)
+    return profile
+
+def parse_profile_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """``fields=a,b`` as a list of profile fields (user_id is always included)"""
+    if fields is None:
+        return None
+    selected = ["user_id"] + [field.strip() for field in fields.split(",") if field.strip() and field.strip() != "user_id"]
+    unknown = [field for field in selected if field not in LinkedInProfile.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown profile fields: {', '.join(unknown)}")
+    return list(dict.fromkeys(selected))
+
 @api_router.get("/profile/{user_id}", response_model=LinkedInProfile)
-async def get_profile(user_id: str):
-    """Get LinkedIn profile data by user ID"""
-    profile = await db.linkedin_profiles.find_one({"user_id": user_id})
+async def get_profile(user_id: str, fields: Optional[str] = None):
+    """Get LinkedIn profile data by user ID.
+
+    ``fields`` (comma-separated) returns only those fields; they are projected
+    in the database query, so the rest is neither read nor serialized.
+    """
+    selected = parse_profile_fields(fields)
+    if selected is None:
+        profile = await load_profile(user_id)
+    else:
+        # A cached full profile already has them; partial reads are not cached
+        profile = await profile_cache.get(user_id)
+        if profile is not None:
+            profile = {field: profile[field] for field in selected if field in profile}
+        else:
+            profile = await storage.profiles.get(user_id, selected)
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
-    
-    # Convert MongoDB ObjectId to string to make it JSON serializable
-    if "_id" in profile:
-        profile["_id"] = str(profile["_id"])
-        
-    return LinkedInProfile(**profile)
+
+    # Stored profiles were validated by LinkedInProfile on the way in, so the
+    # projected document is serialized as-is instead of being re-validated
+    picture = profile.get("profile_picture")
+    if picture:
+        profile = {**profile, "profile_picture": proxied_image_url(picture, "photo")}
+    return ORJSONResponse(profile)
+
+async def reindex_profile(user_id: str):
+    """Profile change listener: bring the search and match indexes up to date for one user"""
+    profile = await storage.profiles.get(user_id)
+    for index in (search_index, match_index):
+        if profile is None:
+            index.remove(user_id)
+        else:
+            index.update(profile)
+
+profile_cache.add_listener(reindex_profile)
+
+async def build_index(name: str, index):
+    try:
+        await index.build(storage.profiles.scan(SEARCH_BUILD_BATCH))
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.error(f"{name} index build failed: {e!r}")
+    else:
+        logger.info(f"{name} index built: {len(index)} profiles")
+
+# Running index builds by name; a rebuild replaces the one in progress
+index_builds: Dict[str, asyncio.Task] = {}
+
+async def rebuild_indexes():
+    """(Re)build the search and match indexes from storage in the background.
+
+    Runs at startup and after this worker may have missed profile changes.
+    Profiles are never deleted, so building over the live index (which keeps
+    answering meanwhile) leaves it complete.
+    """
+    for name, index in (("Search", search_index), ("Match", match_index)):
+        previous = index_builds.pop(name, None)
+        if previous is not None:
+            previous.cancel()
+            await asyncio.gather(previous, return_exceptions=True)
+        index_builds[name] = asyncio.create_task(build_index(name, index))
+
+profile_cache.add_resync_listener(rebuild_indexes)
+
+@api_router.get("/search")
+async def search_profiles(
+    q: str = Query(..., min_length=1, max_length=200),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=SEARCH_PAGE_MAX),
+    prefix: bool = True,
+):
+    """Ranked full-text search over skills, headline, location, summary and experience.
+
+    Every word must match; the last one (and any word ending in ``*``) also
+    matches as a prefix unless ``prefix=false``.
+    """
+    if not search_index.ready:
+        raise HTTPException(status_code=503, detail="Search index is still building", headers={"Retry-After": "5"})
+    total, hits = await search_index.search(q, offset=offset, limit=limit, prefix=prefix)
+    profiles = {profile["user_id"]: profile for profile in await storage.profiles.get_many(
+        [user_id for user_id, _ in hits]
+    )}
+    results = []
+    for user_id, score in hits:
+        profile = profiles.get(user_id)
+        if profile is None:
+            continue
+        results.append({
+            "user_id": user_id,
+            "score": score,
+            "first_name": profile.get("first_name"),
+            "last_name": profile.get("last_name"),
+            "headline": profile.get("headline"),
+            "location": profile.get("location"),
+            "profile_picture": proxied_image_url(profile.get("profile_picture"), "photo"),
+        })
+    return ORJSONResponse({"total": total, "offset": offset, "limit": limit, "results": results})
+
+@api_router.post("/match")
+async def match_profiles(request: JobMatchRequest):
+    """Score a job description against stored profiles by skill overlap.
+
+    Skills are recognized in the description and compared with each
+    profile's listed skills and the skills mentioned in its experience.
+    """
+    if not match_index.ready:
+        raise HTTPException(status_code=503, detail="Match index is still building", headers={"Retry-After": "5"})
+    if request.limit > MATCH_PAGE_MAX:
+        raise HTTPException(status_code=400, detail=f"limit must be at most {MATCH_PAGE_MAX}")
+    if request.user_ids is not None and len(request.user_ids) > MATCH_MAX_USER_IDS:
+        raise HTTPException(status_code=413, detail=f"At most {MATCH_MAX_USER_IDS} user_ids per request")
+
+    terms, total, matches = match_index.match(
+        request.description,
+        offset=request.offset,
+        limit=request.limit,
+        min_score=request.min_score,
+        user_ids=request.user_ids,
+    )
+    profiles = {profile["user_id"]: profile for profile in await storage.profiles.get_many(
+        [match["user_id"] for match in matches]
+    )}
+    results = []
+    for match in matches:
+        profile = profiles.get(match["user_id"])
+        if profile is None:
+            continue
+        results.append({
+            **match,
+            "first_name": profile.get("first_name"),
+            "last_name": profile.get("last_name"),
+            "headline": profile.get("headline"),
+        })
+    return ORJSONResponse({
+        "job_skills": terms,
+        "total": total,
+        "offset": request.offset,
+        "limit": request.limit,
+        "results": results,
+    })
+
+@api_router.post("/profile/{user_id}/refresh")
+async def refresh_profile(user_id: str, request: Request):
+    """Re-fetch LinkedIn data with the stored token and apply only the changed fields.
+
+    Only the profile's owner may refresh it: the request must carry the
+    session cookie issued when that user logged in.
+    """
+    session_user = oauth_store.session_user(request.cookies.get(SESSION_COOKIE))
+    if session_user is None:
+        raise HTTPException(status_code=401, detail="Log in to refresh this profile")
+    if session_user != user_id:
+        raise HTTPException(status_code=403, detail="Cannot refresh another user's profile")
+
+    stored = await storage.profiles.get(user_id)
+    if not stored:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    access_token = await oauth_store.get_token(user_id)
+    if access_token is None:
+        raise HTTPException(status_code=409, detail="No valid LinkedIn token for this profile; log in again")
+
+    try:
+        profile_data, email_data = await linkedin_client.fetch_profile(access_token)
+    except LinkedInUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(max(1, round(e.retry_after)))})
+    except LinkedInAPIError as e:
+        if e.status_code == 401:
+            # Revoked or expired early; drop it so the next refresh fails fast
+            await oauth_store.delete_token(user_id)
+            raise HTTPException(status_code=409, detail="LinkedIn token was rejected; log in again")
+        raise HTTPException(status_code=502, detail=str(e))
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"LinkedIn request failed: {e}")
+
+    changes = await sync_linkedin_profile(user_id, linkedin_fields(profile_data, email_data), stored)
+    return {
+        "user_id": user_id,
+        "updated": bool(changes),
+        "changed_fields": sorted(changes),
+    }
+
+@api_router.get("/profile/{user_id}/versions")
+async def list_profile_versions(
+    user_id: str,
+    limit: int = Query(50, ge=1, le=VERSION_LIST_MAX),
+    before: Optional[int] = Query(None, description="Only versions older than this one"),
+):
+    """Profile versions resumes were generated from, newest first"""
+    return await storage.versions.list(user_id, before, limit)
+
+@api_router.get("/profile/{user_id}/versions/{version}")
+async def get_profile_version(user_id: str, version: int):
+    """The profile exactly as it was at ``version``"""
+    profiles = await load_versions(storage.versions, user_id, [version])
+    if version not in profiles:
+        raise HTTPException(status_code=404, detail="Version not found")
+    return {"user_id": user_id, "version": version, "profile": profiles[version]}
+
+@api_router.get("/profile/{user_id}/versions/{version}/diff/{other}")
+async def diff_profile_versions(user_id: str, version: int, other: int):
+    """JSON patch that turns ``version`` into ``other``"""
+    profiles = await load_versions(storage.versions, user_id, [version, other])
+    if version not in profiles or other not in profiles:
+        raise HTTPException(status_code=404, detail="Version not found")
+    return {"user_id": user_id, "from": version, "to": other, "patch": make_patch(profiles[version], profiles[other])}
 
 @api_router.get("/templates", response_model=List[ResumeTemplate])
 async def get_templates():
     """Get available resume templates"""
-    templates = [
-        {
-            "id": "modern",
-            "name": "Modern Professional",
-            "description": "Clean, modern design perfect for tech and creative industries",
-            "preview_image": "https://images.pexels.com/photos/270238/pexels-photo-270238.png",
-            "style": "modern"
-        },
-        {
-            "id": "classic",
-            "name": "Classic Executive",
-            "description": "Traditional format ideal for corporate and executive positions",
-            "preview_image": "https://images.pexels.com/photos/5922215/pexels-photo-5922215.jpeg",
-            "style": "classic"
-        },
-        {
-            "id": "elegant",
-            "name": "Elegant Minimalist",
-            "description": "Sophisticated design with subtle elegance for all industries",
-            "preview_image": "https://images.pexels.com/photos/8534381/pexels-photo-8534381.jpeg",
-            "style": "elegant"
+    return TEMPLATE_LISTING
+
+def resume_result(resume: Dict[str, Any], profile: Dict[str, Any], slim: bool) -> Dict[str, Any]:
+    if slim:
+        return {
+            "message": "Resume generated successfully",
+            "resume_id": resume["id"],
+            "user_id": resume["user_id"],
+            "template_id": resume["template_id"],
+            "profile_version": resume.get("profile_version"),
         }
-    ]
-    return templates
+    return jsonable_encoder(
+        {"message": "Resume generated successfully", "resume_id": resume["id"], "data": {**resume, "profile": profile}}
+    )
 
-@api_router.post("/generate-resume")
-async def generate_resume(user_id: str, template_id: str):
-    """Generate resume using LinkedIn profile data and selected template"""
-    profile = await db.linkedin_profiles.find_one({"user_id": user_id})
+async def build_resume(params: Dict[str, Any], progress) -> Dict[str, Any]:
+    """Job handler: fetch profile, version it, render and persist the resume"""
+    user_id, template_id = params["user_id"], params["template_id"]
+    slim = params.get("slim", False)
+
+    await progress("fetching_profile")
+    profile = await load_profile(user_id)
     if not profile:
-        raise HTTPException(status_code=404, detail="Profile not found")
-    
-    # Convert MongoDB ObjectId to string to make it JSON serializable
-    if "_id" in profile:
-        profile["_id"] = str(profile["_id"])
+        raise PermanentJobError("Profile not found")
+
+    # Regenerating an unchanged profile with the same template returns the
+    # resume we already have instead of storing another copy
+    content_key = artifact_key(profile, template_id)
+    existing = await storage.resumes.find_by_content(user_id, template_id, content_key)
+    if existing:
+        return resume_result(existing, profile, slim)
+
+    # The profile is kept as a delta-encoded version in the user's history
+    await progress("versioning")
+    profile_version = await record_version(storage.versions, user_id, profile, VERSION_REBASE_INTERVAL)
     
     # Create resume data
     resume_data = {
         "id": str(uuid.uuid4()),
         "user_id": user_id,
         "template_id": template_id,
-        "profile": profile,
+        "content_key": content_key,
+        "profile_version": profile_version,
         "generated_at": datetime.utcnow()
     }
+
+    # Warm the artifact cache so the first HTML/PDF fetch is a hit
+    await progress("rendering")
+    await render_cached_html({**resume_data, "profile": profile})
     
     # Save resume
-    result = await db.resumes.insert_one(resume_data)
-    resume_data["_id"] = str(result.inserted_id)
-    
-    return {"message": "Resume generated successfully", "resume_id": resume_data["id"], "data": resume_data}
+    await progress("persisting")
+    await storage.resumes.insert(resume_data)
+
+    return resume_result(resume_data, profile, slim)
+
+job_queue.register("generate_resume", build_resume)
+
+@api_router.post("/generate-resume", status_code=202)
+async def generate_resume(user_id: str, template_id: str, slim: bool = False):
+    """Queue resume generation using LinkedIn profile data and selected template.
+
+    With ``slim=true`` the job result only carries identifiers, not the
+    resume document and the profile it embeds.
+    """
+    if template_id not in TEMPLATE_VERSIONS:
+        raise HTTPException(status_code=404, detail="Template not found")
+    if not await load_profile(user_id):
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    job = await job_queue.enqueue("generate_resume", {"user_id": user_id, "template_id": template_id, "slim": slim})
+    return {
+        "message": "Resume generation queued",
+        "job_id": job["id"],
+        "status": job["status"],
+        "status_url": f"/api/jobs/{job['id']}",
+        "events_url": f"/api/jobs/{job['id']}/events",
+    }
+
+@api_router.get("/jobs/dead-letter")
+async def list_dead_letters(limit: int = Query(100, ge=1, le=1000)):
+    """Jobs that failed every attempt, newest first"""
+    return {"total": await job_queue.dead_letter_size(), "jobs": await job_queue.dead_letters(limit)}
+
+@api_router.post("/jobs/dead-letter/{job_id}/replay", status_code=202)
+async def replay_dead_letter(job_id: str):
+    """Take a job off the dead-letter list and queue it again"""
+    job = await job_queue.replay(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found in the dead-letter list")
+    return {
+        "message": "Job requeued",
+        "job_id": job["id"],
+        "status": job["status"],
+        "status_url": f"/api/jobs/{job['id']}",
+        "events_url": f"/api/jobs/{job['id']}/events",
+    }
+
+@api_router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Poll a background job"""
+    job = await job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@api_router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """Server-Sent Events stream of a job's progress until it finishes.
+
+    Idle streams get a comment line every ``JOB_EVENTS_KEEPALIVE`` seconds so
+    proxies keep them open; after ``JOB_EVENTS_MAX_WAIT`` seconds a ``timeout``
+    event ends the stream and the client should poll the job instead.
+    """
+    if not await job_queue.get(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        job = None
+        async for update in job_queue.events(job_id, JOB_EVENTS_KEEPALIVE, JOB_EVENTS_MAX_WAIT):
+            if update is None:
+                yield ": keep-alive\n\n"
+                continue
+            job = update
+            yield f"event: {job['status']}\ndata: {json.dumps(job)}\n\n"
+        if job is not None and job["status"] not in TERMINAL_STATES:
+            yield f"event: timeout\ndata: {json.dumps(job)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@api_router.post("/generate-resume/bulk")
+async def generate_resumes_bulk(request: BulkResumeRequest):
+    """Generate resumes for many user_id/template_id pairs in one call.
+
+    Profiles are loaded with a single ``$in`` query, each user whose resumes
+    are new gets one profile version and new resumes are inserted with
+    ``insert_many``. Results
+    stream back as NDJSON, one line per item, as each batch is persisted.
+    """
+    items = request.items
+    if not items:
+        raise HTTPException(status_code=400, detail="No resumes requested")
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ITEMS} resumes per request")
+
+    user_ids = list({item.user_id for item in items})
+    profiles = {profile["user_id"]: profile for profile in await storage.profiles.get_many(user_ids)}
+
+    content_keys = {
+        (item.user_id, item.template_id): artifact_key(profiles[item.user_id], item.template_id)
+        for item in items
+        if item.user_id in profiles and item.template_id in TEMPLATE_VERSIONS
+    }
+    existing = {
+        (resume["user_id"], resume["template_id"], resume["content_key"]): resume["id"]
+        for resume in await storage.resumes.find_by_content_keys(user_ids, set(content_keys.values()))
+    }
+
+    gate = asyncio.Semaphore(BULK_CONCURRENCY)
+
+    async def version(user_id: str) -> int:
+        async with gate:
+            return await record_version(storage.versions, user_id, profiles[user_id], VERSION_REBASE_INTERVAL)
+
+    version_users = list({
+        user_id for (user_id, template_id), content_key in content_keys.items()
+        if (user_id, template_id, content_key) not in existing
+    })
+    profile_versions = dict(zip(version_users, await asyncio.gather(*map(version, version_users))))
+
+    async def build(user_id: str, template_id: str) -> Dict[str, Any]:
+        outcome = {"user_id": user_id, "template_id": template_id}
+        if user_id not in profiles:
+            return {**outcome, "status": "error", "detail": "Profile not found"}
+        if template_id not in TEMPLATE_VERSIONS:
+            return {**outcome, "status": "error", "detail": "Template not found"}
+
+        content_key = content_keys[(user_id, template_id)]
+        resume_id = existing.get((user_id, template_id, content_key))
+        if resume_id:
+            return {**outcome, "status": "existing", "resume_id": resume_id}
+        resume_data = {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "template_id": template_id,
+            "content_key": content_key,
+            "profile_version": profile_versions[user_id],
+            "generated_at": datetime.utcnow(),
+        }
+        async with gate:
+            await render_cached_html({**resume_data, "profile": profiles[user_id]})
+        return {**outcome, "status": "created", "resume_id": resume_data["id"], "resume": resume_data}
+
+    # Each pair is built once; its repeats are reported after it is inserted
+    repeats = Counter((item.user_id, item.template_id) for item in items)
+
+    async def results():
+        pending: List[Dict[str, Any]] = []
+
+        async def flush():
+            documents = [outcome.pop("resume") for outcome in pending if "resume" in outcome]
+            if documents:
+                await storage.resumes.insert_many(documents)
+            lines = []
+            for outcome in pending:
+                lines.append(json.dumps(outcome) + "\n")
+                repeat = {**outcome, "status": "existing"} if outcome["status"] == "created" else outcome
+                lines += [json.dumps(repeat) + "\n"] * (repeats[(outcome["user_id"], outcome["template_id"])] - 1)
+            pending.clear()
+            return "".join(lines)
+
+        for finished in asyncio.as_completed([build(*pair) for pair in repeats]):
+            pending.append(await finished)
+            if len(pending) >= BULK_INSERT_BATCH:
+                yield await flush()
+        if pending:
+            yield await flush()
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+async def load_stored_resume(resume_id: str) -> Dict[str, Any]:
+    """Load a generated resume whose template we can render"""
+    resume = await storage.resumes.get(resume_id)
+    if not resume:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    if resume["template_id"] not in TEMPLATE_VERSIONS:
+        raise HTTPException(status_code=404, detail="Template not found")
+
+    resume["profile"] = await resume_profile(storage, resume)
+    if resume["profile"] is None:
+        raise HTTPException(status_code=404, detail="Resume profile snapshot not found")
+    return resume
+
+async def render_cached_html(resume: Dict[str, Any]) -> Tuple[Optional[str], bytes]:
+    """Return (cache key, rendered HTML), rendering only on a cache miss.
+
+    The key is None when the render must not be cached: the profile picture
+    could not be embedded this time, so the page was rendered without it.
+    """
+    key = artifact_key(resume["profile"], resume["template_id"])
+    html = await artifact_cache.get(key, "html")
+    if html is None:
+        # The picture is embedded so neither browsers nor the PDF export fetch
+        # it; if that fails it is left out rather than linked
+        picture_src = None
+        if resume["template_id"] in PHOTO_TEMPLATES:
+            picture_url = resume["profile"].get("profile_picture")
+            picture_src = await image_proxy.data_uri(picture_url, "photo") or ""
+            if not picture_src and image_proxy.allowed(picture_url):
+                key = None
+        html = render_resume_html(resume["profile"], resume["template_id"], picture_src).encode("utf-8")
+        if key is not None:
+            await artifact_cache.put(key, "html", html)
+    return key, html
+
+@api_router.get("/resumes/{resume_id}/html", response_class=HTMLResponse)
+async def get_resume_html(resume_id: str):
+    """Render a generated resume to HTML on the server"""
+    resume = await load_stored_resume(resume_id)
+    _, html = await render_cached_html(resume)
+    return HTMLResponse(content=html)
+
+@api_router.get("/resumes/{resume_id}/pdf")
+async def get_resume_pdf(resume_id: str):
+    """Export a generated resume as PDF using the background process pool"""
+    resume = await load_stored_resume(resume_id)
+    key, html = await render_cached_html(resume)
+    pdf = await artifact_cache.get(key, "pdf") if key is not None else None
+    if pdf is None:
+        try:
+            pdf = await pdf_exporter.export(html.decode("utf-8"))
+        except ExportQueueFull:
+            raise HTTPException(
+                status_code=503,
+                detail="PDF export queue is full, try again shortly",
+                headers={"Retry-After": "5"},
+            )
+        except ExportTimeout:
+            raise HTTPException(status_code=504, detail="PDF export timed out")
+        if key is not None:
+            await artifact_cache.put(key, "pdf", pdf)
+
+    return Response(
+        content=pdf,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f'attachment; filename="resume-{resume_id}.pdf"'},
+    )
+
+@api_router.get("/images")
+async def get_image(request: Request, url: str, size: str = "photo"):
+    """Resized, cached copy of an allowlisted remote image"""
+    if size not in IMAGE_SIZES:
+        raise HTTPException(status_code=400, detail=f"size must be one of {', '.join(IMAGE_SIZES)}")
+    fmt = "webp" if "image/webp" in request.headers.get("accept", "") else "jpeg"
+    try:
+        data = await image_proxy.get(url, size, fmt)
+    except ImageNotAllowed:
+        raise HTTPException(status_code=400, detail="Image host is not allowed")
+    except ImageFetchError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+    # The bytes for a (url, size, format) never change, so clients may keep them
+    headers = {
+        "ETag": image_etag(data),
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "Vary": "Accept",
+    }
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=data, media_type=FORMATS[fmt], headers=headers)
+
+@api_router.get("/cache/stats")
+async def get_cache_stats():
+    """Hit/miss counters for the rendered artifact cache and the image cache"""
+    return {**artifact_cache.snapshot(), "images": image_cache.snapshot()}
+
+@api_router.get("/health/live")
+async def health_live():
+    """Liveness probe: the process is up and its event loop answers"""
+    return {"status": "ok"}
+
+@api_router.get("/health/ready")
+async def health_ready(request: Request):
+    """Readiness probe: the database answers and indexes and templates are warm"""
+    try:
+        await asyncio.wait_for(storage.ping(), HEALTH_CHECK_TIMEOUT)
+        database = True
+    except Exception as e:
+        logger.warning(f"Readiness ping failed: {e!r}")
+        database = False
+
+    checks = {
+        "database": database,
+        "indexes": getattr(request.app.state, "indexes_ready", False),
+        "templates": getattr(request.app.state, "templates_ready", False),
+    }
+    ready = all(checks.values())
+    # Reported for alerting only: a LinkedIn outage must not take workers out
+    # of rotation, since everything but login and refresh still works
+    upstreams = {"linkedin": linkedin_client.breaker.snapshot()}
+    try:
+        dead_letters = await asyncio.wait_for(job_queue.dead_letter_size(), HEALTH_CHECK_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"Dead-letter count failed: {e!r}")
+        dead_letters = None
+    return ORJSONResponse(
+        {"status": "ready" if ready else "not_ready", "checks": checks, "upstreams": upstreams,
+         "jobs": {"dead_letters": dead_letters}},
+        status_code=200 if ready else 503,
+    )
 
 # Original routes
 @api_router.get("/")
 async def root():
     return {"message": "Resume Builder API with LinkedIn Integration"}
 
+async def save_status_checks(status_objs: List[StatusCheck]):
+    """Persist status checks directly or through the write-behind buffer.
+
+    A direct write that stores only part of the batch answers 500 with the
+    ids of the checks that were not stored. Buffered writes are acknowledged
+    before they reach the store; their failures only show in the buffer stats.
+    """
+    documents = [status_obj.dict() for status_obj in status_objs]
+    if status_buffer is None:
+        failed = await storage.statuses.insert_many(documents)
+        if failed:
+            raise HTTPException(status_code=500, detail={
+                "message": f"Stored {len(documents) - len(failed)} of {len(documents)} status checks",
+                "failed": failed,
+            })
+        return
+    try:
+        await status_buffer.add(documents)
+    except BufferFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Status ingestion is backed up, try again shortly",
+            headers={"Retry-After": "1"},
+        )
+
 @api_router.post("/status", response_model=StatusCheck)
 async def create_status_check(input: StatusCheckCreate):
     status_dict = input.dict()
     status_obj = StatusCheck(**status_dict)
-    _ = await db.status_checks.insert_one(status_obj.dict())
+    await save_status_checks([status_obj])
     return status_obj
 
+@api_router.post("/status/batch", response_model=List[StatusCheck])
+async def create_status_checks(inputs: List[StatusCheckCreate]):
+    """Record many status checks with a single round trip"""
+    if not inputs:
+        raise HTTPException(status_code=400, detail="No status checks given")
+    if len(inputs) > STATUS_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {STATUS_BATCH_MAX_ITEMS} status checks per batch",
+        )
+    status_objs = [StatusCheck(**item.dict()) for item in inputs]
+    await save_status_checks(status_objs)
+    return status_objs
+
 @api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
-    # Convert MongoDB ObjectId to string to make it JSON serializable
-    for status in status_checks:
-        if "_id" in status:
-            status["_id"] = str(status["_id"])
-    return [StatusCheck(**status_check) for status_check in status_checks]
+async def get_status_checks(
+    limit: Optional[int] = Query(None, ge=1, le=STATUS_PAGE_MAX),
+    after: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+):
+    """List status checks ordered by timestamp, one keyset page at a time.
+
+    Pass the ``X-Next-Cursor`` response header back as ``after`` to get the
+    next page. ``format=ndjson`` streams every matching row (or up to
+    ``limit``) straight from the cursor instead.
+
+    Without ``limit`` a page holds ``STATUS_PAGE_DEFAULT`` (100) rows. This
+    endpoint used to return up to 1000 at once; clients that relied on that
+    must pass ``limit=1000`` or follow the cursor.
+    """
+    try:
+        after_key = decode_cursor(after) if after else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if format == "ndjson":
+        return StreamingResponse(
+            ndjson_rows(storage.statuses.stream(after_key, limit, STATUS_STREAM_BATCH)),
+            media_type="application/x-ndjson",
+        )
+
+    page_size = limit or STATUS_PAGE_DEFAULT
+    # Fetch one extra row to learn whether another page exists
+    status_checks = await storage.statuses.page(after_key, page_size + 1)
+    headers = {}
+    if len(status_checks) > page_size:
+        status_checks = status_checks[:page_size]
+        headers["X-Next-Cursor"] = encode_cursor(status_checks[-1])
+    # Rows are written from StatusCheck, so they skip response_model validation
+    return ORJSONResponse(status_checks, headers=headers)
 
 @api_router.post("/test-create-profile", status_code=201)
 async def test_create_profile(profile: LinkedInProfile):
     """Test endpoint to create a LinkedIn profile for testing purposes"""
-    await db.linkedin_profiles.insert_one(profile.dict())
+    await storage.profiles.replace(profile.dict())
+    await profile_cache.invalidate(profile.user_id)
     return {"message": "Test profile created successfully", "user_id": profile.user_id}
 
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Clients are created and connected here, not at import time
+    if WEB_CONCURRENCY > 1:
+        if not REDIS_URL:
+            # Jobs, cache invalidations, index updates and consumed OAuth
+            # states would each stay on the worker that saw them
+            raise RuntimeError("WEB_CONCURRENCY > 1 requires REDIS_URL")
+        if JOB_BACKEND == 'memory':
+            logger.warning("JOB_BACKEND=memory with several workers: a job is only visible on the worker that queued it")
+    if not token_cipher.enabled:
+        logger.info("TOKEN_ENCRYPTION_KEY is unset: LinkedIn tokens are not stored, so profile refresh needs a new login")
+    app.state.indexes_ready = await storage.start()
+    await linkedin_client.start()
+    await profile_cache.start()
+    await oauth_store.start()
+    if status_buffer is not None:
+        status_buffer.start()
+    await job_queue.start()
+    app.state.loop_lag_monitor = asyncio.create_task(monitor_event_loop_lag())
+
+    load_templates()
+    logger.info(f"Compiled resume templates: {', '.join(TEMPLATE_VERSIONS)}")
+    pdf_exporter.start()
+    await asyncio.to_thread(artifact_cache.load)
+    await asyncio.to_thread(image_cache.load)
+    await image_proxy.start()
+    app.state.templates_ready = True
+    # Search and matching answer 503 until these finish; profile writes during
+    # a build are applied by the change listener and not overwritten by it
+    await rebuild_indexes()
+
+    yield
+
+    app.state.loop_lag_monitor.cancel()
+    for task in index_builds.values():
+        task.cancel()
+    search_index.close()
+    if status_buffer is not None:
+        # Flush buffered status checks before the storage client goes away
+        await status_buffer.close()
+    await job_queue.close()
+    pdf_exporter.shutdown()
+    await profile_cache.close()
+    await oauth_store.close()
+    await linkedin_client.close()
+    await image_proxy.close()
+    await storage.close()
+    mark_worker_dead()
+
+# Create the main app without a prefix
+app = FastAPI(lifespan=lifespan)
+
 # Include the router in the main app
 app.include_router(api_router)
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
+
+app.add_middleware(PrometheusMiddleware, prefix="/api")
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cross-origin clients can only page GET /api/status if they can read this
+    expose_headers=["X-Next-Cursor"],
 )
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
@@ -0,0 +1,30 @@
+"""Storage backends behind a common repository interface.
+
+``create_storage`` picks the backend named by ``STORAGE_BACKEND``:
+``mongo`` (Motor, the default) or ``sqlite`` (embedded, single node).
+"""
+from typing import Any, Sequence
+
+from storage.base import (
+    ProfileRepository, ResumeRepository, StatusRepository, Storage, TokenRepository, VersionRepository,
+)
+
+
+def create_storage(backend: str, *, mongo_url: str = None, db_name: str = None, sqlite_path: str = None,
+                   profile_fields: Sequence[str] = (), status_fields: Sequence[str] = (),
+                   event_listeners: Sequence[Any] = ()) -> Storage:
+    if backend == "mongo":
+        from storage.mongo import MongoStorage
+
+        return MongoStorage(mongo_url, db_name, profile_fields, status_fields, event_listeners=event_listeners)
+    if backend == "sqlite":
+        from storage.sqlite import SQLiteStorage
+
+        return SQLiteStorage(sqlite_path)
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend!r}")
+
+
+__all__ = [
+    "ProfileRepository", "ResumeRepository", "StatusRepository", "Storage", "TokenRepository",
+    "VersionRepository", "create_storage",
+]
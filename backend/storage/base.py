@@ -0,0 +1,142 @@
+"""Repository interfaces implemented by every storage backend.
+
+Handlers only talk to these interfaces, so a deployment can pick the backend
+(``STORAGE_BACKEND``) without any handler knowing which one is in use.
+Documents go in and come out as plain dicts with exactly the model fields;
+backend-specific keys such as Mongo's ``_id`` never leak out.
+"""
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+
+# (timestamp, id) of the last row a client has seen
+StatusKey = Tuple[datetime, str]
+
+
+class ProfileRepository(ABC):
+    @abstractmethod
+    async def get(self, user_id: str, fields: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+        """The profile, or only ``fields`` of it when given"""
+
+    @abstractmethod
+    async def get_many(self, user_ids: Iterable[str]) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def upsert(self, user_id: str, fields: Mapping[str, Any], defaults: Mapping[str, Any]):
+        """Atomically set ``fields``; ``defaults`` are only written when creating the profile"""
+
+    @abstractmethod
+    async def update(self, user_id: str, changes: Mapping[str, Any]) -> bool:
+        """Set only ``changes`` on an existing profile; False if there is none"""
+
+    @abstractmethod
+    async def replace(self, profile: Mapping[str, Any]):
+        """Store ``profile`` as the whole document for its user_id"""
+
+    @abstractmethod
+    def scan(self, batch_size: int) -> AsyncIterator[Dict[str, Any]]:
+        """Yield every stored profile, reading ``batch_size`` at a time"""
+
+
+class ResumeRepository(ABC):
+    @abstractmethod
+    async def get(self, resume_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def find_by_content(self, user_id: str, template_id: str, content_key: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def find_by_content_keys(self, user_ids: Iterable[str], content_keys: Iterable[str]) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def insert(self, resume: Mapping[str, Any]):
+        ...
+
+    @abstractmethod
+    async def insert_many(self, resumes: List[Mapping[str, Any]]):
+        ...
+
+    @abstractmethod
+    async def load_snapshot(self, profile_hash: str) -> Optional[Dict[str, Any]]:
+        """Profile snapshot referenced by resumes written before profile versions"""
+
+
+class VersionRepository(ABC):
+    """Per-user profile versions; records are built by ``versions.record_version``"""
+
+    @abstractmethod
+    async def latest(self, user_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def get_many(self, user_id: str, versions: Iterable[int]) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def find_by_hash(self, user_id: str, content_hash: str) -> Optional[int]:
+        """Number of the user's version with this content hash, if there is one"""
+
+    @abstractmethod
+    async def insert(self, record: Mapping[str, Any]) -> bool:
+        """False if the user already has a record with this version number"""
+
+    @abstractmethod
+    async def list(self, user_id: str, before: Optional[int], limit: int) -> List[Dict[str, Any]]:
+        """Newest first, without the profile or patch payload"""
+
+
+class StatusRepository(ABC):
+    @abstractmethod
+    async def insert_many(self, checks: List[Mapping[str, Any]]) -> List[str]:
+        """Insert status checks; returns the ids of those the store refused"""
+
+    @abstractmethod
+    async def page(self, after: Optional[StatusKey], limit: int) -> List[Dict[str, Any]]:
+        """Rows ordered by (timestamp, id), strictly after ``after``"""
+
+    @abstractmethod
+    def stream(self, after: Optional[StatusKey], limit: Optional[int], batch_size: int) -> AsyncIterator[Dict[str, Any]]:
+        """Like ``page`` but yields rows one at a time without buffering them"""
+
+
+class TokenRepository(ABC):
+    """LinkedIn access tokens, one per user, stored already encrypted"""
+
+    @abstractmethod
+    async def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """``{"token": ciphertext, "expires_at": datetime}`` or None"""
+
+    @abstractmethod
+    async def put(self, user_id: str, token: str, expires_at: datetime):
+        ...
+
+    @abstractmethod
+    async def delete(self, user_id: str):
+        ...
+
+
+class Storage(ABC):
+    """The repositories of one backend plus its lifecycle"""
+
+    profiles: ProfileRepository
+    resumes: ResumeRepository
+    statuses: StatusRepository
+    tokens: TokenRepository
+    versions: VersionRepository
+
+    @abstractmethod
+    async def start(self) -> bool:
+        """Connect and make sure indexes exist (idempotent); False if an index could not be built"""
+
+    @abstractmethod
+    async def ping(self):
+        """Round-trip to the backend; raises if it is unreachable"""
+
+    @abstractmethod
+    async def close(self):
+        ...
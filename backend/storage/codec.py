@@ -0,0 +1,24 @@
+"""JSON encoding for stored documents that round-trips datetimes."""
+import json
+from datetime import datetime
+from typing import Any, Dict
+
+
+def _encode(value: Any):
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    raise TypeError(f"Cannot encode value of type {type(value).__name__}")
+
+
+def _decode(obj: Dict[str, Any]):
+    if len(obj) == 1 and "$date" in obj:
+        return datetime.fromisoformat(obj["$date"])
+    return obj
+
+
+def dumps(document: Dict[str, Any]) -> str:
+    return json.dumps(document, default=_encode, separators=(",", ":"))
+
+
+def loads(raw) -> Dict[str, Any]:
+    return json.loads(raw, object_hook=_decode)
@@ -0,0 +1,211 @@
+"""MongoDB (Motor) storage backend."""
+import logging
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Mapping, Optional, Sequence
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import DESCENDING
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from indexes import ensure_indexes
+from storage.base import (
+    ProfileRepository, ResumeRepository, StatusKey, StatusRepository, Storage, TokenRepository, VersionRepository,
+)
+
+
+logger = logging.getLogger(__name__)
+
+STATUS_SORT = [("timestamp", 1), ("id", 1)]
+
+
+def projection(fields: Sequence[str]) -> Dict[str, int]:
+    """Read only the given fields; "_id" is never fetched"""
+    return {"_id": 0, **{field: 1 for field in fields}}
+
+
+def keyset_filter(after: Optional[StatusKey]) -> Dict[str, Any]:
+    if after is None:
+        return {}
+    timestamp, row_id = after
+    return {"$or": [
+        {"timestamp": {"$gt": timestamp}},
+        {"timestamp": timestamp, "id": {"$gt": row_id}},
+    ]}
+
+
+class MongoProfileRepository(ProfileRepository):
+    def __init__(self, db, fields: Sequence[str]):
+        self.collection = db.linkedin_profiles
+        self.projection = projection(fields)
+
+    async def get(self, user_id: str, fields: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one(
+            {"user_id": user_id}, projection(fields) if fields is not None else self.projection
+        )
+
+    async def get_many(self, user_ids: Iterable[str]) -> List[Dict[str, Any]]:
+        cursor = self.collection.find({"user_id": {"$in": list(user_ids)}}, self.projection)
+        return await cursor.to_list(None)
+
+    async def upsert(self, user_id: str, fields: Mapping[str, Any], defaults: Mapping[str, Any]):
+        await self.collection.update_one(
+            {"user_id": user_id},
+            {"$set": dict(fields), "$setOnInsert": dict(defaults)},
+            upsert=True,
+        )
+
+    async def update(self, user_id: str, changes: Mapping[str, Any]) -> bool:
+        result = await self.collection.update_one({"user_id": user_id}, {"$set": dict(changes)})
+        return result.matched_count > 0
+
+    async def replace(self, profile: Mapping[str, Any]):
+        await self.collection.replace_one({"user_id": profile["user_id"]}, dict(profile), upsert=True)
+
+    async def scan(self, batch_size: int) -> AsyncIterator[Dict[str, Any]]:
+        async for profile in self.collection.find({}, self.projection).batch_size(batch_size):
+            yield profile
+
+
+class MongoResumeRepository(ResumeRepository):
+    def __init__(self, db):
+        self.collection = db.resumes
+        self.snapshots = db.profile_snapshots
+
+    async def get(self, resume_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"id": resume_id}, {"_id": 0})
+
+    async def find_by_content(self, user_id: str, template_id: str, content_key: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one(
+            {"user_id": user_id, "template_id": template_id, "content_key": content_key}, {"_id": 0}
+        )
+
+    async def find_by_content_keys(self, user_ids: Iterable[str], content_keys: Iterable[str]) -> List[Dict[str, Any]]:
+        # Leading with user_id lets the user_template_content index serve this
+        cursor = self.collection.find(
+            {"user_id": {"$in": list(user_ids)}, "content_key": {"$in": list(content_keys)}},
+            {"_id": 0, "id": 1, "user_id": 1, "template_id": 1, "content_key": 1},
+        )
+        return await cursor.to_list(None)
+
+    async def insert(self, resume: Mapping[str, Any]):
+        # insert_one adds "_id" to the document it is given; keep the caller's clean
+        await self.collection.insert_one(dict(resume))
+
+    async def insert_many(self, resumes: List[Mapping[str, Any]]):
+        if resumes:
+            await self.collection.insert_many([dict(resume) for resume in resumes], ordered=False)
+
+    async def load_snapshot(self, profile_hash: str) -> Optional[Dict[str, Any]]:
+        snapshot = await self.snapshots.find_one({"_id": profile_hash})
+        return snapshot["profile"] if snapshot else None
+
+
+class MongoStatusRepository(StatusRepository):
+    def __init__(self, db, fields: Sequence[str]):
+        self.collection = db.status_checks
+        self.projection = projection(fields)
+
+    async def insert_many(self, checks: List[Mapping[str, Any]]) -> List[str]:
+        documents = [dict(check) for check in checks]
+        try:
+            if len(documents) == 1:
+                await self.collection.insert_one(documents[0])
+            else:
+                await self.collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            failed = [documents[error["index"]]["id"] for error in e.details.get("writeErrors", [])]
+            logger.error(f"Dropped {len(failed)} of {len(documents)} status checks: {e}")
+            return failed
+        return []
+
+    def _find(self, after: Optional[StatusKey]):
+        return self.collection.find(keyset_filter(after), self.projection).sort(STATUS_SORT)
+
+    async def page(self, after: Optional[StatusKey], limit: int) -> List[Dict[str, Any]]:
+        return await self._find(after).limit(limit).to_list(limit)
+
+    async def stream(self, after: Optional[StatusKey], limit: Optional[int], batch_size: int) -> AsyncIterator[Dict[str, Any]]:
+        cursor = self._find(after).batch_size(batch_size)
+        if limit:
+            cursor = cursor.limit(limit)
+        async for row in cursor:
+            yield row
+
+
+class MongoTokenRepository(TokenRepository):
+    def __init__(self, db):
+        # Keyed by user_id as _id, so no extra index is needed
+        self.collection = db.linkedin_tokens
+
+    async def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"_id": user_id}, {"_id": 0, "token": 1, "expires_at": 1})
+
+    async def put(self, user_id: str, token: str, expires_at: datetime):
+        await self.collection.replace_one(
+            {"_id": user_id}, {"token": token, "expires_at": expires_at}, upsert=True
+        )
+
+    async def delete(self, user_id: str):
+        await self.collection.delete_one({"_id": user_id})
+
+
+class MongoVersionRepository(VersionRepository):
+    def __init__(self, db):
+        self.collection = db.resume_versions
+
+    async def latest(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"user_id": user_id}, {"_id": 0}, sort=[("version", DESCENDING)])
+
+    async def get_many(self, user_id: str, versions: Iterable[int]) -> List[Dict[str, Any]]:
+        cursor = self.collection.find({"user_id": user_id, "version": {"$in": list(versions)}}, {"_id": 0})
+        return await cursor.to_list(None)
+
+    async def find_by_hash(self, user_id: str, content_hash: str) -> Optional[int]:
+        record = await self.collection.find_one({"user_id": user_id, "hash": content_hash}, {"_id": 0, "version": 1})
+        return record["version"] if record else None
+
+    async def insert(self, record: Mapping[str, Any]) -> bool:
+        try:
+            await self.collection.insert_one(dict(record))
+        except DuplicateKeyError:
+            return False
+        return True
+
+    async def list(self, user_id: str, before: Optional[int], limit: int) -> List[Dict[str, Any]]:
+        query = {"user_id": user_id}
+        if before is not None:
+            query["version"] = {"$lt": before}
+        cursor = self.collection.find(query, {"_id": 0, "profile": 0, "patch": 0})
+        return await cursor.sort("version", DESCENDING).limit(limit).to_list(limit)
+
+
+class MongoStorage(Storage):
+    def __init__(self, mongo_url: str, db_name: str, profile_fields: Sequence[str], status_fields: Sequence[str],
+                 event_listeners: Sequence[Any] = ()):
+        self.mongo_url = mongo_url
+        self.db_name = db_name
+        self.profile_fields = profile_fields
+        self.status_fields = status_fields
+        self.event_listeners = list(event_listeners)
+        self.client = None
+
+    async def start(self) -> bool:
+        # The client is built here rather than in __init__ so importing the
+        # app (and forking workers) does not open sockets or start threads.
+        if self.client is None:
+            self.client = AsyncIOMotorClient(self.mongo_url, event_listeners=self.event_listeners)
+            self.db = self.client[self.db_name]
+            self.profiles = MongoProfileRepository(self.db, self.profile_fields)
+            self.resumes = MongoResumeRepository(self.db)
+            self.statuses = MongoStatusRepository(self.db, self.status_fields)
+            self.tokens = MongoTokenRepository(self.db)
+            self.versions = MongoVersionRepository(self.db)
+        return await ensure_indexes(self.db)
+
+    async def ping(self):
+        await self.db.command("ping")
+
+    async def close(self):
+        if self.client is not None:
+            self.client.close()
+            self.client = None
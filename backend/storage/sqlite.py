@@ -0,0 +1,397 @@
+"""Embedded SQLite storage backend for single-node deployments.
+
+Each document is stored as JSON next to the columns it is looked up or
+sorted by, and those columns carry the same indexes the Mongo backend
+creates. sqlite3 is blocking, so every statement runs on one dedicated thread;
+that also serializes writes, which is what SQLite wants anyway. Use
+``SQLITE_PATH=:memory:`` for a purely in-process database.
+"""
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Mapping, Optional, Sequence
+
+from storage.base import (
+    ProfileRepository, ResumeRepository, StatusKey, StatusRepository, Storage, TokenRepository, VersionRepository,
+)
+from storage.codec import dumps, loads
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS linkedin_profiles (
+    user_id TEXT PRIMARY KEY,
+    doc TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS resumes (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    template_id TEXT NOT NULL,
+    content_key TEXT,
+    generated_at TEXT NOT NULL,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS resumes_user_id_generated_at ON resumes (user_id, generated_at DESC);
+CREATE INDEX IF NOT EXISTS resumes_generated_at ON resumes (generated_at DESC);
+CREATE INDEX IF NOT EXISTS resumes_user_template_content ON resumes (user_id, template_id, content_key);
+CREATE INDEX IF NOT EXISTS resumes_content_key ON resumes (content_key);
+CREATE TABLE IF NOT EXISTS profile_snapshots (
+    hash TEXT PRIMARY KEY,
+    doc TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS status_checks (
+    id TEXT PRIMARY KEY,
+    client_name TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS status_checks_timestamp_id ON status_checks (timestamp, id);
+CREATE TABLE IF NOT EXISTS resume_versions (
+    user_id TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    base_version INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    doc TEXT NOT NULL,
+    PRIMARY KEY (user_id, version)
+);
+CREATE INDEX IF NOT EXISTS resume_versions_user_hash ON resume_versions (user_id, hash);
+CREATE TABLE IF NOT EXISTS linkedin_tokens (
+    user_id TEXT PRIMARY KEY,
+    token TEXT NOT NULL,
+    expires_at TEXT NOT NULL
+);
+"""
+
+# SQLite caps the number of bound parameters per statement
+MAX_PARAMS = 500
+
+
+def sortable_time(value: datetime) -> str:
+    """Fixed-width ISO timestamp, so text order equals time order"""
+    return value.strftime("%Y-%m-%dT%H:%M:%S.%f")
+
+
+class SQLiteDatabase:
+    def __init__(self, path: str):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        self._conn = conn
+
+    async def run(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, self._conn)
+
+    async def transaction(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        def atomically(conn: sqlite3.Connection):
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(conn)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return result
+        return await self.run(atomically)
+
+    async def open(self):
+        if self._conn is None:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._connect)
+
+    async def close(self):
+        if self._conn is not None:
+            await self.run(lambda conn: conn.close())
+            self._conn = None
+        self._executor.shutdown(wait=False)
+
+
+def _chunks(values: List[str]) -> Iterable[List[str]]:
+    for start in range(0, len(values), MAX_PARAMS):
+        yield values[start:start + MAX_PARAMS]
+
+
+class SQLiteProfileRepository(ProfileRepository):
+    def __init__(self, database: SQLiteDatabase):
+        self.database = database
+
+    async def get(self, user_id: str, fields: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+        row = await self.database.run(
+            lambda conn: conn.execute("SELECT doc FROM linkedin_profiles WHERE user_id = ?", (user_id,)).fetchone()
+        )
+        if not row:
+            return None
+        profile = loads(row[0])
+        # Profiles are stored as one document, so the projection happens here
+        return profile if fields is None else {field: profile[field] for field in fields if field in profile}
+
+    async def get_many(self, user_ids: Iterable[str]) -> List[Dict[str, Any]]:
+        ids = list(user_ids)
+
+        def select(conn):
+            rows = []
+            for chunk in _chunks(ids):
+                placeholders = ",".join("?" * len(chunk))
+                rows += conn.execute(
+                    f"SELECT doc FROM linkedin_profiles WHERE user_id IN ({placeholders})", chunk
+                ).fetchall()
+            return rows
+
+        return [loads(row[0]) for row in await self.database.run(select)]
+
+    async def upsert(self, user_id: str, fields: Mapping[str, Any], defaults: Mapping[str, Any]):
+        def write(conn):
+            row = conn.execute("SELECT doc FROM linkedin_profiles WHERE user_id = ?", (user_id,)).fetchone()
+            profile = loads(row[0]) if row else {**defaults, "user_id": user_id}
+            profile.update(fields)
+            conn.execute(
+                "INSERT OR REPLACE INTO linkedin_profiles (user_id, doc) VALUES (?, ?)", (user_id, dumps(profile))
+            )
+        await self.database.transaction(write)
+
+    async def update(self, user_id: str, changes: Mapping[str, Any]) -> bool:
+        def write(conn):
+            row = conn.execute("SELECT doc FROM linkedin_profiles WHERE user_id = ?", (user_id,)).fetchone()
+            if row is None:
+                return False
+            profile = loads(row[0])
+            profile.update(changes)
+            conn.execute("UPDATE linkedin_profiles SET doc = ? WHERE user_id = ?", (dumps(profile), user_id))
+            return True
+        return await self.database.transaction(write)
+
+    async def replace(self, profile: Mapping[str, Any]):
+        await self.database.run(lambda conn: conn.execute(
+            "INSERT OR REPLACE INTO linkedin_profiles (user_id, doc) VALUES (?, ?)",
+            (profile["user_id"], dumps(dict(profile))),
+        ))
+
+    async def scan(self, batch_size: int) -> AsyncIterator[Dict[str, Any]]:
+        after = ""
+        while True:
+            rows = await self.database.run(lambda conn: conn.execute(
+                "SELECT user_id, doc FROM linkedin_profiles WHERE user_id > ? ORDER BY user_id LIMIT ?",
+                (after, batch_size),
+            ).fetchall())
+            for _, doc in rows:
+                yield loads(doc)
+            if len(rows) < batch_size:
+                return
+            after = rows[-1][0]
+
+
+class SQLiteResumeRepository(ResumeRepository):
+    def __init__(self, database: SQLiteDatabase):
+        self.database = database
+
+    @staticmethod
+    def _row(resume: Mapping[str, Any]):
+        return (
+            resume["id"], resume["user_id"], resume["template_id"], resume.get("content_key"),
+            sortable_time(resume["generated_at"]), dumps(dict(resume)),
+        )
+
+    async def get(self, resume_id: str) -> Optional[Dict[str, Any]]:
+        row = await self.database.run(
+            lambda conn: conn.execute("SELECT doc FROM resumes WHERE id = ?", (resume_id,)).fetchone()
+        )
+        return loads(row[0]) if row else None
+
+    async def find_by_content(self, user_id: str, template_id: str, content_key: str) -> Optional[Dict[str, Any]]:
+        row = await self.database.run(lambda conn: conn.execute(
+            "SELECT doc FROM resumes WHERE user_id = ? AND template_id = ? AND content_key = ? LIMIT 1",
+            (user_id, template_id, content_key),
+        ).fetchone())
+        return loads(row[0]) if row else None
+
+    async def find_by_content_keys(self, user_ids: Iterable[str], content_keys: Iterable[str]) -> List[Dict[str, Any]]:
+        # resumes_content_key serves the lookup; user ids are checked on the rows found
+        users = set(user_ids)
+        keys = list(content_keys)
+
+        def select(conn):
+            rows = []
+            for chunk in _chunks(keys):
+                placeholders = ",".join("?" * len(chunk))
+                rows += conn.execute(
+                    f"SELECT id, user_id, template_id, content_key FROM resumes WHERE content_key IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+            return rows
+
+        columns = ("id", "user_id", "template_id", "content_key")
+        return [dict(zip(columns, row)) for row in await self.database.run(select) if row[1] in users]
+
+    async def insert(self, resume: Mapping[str, Any]):
+        await self.insert_many([resume])
+
+    async def insert_many(self, resumes: List[Mapping[str, Any]]):
+        rows = [self._row(resume) for resume in resumes]
+        await self.database.transaction(lambda conn: conn.executemany(
+            "INSERT INTO resumes (id, user_id, template_id, content_key, generated_at, doc) VALUES (?, ?, ?, ?, ?, ?)",
+            rows,
+        ))
+
+    async def load_snapshot(self, profile_hash: str) -> Optional[Dict[str, Any]]:
+        row = await self.database.run(
+            lambda conn: conn.execute("SELECT doc FROM profile_snapshots WHERE hash = ?", (profile_hash,)).fetchone()
+        )
+        return loads(row[0]) if row else None
+
+
+class SQLiteStatusRepository(StatusRepository):
+    def __init__(self, database: SQLiteDatabase):
+        self.database = database
+
+    async def insert_many(self, checks: List[Mapping[str, Any]]) -> List[str]:
+        rows = [(check["id"], check["client_name"], sortable_time(check["timestamp"])) for check in checks]
+        # One transaction: either every row is written or the call raises
+        await self.database.transaction(lambda conn: conn.executemany(
+            "INSERT INTO status_checks (id, client_name, timestamp) VALUES (?, ?, ?)", rows
+        ))
+        return []
+
+    async def page(self, after: Optional[StatusKey], limit: int) -> List[Dict[str, Any]]:
+        def select(conn):
+            if after is None:
+                return conn.execute(
+                    "SELECT id, client_name, timestamp FROM status_checks ORDER BY timestamp, id LIMIT ?", (limit,)
+                ).fetchall()
+            timestamp, row_id = after
+            return conn.execute(
+                "SELECT id, client_name, timestamp FROM status_checks "
+                "WHERE (timestamp, id) > (?, ?) ORDER BY timestamp, id LIMIT ?",
+                (sortable_time(timestamp), row_id, limit),
+            ).fetchall()
+
+        return [
+            {"id": row_id, "client_name": client_name, "timestamp": datetime.fromisoformat(timestamp)}
+            for row_id, client_name, timestamp in await self.database.run(select)
+        ]
+
+    async def stream(self, after: Optional[StatusKey], limit: Optional[int], batch_size: int) -> AsyncIterator[Dict[str, Any]]:
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = batch_size if remaining is None else min(batch_size, remaining)
+            rows = await self.page(after, size)
+            for row in rows:
+                yield row
+            if len(rows) < size:
+                return
+            after = (rows[-1]["timestamp"], rows[-1]["id"])
+            if remaining is not None:
+                remaining -= len(rows)
+
+
+class SQLiteVersionRepository(VersionRepository):
+    def __init__(self, database: SQLiteDatabase):
+        self.database = database
+
+    async def latest(self, user_id: str) -> Optional[Dict[str, Any]]:
+        row = await self.database.run(lambda conn: conn.execute(
+            "SELECT doc FROM resume_versions WHERE user_id = ? ORDER BY version DESC LIMIT 1", (user_id,)
+        ).fetchone())
+        return loads(row[0]) if row else None
+
+    async def get_many(self, user_id: str, versions: Iterable[int]) -> List[Dict[str, Any]]:
+        numbers = list(versions)
+
+        def select(conn):
+            rows = []
+            for chunk in _chunks(numbers):
+                placeholders = ",".join("?" * len(chunk))
+                rows += conn.execute(
+                    f"SELECT doc FROM resume_versions WHERE user_id = ? AND version IN ({placeholders})",
+                    [user_id, *chunk],
+                ).fetchall()
+            return rows
+
+        return [loads(row[0]) for row in await self.database.run(select)]
+
+    async def find_by_hash(self, user_id: str, content_hash: str) -> Optional[int]:
+        row = await self.database.run(lambda conn: conn.execute(
+            "SELECT version FROM resume_versions WHERE user_id = ? AND hash = ? LIMIT 1", (user_id, content_hash)
+        ).fetchone())
+        return row[0] if row else None
+
+    async def insert(self, record: Mapping[str, Any]) -> bool:
+        row = (
+            record["user_id"], record["version"], record["base_version"], record["hash"],
+            sortable_time(record["created_at"]), dumps(dict(record)),
+        )
+
+        def write(conn):
+            try:
+                conn.execute(
+                    "INSERT INTO resume_versions (user_id, version, base_version, hash, created_at, doc) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    row,
+                )
+            except sqlite3.IntegrityError:
+                return False
+            return True
+        return await self.database.run(write)
+
+    async def list(self, user_id: str, before: Optional[int], limit: int) -> List[Dict[str, Any]]:
+        def select(conn):
+            return conn.execute(
+                "SELECT user_id, version, base_version, hash, created_at FROM resume_versions "
+                "WHERE user_id = ? AND version < ? ORDER BY version DESC LIMIT ?",
+                (user_id, before if before is not None else 2 ** 62, limit),
+            ).fetchall()
+
+        columns = ("user_id", "version", "base_version", "hash", "created_at")
+        return [
+            {**dict(zip(columns, row)), "created_at": datetime.fromisoformat(row[4])}
+            for row in await self.database.run(select)
+        ]
+
+
+class SQLiteTokenRepository(TokenRepository):
+    def __init__(self, database: SQLiteDatabase):
+        self.database = database
+
+    async def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        row = await self.database.run(lambda conn: conn.execute(
+            "SELECT token, expires_at FROM linkedin_tokens WHERE user_id = ?", (user_id,)
+        ).fetchone())
+        if row is None:
+            return None
+        return {"token": row[0], "expires_at": datetime.fromisoformat(row[1])}
+
+    async def put(self, user_id: str, token: str, expires_at: datetime):
+        await self.database.run(lambda conn: conn.execute(
+            "INSERT OR REPLACE INTO linkedin_tokens (user_id, token, expires_at) VALUES (?, ?, ?)",
+            (user_id, token, sortable_time(expires_at)),
+        ))
+
+    async def delete(self, user_id: str):
+        await self.database.run(
+            lambda conn: conn.execute("DELETE FROM linkedin_tokens WHERE user_id = ?", (user_id,))
+        )
+
+
+class SQLiteStorage(Storage):
+    def __init__(self, path: str):
+        self.database = SQLiteDatabase(path)
+        self.profiles = SQLiteProfileRepository(self.database)
+        self.resumes = SQLiteResumeRepository(self.database)
+        self.statuses = SQLiteStatusRepository(self.database)
+        self.tokens = SQLiteTokenRepository(self.database)
+        self.versions = SQLiteVersionRepository(self.database)
+
+    async def start(self) -> bool:
+        # The schema script creates tables and indexes only if missing
+        await self.database.open()
+        return True
+
+    async def ping(self):
+        await self.database.run(lambda conn: conn.execute("SELECT 1").fetchone())
+
+    async def close(self):
+        await self.database.close()
@@ -0,0 +1,37 @@
+"""Encryption for LinkedIn access tokens at rest.
+
+Tokens are Fernet-encrypted before they reach storage. ``TOKEN_ENCRYPTION_KEY``
+may hold several comma-separated keys: the first encrypts, all of them
+decrypt, so a key can be rotated without invalidating stored tokens.
+Generate a key with ``python -c "from cryptography.fernet import Fernet;
+print(Fernet.generate_key().decode())"``.
+"""
+import logging
+from typing import Optional
+
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+
+
+logger = logging.getLogger(__name__)
+
+
+class TokenCipher:
+    def __init__(self, keys: Optional[str]):
+        keys = [key.strip() for key in (keys or "").split(",") if key.strip()]
+        self._fernet = MultiFernet([Fernet(key) for key in keys]) if keys else None
+
+    @property
+    def enabled(self) -> bool:
+        """False when no key is configured; tokens are then not stored at all"""
+        return self._fernet is not None
+
+    def encrypt(self, token: str) -> str:
+        return self._fernet.encrypt(token.encode()).decode()
+
+    def decrypt(self, ciphertext: str) -> Optional[str]:
+        """The plain token, or None if no configured key can decrypt it"""
+        try:
+            return self._fernet.decrypt(ciphertext.encode()).decode()
+        except InvalidToken:
+            logger.warning("Stored access token could not be decrypted with the configured keys")
+            return None
@@ -0,0 +1,168 @@
+"""Delta-encoded profile version history (``resume_versions``).
+
+Every distinct profile a user generates resumes from becomes a numbered
+version, and each resume records the version it was rendered from. Most
+versions only store a JSON patch (RFC 6902 ``add``/``remove``/``replace``)
+against the base of their segment rather than against their predecessor, so
+any version is rebuilt from at most two documents. A new base is written every
+``rebase_interval`` versions, or sooner when the patch would be more than half
+the size of the profile itself.
+"""
+import copy
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+import orjson
+
+
+
+# Appends that lose the race for a version number retry this many times
+MAX_APPEND_ATTEMPTS = 5
+
+
+def version_content(profile: Mapping[str, Any]) -> Dict[str, Any]:
+    """The part of a profile document that is captured in a version"""
+    return {key: value for key, value in profile.items() if key != "_id"}
+
+
+def version_hash(profile: Mapping[str, Any]) -> str:
+    # The same hash older resumes stored as ``profile_hash``
+    encoded = json.dumps(
+        version_content(profile), sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _escape(key: str) -> str:
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def make_patch(old: Any, new: Any, path: str = "") -> List[Dict[str, Any]]:
+    """JSON patch turning ``old`` into ``new``.
+
+    Objects are diffed key by key and lists index by index, so editing one
+    experience entry only records that entry's changed fields.
+    """
+    if old == new:
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = [{"op": "remove", "path": f"{path}/{_escape(key)}"} for key in old if key not in new]
+        for key, value in new.items():
+            child = f"{path}/{_escape(key)}"
+            if key in old:
+                ops += make_patch(old[key], value, child)
+            else:
+                ops.append({"op": "add", "path": child, "value": value})
+        return ops
+    if isinstance(old, list) and isinstance(new, list):
+        common = min(len(old), len(new))
+        ops = []
+        for index in range(common):
+            ops += make_patch(old[index], new[index], f"{path}/{index}")
+        # Remove from the end so earlier indexes stay valid
+        ops += [{"op": "remove", "path": f"{path}/{index}"} for index in range(len(old) - 1, common - 1, -1)]
+        ops += [{"op": "add", "path": f"{path}/{index}", "value": new[index]} for index in range(common, len(new))]
+        return ops
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+def apply_patch(document: Any, patch: Iterable[Mapping[str, Any]]) -> Any:
+    """Apply a patch from ``make_patch`` to a copy of ``document``"""
+    document = copy.deepcopy(document)
+    for op in patch:
+        if op["path"] == "":
+            document = copy.deepcopy(op["value"])
+            continue
+        *parents, last = [_unescape(token) for token in op["path"].split("/")[1:]]
+        target = document
+        for token in parents:
+            target = target[int(token)] if isinstance(target, list) else target[token]
+        if isinstance(target, list):
+            last = int(last)
+            if op["op"] == "add":
+                target.insert(last, copy.deepcopy(op["value"]))
+                continue
+        if op["op"] == "remove":
+            del target[last]
+        else:
+            target[last] = copy.deepcopy(op["value"])
+    return document
+
+
+def _size(value: Any) -> int:
+    return len(orjson.dumps(value, default=str))
+
+
+async def record_version(versions, user_id: str, profile: Mapping[str, Any], rebase_interval: int) -> int:
+    """Append ``profile`` to the user's history; returns its version number.
+
+    A profile identical to any earlier version reuses that version, so going
+    back to an earlier profile (A, B, A) does not store it again.
+    """
+    content = version_content(profile)
+    content_hash = version_hash(profile)
+    for _ in range(MAX_APPEND_ATTEMPTS):
+        latest = await versions.latest(user_id)
+        if latest is not None and latest["hash"] == content_hash:
+            return latest["version"]
+        if latest is not None:
+            earlier = await versions.find_by_hash(user_id, content_hash)
+            if earlier is not None:
+                return earlier
+
+        number = latest["version"] + 1 if latest else 1
+        record = {"user_id": user_id, "version": number, "hash": content_hash, "created_at": datetime.utcnow()}
+
+        patch = None
+        if latest is not None and number - latest["base_version"] < rebase_interval:
+            if "profile" in latest:
+                base = latest
+            else:
+                base = (await versions.get_many(user_id, [latest["base_version"]]))[0]
+            patch = make_patch(base["profile"], content)
+        if patch is not None and 2 * _size(patch) <= _size(content):
+            record.update(base_version=latest["base_version"], patch=patch)
+        else:
+            record.update(base_version=number, profile=content)
+
+        if await versions.insert(record):
+            return number
+    raise RuntimeError(f"Could not append a profile version for {user_id}")
+
+
+async def load_versions(versions, user_id: str, numbers: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+    """Rebuild the requested versions with one read for them and one for their bases"""
+    records = {record["version"]: record for record in await versions.get_many(user_id, set(numbers))}
+    missing_bases = {
+        record["base_version"] for record in records.values()
+        if "patch" in record and record["base_version"] not in records
+    }
+    bases = dict(records)
+    if missing_bases:
+        bases.update({record["version"]: record for record in await versions.get_many(user_id, missing_bases)})
+
+    profiles = {}
+    for number, record in records.items():
+        if "profile" in record:
+            profiles[number] = record["profile"]
+        elif record["base_version"] in bases:
+            profiles[number] = apply_patch(bases[record["base_version"]]["profile"], record["patch"])
+    return profiles
+
+
+async def resume_profile(storage, resume: Mapping[str, Any]) -> Optional[Dict[str, Any]]:
+    """Profile a resume was generated from, for every storage format"""
+    if "profile" in resume:
+        # Legacy resume that still embeds its own copy
+        return resume["profile"]
+    if "profile_version" in resume:
+        profiles = await load_versions(storage.versions, resume["user_id"], [resume["profile_version"]])
+        return profiles.get(resume["profile_version"])
+    # Resume written while profiles were stored as content-hashed snapshots
+    return await storage.resumes.load_snapshot(resume["profile_hash"])
@@ -0,0 +1,128 @@
+"""Write-behind buffer for high-volume inserts.
+
+Documents are queued in memory and handed to ``write`` in batches whenever the
+buffer reaches ``max_batch`` documents or ``flush_interval`` seconds pass,
+whichever happens first. ``max_pending`` bounds the queue. When it is full,
+``add`` either waits for room (``overflow="block"``) or raises
+``BufferFull`` (``overflow="reject"``); a call with more documents than
+``max_pending`` is queued in chunks under "block" and rejected under "reject".
+
+A batch leaves the queue only once it is written. If the write raises, the
+batch stays at the front and is retried on the next flush, so an outage fills
+the buffer and applies the overflow policy instead of losing acknowledged
+documents. Documents the store refuses (``write`` returns fewer than it was
+given) are not retried.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class BufferFull(Exception):
+    """Raised by ``add`` when the buffer is full and overflow is "reject"."""
+
+
+class WriteBehindBuffer:
+    def __init__(self, write: Callable[[List[Dict[str, Any]]], Awaitable[int]], max_batch: int = 500,
+                 flush_interval: float = 1.0, max_pending: int = 10000, overflow: str = "block"):
+        if overflow not in ("block", "reject"):
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        # Writes a batch and returns how many documents were stored
+        self.write = write
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.overflow = overflow
+        self._pending: List[Dict[str, Any]] = []
+        self._room = asyncio.Condition()
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"buffered": 0, "written": 0, "flushes": 0, "rejected": 0, "failed": 0, "retried": 0}
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self, attempts: int = 3):
+        """Stop the background flusher and write out everything still queued.
+
+        Gives up after ``attempts`` consecutive failed flushes; what is still
+        queued then is logged and dropped.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        failures = 0
+        while self._pending and failures < attempts:
+            if await self.flush():
+                failures = 0
+            else:
+                failures += 1
+                await asyncio.sleep(self.flush_interval)
+        if self._pending:
+            self.stats["failed"] += len(self._pending)
+            logger.error(f"Write-behind buffer closed with {len(self._pending)} unwritten documents")
+            self._pending.clear()
+
+    async def add(self, documents: List[Dict[str, Any]]):
+        if len(documents) > self.max_pending and self.overflow == "block":
+            # Could never fit at once, so wait for room a chunk at a time
+            for start in range(0, len(documents), self.max_pending):
+                await self.add(documents[start:start + self.max_pending])
+            return
+        async with self._room:
+            while len(self._pending) + len(documents) > self.max_pending:
+                if self.overflow == "reject":
+                    self.stats["rejected"] += len(documents)
+                    raise BufferFull()
+                await self._room.wait()
+            self._pending.extend(documents)
+            self.stats["buffered"] += len(documents)
+        if len(self._pending) >= self.max_batch:
+            self._wake.set()
+
+    async def flush(self) -> bool:
+        """Write the oldest batch; False if the write failed and the batch is still queued"""
+        async with self._flush_lock:
+            if not self._pending:
+                return True
+            batch = self._pending[:self.max_batch]
+            try:
+                written = await self.write(batch)
+            except Exception as e:
+                self.stats["retried"] += len(batch)
+                logger.error(f"Write-behind flush of {len(batch)} documents failed, will retry: {e}")
+                return False
+            finally:
+                self.stats["flushes"] += 1
+            # Only now does the batch leave the queue and make room
+            del self._pending[:len(batch)]
+            async with self._room:
+                self._room.notify_all()
+            self.stats["written"] += written
+            self.stats["failed"] += len(batch) - written
+            return True
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            while self._pending:
+                # After a failure, wait for the next interval before retrying
+                if not await self.flush() or len(self._pending) < self.max_batch:
+                    break
@@ -0,0 +1,78 @@
+"""Measure LinkedIn callback latency under a login burst.
+
+Starts the fake LinkedIn server and ``server:app`` locally, fires
+``--logins`` OAuth logins with ``--concurrency`` in flight, and prints
+p50/p95/p99 latency as JSON. Each login fetches a signed state from
+``/api/auth/linkedin`` and then calls the callback with it, and both requests
+are timed::
+
+    python benchmarks/callback_latency.py --memory-db --logins 500 --concurrency 100
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from common import (
+    BENCH_DIR, free_port, latency_summary, login_callback, serve_args, server_env, start_process,
+    stop_process, wait_for_http,
+)
+
+
+async def burst(base_url: str, logins: int, concurrency: int):
+    gate = asyncio.Semaphore(concurrency)
+    samples, failures = [], 0
+
+    async with httpx.AsyncClient(base_url=base_url, follow_redirects=False, timeout=60) as client:
+        async def login(n: int):
+            nonlocal failures
+            async with gate:
+                started = time.perf_counter()
+                response = await login_callback(client, f"c{n}")
+                samples.append(time.perf_counter() - started)
+                if "success=true" not in response.headers.get("location", ""):
+                    failures += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(login(n) for n in range(logins)))
+        elapsed = time.perf_counter() - started
+
+    return samples, failures, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=50, help="simulated LinkedIn latency per call")
+    parser.add_argument("--memory-db", action="store_true", help="use an in-memory Mongo stand-in")
+    args = parser.parse_args()
+
+    linkedin_port, api_port = free_port(), free_port()
+    fake = start_process([str(BENCH_DIR / "fake_linkedin.py"), "--port", str(linkedin_port),
+                          "--latency-ms", str(args.latency_ms)])
+    server = start_process(serve_args(api_port, args.memory_db), server_env(linkedin_port))
+    try:
+        wait_for_http(f"http://127.0.0.1:{linkedin_port}/docs")
+        wait_for_http(f"http://127.0.0.1:{api_port}/api/")
+        samples, failures, elapsed = asyncio.run(
+            burst(f"http://127.0.0.1:{api_port}", args.logins, args.concurrency)
+        )
+    finally:
+        stop_process(server)
+        stop_process(fake)
+
+    print(json.dumps({
+        "logins": args.logins,
+        "concurrency": args.concurrency,
+        "upstream_latency_ms": args.latency_ms,
+        "failures": failures,
+        "logins_per_second": round(args.logins / elapsed, 1),
+        **latency_summary(samples),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
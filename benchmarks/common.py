@@ -0,0 +1,85 @@
+"""Helpers shared by the benchmark scripts."""
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+
+
+BENCH_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = BENCH_DIR.parent / "backend"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_process(args: Sequence[str], env: Optional[Dict[str, str]] = None) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, *args], env={**os.environ, **(env or {})})
+
+
+def stop_process(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def wait_for_http(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    """p50/p95/p99/max in milliseconds for samples recorded in seconds"""
+    return {
+        f"p{pct}_ms": round(percentile(samples, pct) * 1000, 2) for pct in (50, 95, 99)
+    } | {"max_ms": round(max(samples, default=0.0) * 1000, 2)}
+
+
+def server_env(linkedin_port: Optional[int] = None, extra: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    env = {}
+    if linkedin_port is not None:
+        env["LINKEDIN_OAUTH_URL"] = f"http://127.0.0.1:{linkedin_port}/oauth/v2"
+        env["LINKEDIN_API_URL"] = f"http://127.0.0.1:{linkedin_port}/v2"
+        env["LINKEDIN_CLIENT_ID"] = "bench-client"
+        env["LINKEDIN_CLIENT_SECRET"] = "bench-secret"
+    env.update(extra or {})
+    return env
+
+
+def serve_args(port: int, memory_db: bool) -> List[str]:
+    args = [str(BENCH_DIR / "serve.py"), "--port", str(port)]
+    if memory_db:
+        args.append("--memory-db")
+    return args
+
+
+async def login_callback(client: httpx.AsyncClient, code: str) -> httpx.Response:
+    """Run an OAuth callback the way a browser does, with a state from /api/auth/linkedin"""
+    auth_url = (await client.get("/api/auth/linkedin")).json()["auth_url"]
+    state = parse_qs(urlparse(auth_url).query)["state"][0]
+    return await client.get("/api/auth/linkedin/callback", params={"code": code, "state": state})
@@ -0,0 +1,61 @@
+"""Local stand-in for the LinkedIn OAuth and profile APIs.
+
+Every endpoint sleeps for ``--latency-ms`` to imitate the upstream round
+trip. Access tokens are derived from the authorization code and member ids
+from the token, so each simulated login produces a distinct user.
+"""
+import argparse
+import asyncio
+import os
+
+from fastapi import FastAPI, Form, Header, HTTPException
+
+
+LATENCY = float(os.getenv("FAKE_LINKEDIN_LATENCY_MS", "50")) / 1000
+
+app = FastAPI()
+
+
+def _token(authorization: str) -> str:
+    if not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Missing bearer token")
+    return authorization[len("Bearer "):]
+
+
+@app.post("/oauth/v2/accessToken")
+async def access_token(code: str = Form(...), grant_type: str = Form(...)):
+    await asyncio.sleep(LATENCY)
+    return {"access_token": f"token-{code}", "expires_in": 5184000}
+
+
+@app.get("/v2/me")
+async def me(authorization: str = Header("")):
+    token = _token(authorization)
+    await asyncio.sleep(LATENCY)
+    member = token.removeprefix("token-")
+    return {
+        "id": f"member-{member}",
+        "localizedFirstName": "Bench",
+        "localizedLastName": member,
+        "localizedHeadline": "Load test user",
+    }
+
+
+@app.get("/v2/emailAddress")
+async def email_address(authorization: str = Header("")):
+    token = _token(authorization)
+    await asyncio.sleep(LATENCY)
+    member = token.removeprefix("token-")
+    return {"elements": [{"handle~": {"emailAddress": f"{member}@example.com"}}]}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    args = parser.parse_args()
+    os.environ["FAKE_LINKEDIN_LATENCY_MS"] = str(args.latency_ms)
+    LATENCY = args.latency_ms / 1000
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
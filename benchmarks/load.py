@@ -0,0 +1,251 @@
+"""Load and latency benchmark for the /api endpoints.
+
+Starts ``server:app`` (on an in-memory Mongo stand-in with ``--memory-db``,
+otherwise on the Mongo configured through ``MONGO_URL``/``DB_NAME``) next to
+the fake LinkedIn server, seeds profiles, then drives concurrent load at each
+endpoint in turn. For every scenario it reports requests per second,
+p50/p95/p99 latency, errors and the server's resident memory.
+
+Save a baseline and compare later runs against it::
+
+    python benchmarks/load.py --memory-db --save-baseline benchmarks/baseline.json
+    python benchmarks/load.py --memory-db --compare benchmarks/baseline.json
+
+``--compare`` exits with status 1 when any scenario's p95 latency or
+throughput regressed by more than ``--tolerance`` (default 20%).
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from common import (
+    BENCH_DIR, free_port, latency_summary, login_callback, serve_args, server_env, start_process,
+    stop_process, wait_for_http,
+)
+
+
+TEMPLATES = ("modern", "classic", "elegant")
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    """Resident memory of a process in MiB (Linux only)"""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        return None
+    return None
+
+
+def profile_payload(n: int) -> Dict[str, Any]:
+    return {
+        "user_id": f"bench-{n}",
+        "first_name": "Bench",
+        "last_name": f"User {n}",
+        "headline": "Senior Engineer",
+        "email": f"bench-{n}@example.com",
+        "location": "Remote",
+        "summary": "Builds and operates backend services. " * 5,
+        "experience": [
+            {"title": f"Engineer {i}", "company": f"Company {i}", "start_date": "2019", "description": "Shipped things."}
+            for i in range(5)
+        ],
+        "education": [{"school": "State University", "degree": "BSc", "field_of_study": "Computer Science"}],
+        "skills": ["python", "fastapi", "mongodb", "redis", "kubernetes", "aws"],
+    }
+
+
+class Scenario:
+    def __init__(self, name: str, request: Callable[[httpx.AsyncClient, int], Any], expect=(200,)):
+        self.name = name
+        self.request = request
+        self.expect = expect
+
+
+def build_scenarios(users: int, resume_ids: List[str]) -> List[Scenario]:
+    resume_cycle = itertools.cycle(resume_ids)
+    login = itertools.count()
+    return [
+        Scenario("root", lambda c, n: c.get("/api/")),
+        Scenario("templates", lambda c, n: c.get("/api/templates")),
+        Scenario("auth_url", lambda c, n: c.get("/api/auth/linkedin")),
+        Scenario(
+            "auth_callback",
+            # Includes fetching the signed state the callback requires
+            lambda c, n: login_callback(c, f"load-{next(login)}"),
+            expect=(307,),
+        ),
+        Scenario("profile", lambda c, n: c.get(f"/api/profile/bench-{n % users}")),
+        Scenario("status_create", lambda c, n: c.post("/api/status", json={"client_name": f"agent-{n}"})),
+        Scenario(
+            "status_batch_50",
+            lambda c, n: c.post("/api/status/batch", json=[{"client_name": f"agent-{n}-{i}"} for i in range(50)]),
+        ),
+        Scenario("status_page_100", lambda c, n: c.get("/api/status", params={"limit": 100})),
+        Scenario(
+            "generate_resume",
+            lambda c, n: c.post(
+                "/api/generate-resume",
+                params={"user_id": f"bench-{n % users}", "template_id": TEMPLATES[n % len(TEMPLATES)]},
+            ),
+            expect=(202,),
+        ),
+        Scenario(
+            "generate_resume_bulk_10",
+            lambda c, n: c.post("/api/generate-resume/bulk", json={"items": [
+                {"user_id": f"bench-{(n + i) % users}", "template_id": TEMPLATES[i % len(TEMPLATES)]}
+                for i in range(10)
+            ]}),
+        ),
+        Scenario("resume_html", lambda c, n: c.get(f"/api/resumes/{next(resume_cycle)}/html")),
+        Scenario("resume_pdf", lambda c, n: c.get(f"/api/resumes/{next(resume_cycle)}/pdf")),
+    ]
+
+
+async def wait_for_job(client: httpx.AsyncClient, job_id: str) -> Dict[str, Any]:
+    while True:
+        job = (await client.get(f"/api/jobs/{job_id}")).json()
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        await asyncio.sleep(0.05)
+
+
+async def seed(client: httpx.AsyncClient, users: int) -> List[str]:
+    for n in range(users):
+        response = await client.post("/api/test-create-profile", json=profile_payload(n))
+        response.raise_for_status()
+    resume_ids = []
+    for n in range(min(users, 20)):
+        response = await client.post(
+            "/api/generate-resume", params={"user_id": f"bench-{n}", "template_id": TEMPLATES[n % len(TEMPLATES)]}
+        )
+        job = await wait_for_job(client, response.json()["job_id"])
+        resume_ids.append(job["result"]["resume_id"])
+    return resume_ids
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, requests: int, concurrency: int,
+                       server_pid: int) -> Dict[str, Any]:
+    gate = asyncio.Semaphore(concurrency)
+    samples, errors = [], 0
+
+    async def one(n: int):
+        nonlocal errors
+        async with gate:
+            started = time.perf_counter()
+            try:
+                response = await scenario.request(client, n)
+                ok = response.status_code in scenario.expect
+            except httpx.HTTPError:
+                ok = False
+            samples.append(time.perf_counter() - started)
+            if not ok:
+                errors += 1
+
+    rss_before = rss_mb(server_pid)
+    started = time.perf_counter()
+    await asyncio.gather(*(one(n) for n in range(requests)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "rps": round(requests / elapsed, 1),
+        **latency_summary(samples),
+        "rss_before_mb": rss_before,
+        "rss_after_mb": rss_mb(server_pid),
+    }
+
+
+async def run(base_url: str, args, server_pid: int) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60, follow_redirects=False) as client:
+        resume_ids = await seed(client, args.users)
+        scenarios = build_scenarios(args.users, resume_ids)
+        if args.only:
+            scenarios = [scenario for scenario in scenarios if scenario.name in args.only]
+        results = {}
+        for scenario in scenarios:
+            results[scenario.name] = await run_scenario(
+                client, scenario, args.requests, args.concurrency, server_pid
+            )
+            print(f"{scenario.name:>24}: {results[scenario.name]['rps']:>8} rps  "
+                  f"p95 {results[scenario.name]['p95_ms']:>8} ms  errors {results[scenario.name]['errors']}",
+                  file=sys.stderr)
+        return results
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']} ms -> {current['p95_ms']} ms")
+        if previous["rps"] and current["rps"] < previous["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: {previous['rps']} rps -> {current['rps']} rps")
+        if current["errors"] > previous["errors"]:
+            regressions.append(f"{name}: errors {previous['errors']} -> {current['errors']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--users", type=int, default=200, help="profiles to seed")
+    parser.add_argument("--linkedin-latency-ms", type=float, default=50)
+    parser.add_argument("--memory-db", action="store_true", help="use an in-memory Mongo stand-in")
+    parser.add_argument("--only", nargs="*", help="run only these scenarios")
+    parser.add_argument("--save-baseline", type=Path)
+    parser.add_argument("--compare", type=Path)
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    linkedin_port, api_port = free_port(), free_port()
+    fake = start_process([str(BENCH_DIR / "fake_linkedin.py"), "--port", str(linkedin_port),
+                          "--latency-ms", str(args.linkedin_latency_ms)])
+    server = start_process(serve_args(api_port, args.memory_db), server_env(linkedin_port))
+    try:
+        wait_for_http(f"http://127.0.0.1:{linkedin_port}/docs")
+        wait_for_http(f"http://127.0.0.1:{api_port}/api/")
+        results = asyncio.run(run(f"http://127.0.0.1:{api_port}", args, server.pid))
+    finally:
+        stop_process(server)
+        stop_process(fake)
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "settings": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "users": args.users,
+            "linkedin_latency_ms": args.linkedin_latency_ms,
+            "memory_db": args.memory_db,
+        },
+        "scenarios": results,
+    }
+    print(json.dumps(report, indent=2))
+
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(report, indent=2) + "\n")
+    if args.compare:
+        regressions = compare(results, json.loads(args.compare.read_text()), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
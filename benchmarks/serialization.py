@@ -0,0 +1,132 @@
+"""Micro-benchmark of response serialization per request.
+
+Compares the original response path (stringify ``_id``, build the model,
+re-validate and serialize it through ``response_model``, render with the
+stdlib JSON encoder) with the fast path (projected document rendered
+directly by ``ORJSONResponse``) for ``GET /api/profile/{id}`` and a
+100-row page of ``GET /api/status``::
+
+    python benchmarks/serialization.py --iterations 5000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import List
+
+from bson import ObjectId
+
+from common import BACKEND_DIR
+
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "benchmark")
+
+from fastapi.responses import JSONResponse, ORJSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+from server import LinkedInProfile, StatusCheck  # noqa: E402
+
+
+def profile_document(with_id: bool) -> dict:
+    doc = {
+        "id": str(uuid.uuid4()),
+        "user_id": "member-123",
+        "first_name": "Ada",
+        "last_name": "Lovelace",
+        "headline": "Analytical engine programmer",
+        "email": "ada@example.com",
+        "profile_picture": "https://media.licdn.com/ada.jpg",
+        "location": "London",
+        "summary": "First programmer. " * 20,
+        "experience": [
+            {"title": f"Role {i}", "company": f"Company {i}", "start_date": "2020", "description": "Did things. " * 10}
+            for i in range(8)
+        ],
+        "education": [{"school": "University of London", "degree": "Mathematics"}],
+        "skills": [f"skill-{i}" for i in range(30)],
+        "created_at": datetime.utcnow(),
+    }
+    if with_id:
+        doc["_id"] = ObjectId()
+    return doc
+
+
+def status_rows(with_id: bool, count: int = 100) -> List[dict]:
+    rows = []
+    for i in range(count):
+        row = {"id": str(uuid.uuid4()), "client_name": f"agent-{i}", "timestamp": datetime.utcnow()}
+        if with_id:
+            row["_id"] = ObjectId()
+        rows.append(row)
+    return rows
+
+
+async def old_profile(field, doc):
+    doc = dict(doc)
+    doc["_id"] = str(doc["_id"])
+    content = await serialize_response(field=field, response_content=LinkedInProfile(**doc))
+    return JSONResponse(content).body
+
+
+async def old_status(field, rows):
+    rows = [dict(row) for row in rows]
+    for row in rows:
+        row["_id"] = str(row["_id"])
+    content = await serialize_response(field=field, response_content=[StatusCheck(**row) for row in rows])
+    return JSONResponse(content).body
+
+
+async def new_response(content):
+    return ORJSONResponse(content).body
+
+
+async def measure(fn, *args, iterations: int) -> float:
+    for _ in range(min(200, iterations)):
+        await fn(*args)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await fn(*args)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+async def run(iterations: int):
+    profile_field = create_response_field(name="Response_get_profile", type_=LinkedInProfile)
+    status_field = create_response_field(name="Response_get_status_checks", type_=List[StatusCheck])
+
+    cases = {
+        "profile": (
+            (old_profile, profile_field, profile_document(with_id=True)),
+            (new_response, profile_document(with_id=False)),
+        ),
+        "status_page_100": (
+            (old_status, status_field, status_rows(with_id=True)),
+            (new_response, status_rows(with_id=False)),
+        ),
+    }
+    report = {}
+    for name, (before, after) in cases.items():
+        before_us = await measure(*before, iterations=iterations)
+        after_us = await measure(*after, iterations=iterations)
+        report[name] = {
+            "before_us_per_request": round(before_us, 2),
+            "after_us_per_request": round(after_us, 2),
+            "speedup": round(before_us / after_us, 2),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.iterations)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Run ``server:app`` for benchmarks.
+
+With ``--memory-db`` the Motor client is swapped for mongomock-motor before
+the server module is imported, so the API can be exercised without a Mongo
+server. ``STORAGE_BACKEND=sqlite`` runs against the embedded backend instead.
+Otherwise ``MONGO_URL``/``DB_NAME`` from the environment or ``backend/.env``
+are used as usual.
+"""
+import argparse
+import logging
+import os
+import sys
+
+from common import BACKEND_DIR
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--memory-db", action="store_true", help="use an in-memory Mongo stand-in")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(BACKEND_DIR))
+    os.chdir(BACKEND_DIR)
+
+    if args.memory_db:
+        import mongomock_motor
+        import motor.motor_asyncio
+
+        motor.motor_asyncio.AsyncIOMotorClient = mongomock_motor.AsyncMongoMockClient
+        os.environ.setdefault("MONGO_URL", "mongodb://in-memory")
+        os.environ.setdefault("DB_NAME", "benchmark")
+
+    import uvicorn
+
+    # Per-request upstream logging would dominate the measurements
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    uvicorn.run("server:app", host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,18 +4,53 @@ set -e
 # Start the FastAPI backend
 cd /backend || { echo "Backend directory not found"; exit 1; }
 
-echo "Starting FastAPI backend"
-# Start Uvicorn with proper host binding
-uvicorn server:app --host 0.0.0.0 --port 8001 &
+# Jobs, cache invalidations and index updates only reach every worker through
+# Redis, so without REDIS_URL there is one worker; with it, one per core unless
+# WEB_CONCURRENCY says otherwise
+if [ -n "$REDIS_URL" ]; then
+    WEB_CONCURRENCY=${WEB_CONCURRENCY:-$(nproc)}
+else
+    WEB_CONCURRENCY=${WEB_CONCURRENCY:-1}
+    if [ "$WEB_CONCURRENCY" -gt 1 ]; then
+        echo "WEB_CONCURRENCY=$WEB_CONCURRENCY needs REDIS_URL; set it or run one worker"
+        exit 1
+    fi
+fi
+if [ "$WEB_CONCURRENCY" -gt 1 ]; then
+    # Jobs must be visible to whichever worker is polled for them
+    export JOB_BACKEND=${JOB_BACKEND:-redis}
+    # Workers write metric samples here; /metrics merges them
+    export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus-multiproc}
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+export WEB_CONCURRENCY
+
+echo "Starting FastAPI backend with $WEB_CONCURRENCY worker(s)"
+# Start Uvicorn with proper host binding. The keep-alive timeout outlives
+# nginx's upstream keepalive_timeout so nginx never reuses a closed socket.
+uvicorn server:app --host 0.0.0.0 --port 8001 --workers "$WEB_CONCURRENCY" --timeout-keep-alive 75 &
 BACKEND_PID=$!
 
-echo "Waiting for backend to start..."
-sleep 30
+# Poll the readiness probe instead of sleeping for a fixed time
+READY_URL="http://127.0.0.1:8001/api/health/ready"
+READY_TIMEOUT=${READY_TIMEOUT:-60}
 
-if ! kill -0 $BACKEND_PID 2>/dev/null; then
-    echo "Backend failed to start at initialization, exiting"
-    exit 1
-fi
+echo "Waiting for backend to become ready..."
+STARTED_AT=$(date +%s)
+until wget -q -O /dev/null "$READY_URL" 2>/dev/null; do
+    if ! kill -0 $BACKEND_PID 2>/dev/null; then
+        echo "Backend failed to start at initialization, exiting"
+        exit 1
+    fi
+    if [ $(( $(date +%s) - STARTED_AT )) -ge "$READY_TIMEOUT" ]; then
+        echo "Backend not ready after ${READY_TIMEOUT}s, exiting"
+        kill $BACKEND_PID
+        exit 1
+    fi
+    sleep 0.2
+done
+echo "Backend ready after $(( $(date +%s) - STARTED_AT ))s"
 
 # Start Nginx
 nginx -g 'daemon off;' &
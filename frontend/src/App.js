@@ -114,6 +114,19 @@ const ResumePreview = ({ resumeData, template }) => (
   </div>
 );
 
+const JOB_POLL_INTERVAL_MS = 500;
+
+// Resume generation runs as a background job; poll it until it finishes
+const waitForJob = async (jobId) => {
+  while (true) {
+    const response = await axios.get(`${API}/jobs/${jobId}`);
+    if (response.data.status === 'succeeded' || response.data.status === 'failed') {
+      return response.data;
+    }
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+  }
+};
+
 function App() {
   const [currentStep, setCurrentStep] = useState('connect'); // connect, templates, preview
   const [loading, setLoading] = useState(false);
@@ -135,7 +148,11 @@ function App() {
       // Clean URL
       window.history.replaceState({}, document.title, window.location.pathname);
     } else if (errorParam) {
-      setError('Failed to connect with LinkedIn. Please try again.');
+      setError(errorParam === 'unavailable'
+        ? 'LinkedIn is not responding right now. Please try again in a minute.'
+        : errorParam === 'state'
+          ? 'That LinkedIn sign-in link has expired. Please connect again.'
+          : 'Failed to connect with LinkedIn. Please try again.');
       setCurrentStep('connect');
     }
   }, []);
@@ -172,7 +189,12 @@ function App() {
   const handleLinkedInConnect = async () => {
     try {
       setLoading(true);
-      const response = await axios.get(`${API}/auth/linkedin`);
+      // The session cookie from an earlier login lets a still-valid token be reused without a redirect
+      const response = await axios.get(`${API}/auth/linkedin`, { withCredentials: true });
+      if (response.data.reused_token) {
+        await fetchProfile(response.data.user_id);
+        return;
+      }
       window.location.href = response.data.auth_url;
     } catch (error) {
       console.error('Error initiating LinkedIn connection:', error);
@@ -190,8 +212,13 @@ function App() {
 
     try {
       setLoading(true);
-      const response = await axios.post(`${API}/generate-resume?user_id=${profile.user_id}&template_id=${selectedTemplate.id}`);
-      setGeneratedResume(response.data.data);
+      // The preview renders from the profile already loaded here, so only ids are needed back
+      const response = await axios.post(`${API}/generate-resume?user_id=${profile.user_id}&template_id=${selectedTemplate.id}&slim=true`);
+      const job = await waitForJob(response.data.job_id);
+      if (job.status !== 'succeeded') {
+        throw new Error(job.error || 'Resume generation failed');
+      }
+      setGeneratedResume({ id: job.result.resume_id, template_id: job.result.template_id, profile });
       setCurrentStep('preview');
     } catch (error) {
       console.error('Error generating resume:', error);
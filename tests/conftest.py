@@ -0,0 +1,32 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# The backend modules import each other as top-level modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+
+@pytest.fixture(scope="session")
+def server(tmp_path_factory):
+    """The API module, backed by the embedded SQLite storage in a scratch directory"""
+    directory = tmp_path_factory.mktemp("server")
+    # Read once, when the module is first imported
+    os.environ.update(
+        STORAGE_BACKEND="sqlite",
+        SQLITE_PATH=str(directory / "resume_builder.db"),
+        ARTIFACT_CACHE_DIR=str(directory / "artifacts"),
+        IMAGE_CACHE_DIR=str(directory / "images"),
+    )
+    import server
+
+    return server
+
+
+@pytest.fixture(scope="session")
+def api(server):
+    """A client for the app, started once: the module's queues and caches are process-wide"""
+    with TestClient(server.app) as client:
+        yield client
@@ -0,0 +1,136 @@
+import asyncio
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import artifact_cache
+from artifact_cache import ArtifactCache, artifact_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=time.time())
+    monkeypatch.setattr(artifact_cache, "time", SimpleNamespace(monotonic=lambda: clock.now, time=lambda: clock.now))
+    return clock
+
+
+def make_cache(tmp_path, **kwargs) -> ArtifactCache:
+    cache = ArtifactCache(tmp_path / "artifacts", **kwargs)
+    cache.load()
+    return cache
+
+
+def age(cache: ArtifactCache, key: str, kind: str, mtime: float):
+    os.utime(cache._path(key, kind), (mtime, mtime))
+
+
+def test_artifact_key_follows_render_fields_and_template():
+    profile = {"user_id": "ada", "first_name": "Ada", "skills": ["python"]}
+    key = artifact_key(profile, "modern")
+    assert artifact_key(dict(profile), "modern") == key
+    # Fields the templates do not read leave the key alone
+    assert artifact_key({**profile, "updated_at": "now"}, "modern") == key
+    assert artifact_key({**profile, "first_name": "Grace"}, "modern") != key
+    assert artifact_key(profile, "classic") != key
+
+
+def test_memory_disk_and_miss(tmp_path):
+    async def scenario():
+        cache = make_cache(tmp_path, memory_items=1)
+        await cache.put("a" * 64, "html", b"first")
+        await cache.put("b" * 64, "html", b"second")
+        return cache, [
+            await cache.get("b" * 64, "html"),
+            # Pushed out of memory by the second entry, still on disk
+            await cache.get("a" * 64, "html"),
+            await cache.get("c" * 64, "html"),
+            await cache.get("a" * 64, "pdf"),
+        ]
+
+    cache, results = asyncio.run(scenario())
+    assert results == [b"second", b"first", None, None]
+    stats = cache.snapshot()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (1, 1, 2)
+    assert stats["memory_evictions"] == 2
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_workers_share_the_disk_tier(tmp_path):
+    async def scenario():
+        writer, reader = make_cache(tmp_path), make_cache(tmp_path)
+        await writer.put("a" * 64, "pdf", b"%PDF")
+        return await reader.get("a" * 64, "pdf"), reader.snapshot()["disk_hits"]
+
+    assert asyncio.run(scenario()) == (b"%PDF", 1)
+
+
+def test_disk_stats_follow_writes_between_scans(tmp_path):
+    async def scenario():
+        cache = make_cache(tmp_path, disk_max_bytes=1 << 20)
+        await cache.put("a" * 64, "html", b"12345")
+        await cache.put("b" * 64, "html", b"123")
+        # Rewriting an entry replaces its file
+        await cache.put("a" * 64, "html", b"1234567")
+        return cache.snapshot()
+
+    stats = asyncio.run(scenario())
+    assert (stats["disk_entries"], stats["disk_bytes"]) == (2, 10)
+    assert stats["writes"] == 3
+
+
+def test_least_recently_used_files_are_evicted(tmp_path):
+    async def scenario():
+        # Scans after every write; room for three 10-byte files
+        cache = make_cache(tmp_path, memory_items=0, disk_max_bytes=30, scan_fraction=0.01)
+        for n, key in enumerate(["a", "b", "c"]):
+            await cache.put(key * 64, "html", bytes(10))
+            age(cache, key * 64, "html", 100 + n)
+        # Reading "a" makes it the most recent; "b" is now the oldest
+        assert await cache.get("a" * 64, "html") is not None
+        await cache.put("d" * 64, "html", bytes(10))
+        return cache, [await cache.get(key * 64, "html") is not None for key in "abcd"]
+
+    cache, present = asyncio.run(scenario())
+    assert present == [True, False, True, True]
+    stats = cache.snapshot()
+    assert stats["disk_evictions"] == 1
+    assert (stats["disk_entries"], stats["disk_bytes"]) == (3, 30)
+
+
+def test_memory_hits_refresh_the_file_mtime_at_most_once_per_interval(tmp_path, clock):
+    async def scenario():
+        cache = make_cache(tmp_path, touch_interval=60)
+        key = "a" * 64
+        await cache.put(key, "html", b"hot")
+        path = cache._path(key, "html")
+        age(cache, key, "html", 1)
+
+        clock.now += 30
+        await cache.get(key, "html")
+        throttled = path.stat().st_mtime
+        clock.now += 30
+        await cache.get(key, "html")
+        return throttled, path.stat().st_mtime, cache.snapshot()["memory_hits"]
+
+    throttled, touched, memory_hits = asyncio.run(scenario())
+    assert throttled == 1
+    assert touched > 1
+    assert memory_hits == 2
+
+
+def test_stale_temporary_files_are_removed(tmp_path, clock):
+    cache = make_cache(tmp_path)
+    shard = cache.directory / "aa"
+    shard.mkdir()
+    stale, fresh = shard / "stale.tmp", shard / "fresh.tmp"
+    stale.write_bytes(b"partial")
+    fresh.write_bytes(b"partial")
+    os.utime(stale, (clock.now - 7200, clock.now - 7200))
+    os.utime(fresh, (clock.now - 60, clock.now - 60))
+
+    cache._scan_and_evict()
+    assert not stale.exists()
+    assert fresh.exists()
+    assert cache.snapshot()["disk_entries"] == 0
@@ -0,0 +1,76 @@
+import json
+import uuid
+from collections import Counter
+
+
+def create_profile(api, **fields) -> str:
+    user_id = f"bulk-{uuid.uuid4().hex[:8]}"
+    response = api.post("/api/test-create-profile", json={
+        "user_id": user_id, "first_name": "Ada", "last_name": "Lovelace", **fields
+    })
+    assert response.status_code == 201
+    return user_id
+
+
+def bulk(api, items):
+    response = api.post("/api/generate-resume/bulk", json={"items": items})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_every_item_gets_one_result_line(api, server, monkeypatch):
+    # Several insert batches per request
+    monkeypatch.setattr(server, "BULK_INSERT_BATCH", 2)
+    ada, bob = create_profile(api, skills=["python"]), create_profile(api, last_name="Bobson")
+    items = [
+        {"user_id": ada, "template_id": "modern"},
+        {"user_id": ada, "template_id": "classic"},
+        {"user_id": bob, "template_id": "modern"},
+        {"user_id": ada, "template_id": "modern"},
+        {"user_id": "bulk-missing", "template_id": "modern"},
+        {"user_id": bob, "template_id": "nosuch"},
+    ]
+    results = bulk(api, items)
+
+    assert Counter((r["user_id"], r["template_id"]) for r in results) == Counter(
+        (item["user_id"], item["template_id"]) for item in items
+    )
+    by_status = Counter(result["status"] for result in results)
+    assert by_status == {"created": 3, "existing": 1, "error": 2}
+    created = {(r["user_id"], r["template_id"]): r["resume_id"] for r in results if r["status"] == "created"}
+    # The repeated pair points at the resume created for its first occurrence
+    repeat = next(r for r in results if r["status"] == "existing")
+    assert repeat["resume_id"] == created[(ada, "modern")]
+    assert {r["detail"] for r in results if r["status"] == "error"} == {"Profile not found", "Template not found"}
+    assert not any("resume" in result for result in results)
+
+    for resume_id in created.values():
+        assert api.get(f"/api/resumes/{resume_id}/html").status_code == 200
+    # One profile version per user, shared by that user's resumes
+    assert [version["version"] for version in api.get(f"/api/profile/{ada}/versions").json()] == [1]
+
+
+def test_unchanged_profiles_reuse_their_resumes(api):
+    ada = create_profile(api, headline="Analyst")
+    items = [{"user_id": ada, "template_id": template_id} for template_id in ("modern", "elegant")]
+    first = {r["template_id"]: r["resume_id"] for r in bulk(api, items)}
+
+    again = bulk(api, items)
+    assert {r["status"] for r in again} == {"existing"}
+    assert {r["template_id"]: r["resume_id"] for r in again} == first
+
+    # A change the templates render makes new resumes and a new version
+    api.post("/api/test-create-profile", json={
+        "user_id": ada, "first_name": "Ada", "last_name": "Lovelace", "headline": "Engineer"
+    })
+    changed = bulk(api, items)
+    assert {r["status"] for r in changed} == {"created"}
+    assert len(api.get(f"/api/profile/{ada}/versions").json()) == 2
+
+
+def test_request_limits(api, server, monkeypatch):
+    assert api.post("/api/generate-resume/bulk", json={"items": []}).status_code == 400
+    monkeypatch.setattr(server, "BULK_MAX_ITEMS", 2)
+    items = [{"user_id": "bulk-any", "template_id": "modern"}] * 3
+    assert api.post("/api/generate-resume/bulk", json={"items": items}).status_code == 413
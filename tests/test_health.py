@@ -0,0 +1,45 @@
+import asyncio
+
+
+def test_liveness_answers_while_the_loop_runs(api):
+    assert api.get("/api/health/live").json() == {"status": "ok"}
+
+
+def test_ready_once_storage_indexes_and_templates_are(api):
+    response = api.get("/api/health/ready")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ready"
+    assert body["checks"] == {"database": True, "indexes": True, "templates": True}
+    assert body["upstreams"]["linkedin"]["state"] == "closed"
+    assert isinstance(body["jobs"]["dead_letters"], int)
+
+
+def test_not_ready_when_the_database_fails_or_hangs(api, server, monkeypatch):
+    async def failing():
+        raise ConnectionError("database is down")
+
+    async def hanging():
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(server, "HEALTH_CHECK_TIMEOUT", 0.05)
+    for ping in (failing, hanging):
+        monkeypatch.setattr(server.storage, "ping", ping)
+        response = api.get("/api/health/ready")
+        assert response.status_code == 503
+        assert response.json()["status"] == "not_ready"
+        assert response.json()["checks"]["database"] is False
+
+
+def test_not_ready_until_startup_finishes(api, server, monkeypatch):
+    monkeypatch.setattr(server.app.state, "templates_ready", False)
+    response = api.get("/api/health/ready")
+    assert response.status_code == 503
+    assert response.json()["checks"]["templates"] is False
+
+
+def test_metrics_are_scraped_outside_the_api_prefix(api):
+    api.get("/api/health/live")
+    response = api.get("/metrics")
+    assert response.status_code == 200
+    assert b'route="/api/health/live"' in response.content
@@ -0,0 +1,117 @@
+import asyncio
+import io
+import struct
+import zlib
+
+import pytest
+from PIL import Image
+
+from artifact_cache import ArtifactCache
+from image_proxy import IMAGE_SIZES, ImageFetchError, ImageNotAllowed, ImageProxy, encode_thumbnails, etag_matches
+
+
+def png(width: int, height: int, mode: str = "RGB") -> bytes:
+    buffer = io.BytesIO()
+    Image.new(mode, (width, height), (255, 0, 0, 128)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def png_header(width: int, height: int) -> bytes:
+    """A PNG that declares its size but has no pixel data"""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", ihdr) + chunk(b"IEND", b"")
+
+
+@pytest.mark.parametrize("header, matches", [
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"zzz", W/"abc"', True),
+    ('"zzz","abc"', True),
+    ("*", True),
+    (' * ', True),
+    ('"zzz"', False),
+    ('"ab"', False),
+    ('"abc, def"', False),
+    ("abc", False),
+    ("", False),
+    (None, False),
+])
+def test_etag_matching(header, matches):
+    assert etag_matches(header, '"abc"') is matches
+
+
+def test_thumbnails_fit_the_box_in_every_format():
+    encoded = encode_thumbnails(png(800, 300), "photo")
+    assert set(encoded) == {"webp", "jpeg"}
+    for fmt, data in encoded.items():
+        with Image.open(io.BytesIO(data)) as image:
+            assert image.format == fmt.upper()
+            assert image.size == IMAGE_SIZES["photo"]
+
+
+def test_transparent_images_are_flattened_for_jpeg():
+    encoded = encode_thumbnails(png(300, 300, "RGBA"), "preview")
+    with Image.open(io.BytesIO(encoded["jpeg"])) as image:
+        assert image.mode == "RGB"
+    with Image.open(io.BytesIO(encoded["webp"])) as image:
+        assert image.mode == "RGBA"
+
+
+def test_oversized_images_are_refused_before_decoding():
+    limit = Image.MAX_IMAGE_PIXELS
+    with pytest.raises(ValueError, match="pixels"):
+        encode_thumbnails(png_header(10_000, 5_000), "photo")
+    # Pillow's process-wide limit is left alone
+    assert Image.MAX_IMAGE_PIXELS == limit
+
+
+def test_only_https_urls_on_allowed_hosts(tmp_path):
+    proxy = ImageProxy(ArtifactCache(tmp_path), ["media.licdn.com", " images.pexels.com "])
+    assert proxy.allowed("https://media.licdn.com/a.jpg")
+    assert proxy.allowed("https://cdn.media.licdn.com/a.jpg")
+    assert proxy.allowed("https://IMAGES.PEXELS.COM/b.png")
+    assert not proxy.allowed("http://media.licdn.com/a.jpg")
+    assert not proxy.allowed("https://evil-media.licdn.com.example/a.jpg")
+    assert not proxy.allowed("https://notmedia.licdn.com.evil/a.jpg")
+    assert not proxy.allowed(None)
+    with pytest.raises(ImageNotAllowed):
+        asyncio.run(proxy.get("https://example.com/a.jpg", "photo", "jpeg"))
+
+
+def test_concurrent_misses_share_one_fetch(tmp_path):
+    cache = ArtifactCache(tmp_path)
+    cache.load()
+    proxy = ImageProxy(cache, ["media.licdn.com"])
+    fetches = []
+
+    async def fetch(url):
+        fetches.append(url)
+        await asyncio.sleep(0.01)
+        return png(400, 400)
+
+    proxy._fetch = fetch
+    url = "https://media.licdn.com/a.jpg"
+
+    async def scenario():
+        first = await asyncio.gather(*(proxy.get(url, "photo", fmt) for fmt in ("jpeg", "webp", "jpeg")))
+        # Served from the cache from now on
+        return first, await proxy.get(url, "photo", "webp")
+
+    (jpeg, webp, jpeg_again), cached = asyncio.run(scenario())
+    assert fetches == [url]
+    assert jpeg == jpeg_again
+    assert cached == webp
+
+
+def test_undecodable_images_raise_fetch_errors(tmp_path):
+    proxy = ImageProxy(ArtifactCache(tmp_path), ["media.licdn.com"])
+
+    async def fetch(url):
+        return b"not an image"
+
+    proxy._fetch = fetch
+    with pytest.raises(ImageFetchError):
+        asyncio.run(proxy.get("https://media.licdn.com/a.jpg", "photo", "jpeg"))
@@ -0,0 +1,60 @@
+import asyncio
+
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+from indexes import INDEXES, ensure_indexes
+from storage.sqlite import SQLiteStorage
+
+
+class Collection:
+    def __init__(self, error=None):
+        self.error = error
+        self.created = []
+
+    async def create_indexes(self, models):
+        if self.error is not None:
+            raise self.error
+        self.created.extend(model.document["name"] for model in models)
+
+
+class Database(dict):
+    def __missing__(self, name):
+        self[name] = Collection()
+        return self[name]
+
+
+def test_every_declared_index_is_created():
+    db = Database()
+    assert asyncio.run(ensure_indexes(db)) is True
+    assert {name: collection.created for name, collection in db.items()} == {
+        name: [model.document["name"] for model in models] for name, models in INDEXES.items()
+    }
+    assert "user_id_unique" in db["linkedin_profiles"].created
+
+
+def test_failed_indexes_are_reported_without_stopping_the_others():
+    db = Database(
+        linkedin_profiles=Collection(DuplicateKeyError("E11000 duplicate key")),
+        status_checks=Collection(OperationFailure("not authorized")),
+    )
+    assert asyncio.run(ensure_indexes(db)) is False
+    assert db["resumes"].created and db["resume_versions"].created
+
+
+def test_profile_upsert_sets_defaults_only_on_insert(tmp_path):
+    async def scenario():
+        storage = SQLiteStorage(str(tmp_path / "profiles.db"))
+        await storage.start()
+        try:
+            await storage.profiles.upsert("ada", {"first_name": "Ada"}, {"id": "first", "skills": ["python"]})
+            created = await storage.profiles.get("ada")
+            await storage.profiles.upsert("ada", {"first_name": "Augusta"}, {"id": "second", "skills": []})
+            return created, await storage.profiles.get("ada"), await storage.profiles.get_many(["ada", "bob"])
+        finally:
+            await storage.close()
+
+    created, updated, profiles = asyncio.run(scenario())
+    assert (created["id"], created["first_name"], created["skills"]) == ("first", "Ada", ["python"])
+    # A second login updates the synced fields and keeps everything else
+    assert (updated["id"], updated["first_name"], updated["skills"]) == ("first", "Augusta", ["python"])
+    assert [profile["user_id"] for profile in profiles] == ["ada"]
@@ -0,0 +1,225 @@
+import asyncio
+import os
+import types
+import uuid
+
+import pytest
+
+import jobs
+from jobs import FAILED, QUEUED, RETRYING, RUNNING, SUCCEEDED, InMemoryJobBackend, JobQueue, PermanentJobError
+
+
+REDIS_URL = os.environ.get("TEST_REDIS_URL", "redis://localhost:6379/15")
+
+
+async def finished(queue: JobQueue, job_id: str, timeout: float = 5.0):
+    """Collect every state the job passes through until it finishes"""
+    # Iterated in this task, not wrapped in one, so the subscription is made
+    # before the worker gets to run
+    return [job async for job in queue.events(job_id, keepalive=0.05, max_wait=timeout) if job is not None]
+
+
+def run(handler, **kwargs):
+    """Enqueue one job on a fresh in-memory queue and wait for it to finish"""
+
+    async def scenario():
+        queue = JobQueue(InMemoryJobBackend(), workers=1, retry_backoff=0, **kwargs)
+        queue.register("work", handler)
+        await queue.start()
+        try:
+            job = await queue.enqueue("work", {"n": 1})
+            states = await finished(queue, job["id"])
+            return queue, states, await queue.dead_letters()
+        finally:
+            await queue.close()
+
+    return asyncio.run(scenario())
+
+
+def test_failed_attempts_are_retried():
+    calls = []
+
+    async def flaky(params, progress):
+        calls.append(params)
+        if len(calls) < 3:
+            raise RuntimeError("upstream hiccup")
+        return {"ok": True}
+
+    _, states, dead = run(flaky, max_attempts=3)
+    assert len(calls) == 3
+    assert [state["status"] for state in states if state["status"] != RUNNING] == [
+        QUEUED, RETRYING, RETRYING, SUCCEEDED
+    ]
+    assert states[-1]["attempts"] == 3
+    assert states[-1]["result"] == {"ok": True}
+    assert states[-1]["error"] is None
+    assert dead == []
+
+
+def test_exhausted_jobs_are_dead_lettered_and_can_be_replayed():
+    calls = []
+
+    async def broken(params, progress):
+        calls.append(params)
+        if len(calls) <= 2:
+            raise RuntimeError("still broken")
+        return "fixed"
+
+    async def scenario():
+        queue = JobQueue(InMemoryJobBackend(), workers=1, max_attempts=2, retry_backoff=0)
+        queue.register("work", broken)
+        await queue.start()
+        try:
+            job = await queue.enqueue("work", {})
+            failed = (await finished(queue, job["id"]))[-1]
+            buried = (await queue.dead_letter_size(), await queue.dead_letters())
+
+            replayed = await queue.replay(job["id"])
+            succeeded = (await finished(queue, job["id"]))[-1]
+            return failed, buried, replayed, succeeded, await queue.dead_letter_size(), await queue.replay(job["id"])
+        finally:
+            await queue.close()
+
+    failed, (size, dead), replayed, succeeded, size_after, replayed_twice = asyncio.run(scenario())
+    assert failed["status"] == FAILED
+    assert failed["attempts"] == 2
+    assert failed["error"] == "still broken"
+    assert size == 1
+    assert [job["id"] for job in dead] == [failed["id"]]
+
+    assert replayed["status"] == QUEUED
+    assert replayed["attempts"] == 0
+    assert succeeded["status"] == SUCCEEDED
+    assert succeeded["attempts"] == 1
+    assert succeeded["result"] == "fixed"
+    assert size_after == 0
+    assert replayed_twice is None
+
+
+def test_permanent_errors_are_not_retried():
+    calls = []
+
+    async def invalid(params, progress):
+        calls.append(params)
+        raise PermanentJobError("profile not found")
+
+    _, states, dead = run(invalid, max_attempts=3)
+    assert len(calls) == 1
+    assert states[-1]["status"] == FAILED
+    assert states[-1]["error"] == "profile not found"
+    assert dead == []
+
+
+def test_events_stream_progress_until_the_job_finishes():
+    async def steps(params, progress):
+        for step in ("loading", "rendering", "persisting"):
+            await progress(step)
+        return "done"
+
+    _, states, _ = run(steps)
+    assert [state["progress"] for state in states if state["status"] == RUNNING] == [
+        None, "loading", "rendering", "persisting"
+    ]
+    assert states[-1]["status"] == SUCCEEDED
+
+
+def test_events_send_keep_alives_and_stop_at_max_wait():
+    async def scenario():
+        backend = InMemoryJobBackend()
+        queue = JobQueue(backend)
+        job = jobs.new_job("work", {})
+        await backend.save(job)
+        return [update async for update in queue.events(job["id"], keepalive=0.02, max_wait=0.1)]
+
+    updates = asyncio.run(scenario())
+    assert updates[0]["status"] == QUEUED
+    assert len(updates) > 1
+    assert all(update is None for update in updates[1:])
+
+
+def test_finished_jobs_expire_after_the_ttl(monkeypatch):
+    clock = types.SimpleNamespace(now=0.0)
+    monkeypatch.setattr(jobs, "time", types.SimpleNamespace(monotonic=lambda: clock.now))
+
+    async def scenario():
+        backend = InMemoryJobBackend(ttl=10)
+        done, pending = jobs.new_job("work", {}), jobs.new_job("work", {})
+        done["status"], pending["status"] = SUCCEEDED, RUNNING
+        await backend.save(done)
+        await backend.save(pending)
+
+        clock.now = 11
+        await backend.save(jobs.new_job("work", {}))
+        # An unfinished job outlives its ttl; a finished one does not
+        return await backend.get(done["id"]), await backend.get(pending["id"])
+
+    expired, kept = asyncio.run(scenario())
+    assert expired is None
+    assert kept["status"] == RUNNING
+
+
+def test_dead_letter_list_is_bounded():
+    async def scenario():
+        backend = InMemoryJobBackend(max_dead_letter=2)
+        buried = [jobs.new_job("work", {}) for _ in range(3)]
+        for job in buried:
+            await backend.bury(job)
+        return buried, await backend.dead_letters(10), await backend.take_dead_letter(buried[0]["id"])
+
+    buried, dead, oldest = asyncio.run(scenario())
+    assert [job["id"] for job in dead] == [buried[2]["id"], buried[1]["id"]]
+    assert oldest is None
+
+
+def redis_available() -> bool:
+    try:
+        import redis
+    except ImportError:
+        return False
+    try:
+        return redis.Redis.from_url(REDIS_URL, socket_connect_timeout=0.5).ping()
+    except redis.RedisError:
+        return False
+
+
+@pytest.mark.skipif(not redis_available(), reason=f"no Redis server at {REDIS_URL}")
+def test_redis_requeues_the_jobs_of_a_consumer_that_stopped_beating():
+    import redis.asyncio as aioredis
+
+    async def scenario():
+        prefix = f"test-jobs:{uuid.uuid4().hex}:"
+        crashed = jobs.RedisJobBackend(REDIS_URL, prefix=prefix, heartbeat_interval=0.05)
+        survivor = jobs.RedisJobBackend(REDIS_URL, prefix=prefix, heartbeat_interval=0.05)
+        await crashed.start()
+        await survivor.start()
+        try:
+            job = jobs.new_job("work", {})
+            await crashed.save(job)
+            await crashed.push(job["id"])
+            assert await crashed.pop() == job["id"]
+
+            # Stop beating without closing, as a killed process would; the
+            # survivor's heartbeat requeues the job once the alive key lapses
+            crashed._heartbeat.cancel()
+            requeued = await asyncio.wait_for(survivor.pop(), 5)
+            # The consumer is deregistered just after its jobs are moved
+            for _ in range(50):
+                consumers = {consumer.decode() for consumer in await survivor.redis.smembers(f"{prefix}consumers")}
+                if crashed.consumer not in consumers:
+                    break
+                await asyncio.sleep(0.01)
+            orphaned = await survivor.redis.llen(f"{prefix}processing:{crashed.consumer}")
+            return job["id"], requeued, consumers, orphaned, survivor.consumer
+        finally:
+            await crashed.redis.close()
+            await survivor.close()
+            client = aioredis.from_url(REDIS_URL)
+            keys = await client.keys(f"{prefix}*")
+            if keys:
+                await client.delete(*keys)
+            await client.close()
+
+    job_id, requeued, consumers, orphaned, survivor = asyncio.run(scenario())
+    assert requeued == job_id
+    assert consumers == {survivor}
+    assert orphaned == 0
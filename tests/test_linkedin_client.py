@@ -0,0 +1,132 @@
+import asyncio
+from typing import Callable, List
+
+import httpx
+import pytest
+
+from linkedin_client import LinkedInAPIError, LinkedInClient, LinkedInUnavailable
+
+
+PROFILE = {"localizedFirstName": "Ada", "localizedLastName": "Lovelace"}
+EMAIL = {"elements": [{"handle~": {"emailAddress": "ada@example.com"}}]}
+
+
+def make_client(handler: Callable[[httpx.Request], httpx.Response], **kwargs) -> LinkedInClient:
+    client = LinkedInClient("id", "secret", "https://app.example/callback", retry_backoff=0, **kwargs)
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+def run(client: LinkedInClient, call):
+    async def scenario():
+        try:
+            return await call(client)
+        finally:
+            await client.close()
+
+    return asyncio.run(scenario())
+
+
+def answers(*responses) -> Callable[[httpx.Request], httpx.Response]:
+    """Handler replaying ``responses`` in order; exceptions are raised"""
+    pending: List = list(responses)
+
+    def handler(request):
+        response = pending.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    handler.pending = pending
+    return handler
+
+
+def test_profile_and_email_are_fetched_together():
+    seen = []
+
+    def handler(request):
+        seen.append((request.url.path, request.headers["authorization"]))
+        return httpx.Response(200, json=EMAIL if request.url.path.endswith("emailAddress") else PROFILE)
+
+    profile, email = run(make_client(handler), lambda client: client.fetch_profile("token"))
+    assert profile == PROFILE
+    assert email == "ada@example.com"
+    assert sorted(seen) == [("/v2/emailAddress", "Bearer token"), ("/v2/me", "Bearer token")]
+
+
+def test_a_failed_email_lookup_leaves_the_email_empty():
+    def handler(request):
+        if request.url.path.endswith("emailAddress"):
+            return httpx.Response(403)
+        return httpx.Response(200, json=PROFILE)
+
+    assert run(make_client(handler), lambda client: client.fetch_profile("token")) == (PROFILE, None)
+
+
+def test_a_failed_profile_call_raises():
+    with pytest.raises(LinkedInAPIError) as error:
+        run(make_client(lambda request: httpx.Response(401)), lambda client: client.fetch_profile("token"))
+    assert error.value.status_code == 401
+
+
+def test_transient_failures_of_reads_are_retried():
+    handler = answers(
+        httpx.ConnectError("refused"),
+        httpx.Response(503),
+        httpx.Response(200, json=PROFILE),
+    )
+    response = run(make_client(handler), lambda client: client._request("profile", "GET", "https://api.example/me"))
+    assert response.status_code == 200
+    assert handler.pending == []
+
+
+@pytest.mark.parametrize("first, retried", [
+    (httpx.Response(503), True),
+    (httpx.Response(500), False),
+    (httpx.ConnectError("refused"), True),
+    (httpx.ReadTimeout("no answer"), False),
+])
+def test_code_exchange_is_only_retried_when_linkedin_did_not_process_it(first, retried):
+    handler = answers(first, httpx.Response(200, json={"access_token": "t"}))
+    client = make_client(handler)
+    if retried:
+        assert run(client, lambda client: client.exchange_code("code")) == {"access_token": "t"}
+    else:
+        with pytest.raises((LinkedInAPIError, httpx.ReadTimeout)):
+            run(client, lambda client: client.exchange_code("code"))
+        assert len(handler.pending) == 1
+
+
+def test_calls_beyond_the_concurrency_limit_fail_fast():
+    release = asyncio.Event()
+
+    async def slow(request):
+        await release.wait()
+        return httpx.Response(200, json=PROFILE)
+
+    client = make_client(slow, max_concurrency=1, acquire_timeout=0.05)
+
+    async def call(client):
+        first = asyncio.create_task(client._request("profile", "GET", "https://api.example/me"))
+        await asyncio.sleep(0)
+        with pytest.raises(LinkedInUnavailable):
+            await client._request("profile", "GET", "https://api.example/me")
+        release.set()
+        return await first
+
+    assert run(client, call).status_code == 200
+
+
+def test_open_circuit_fails_calls_without_reaching_linkedin():
+    handler = answers(*[httpx.Response(500)] * 2)
+    client = make_client(handler, max_attempts=1, breaker_threshold=2)
+
+    async def call(client):
+        for _ in range(2):
+            assert (await client._request("profile", "GET", "https://api.example/me")).status_code == 500
+        with pytest.raises(LinkedInUnavailable) as error:
+            await client._request("profile", "GET", "https://api.example/me")
+        return error.value
+
+    assert run(client, call).retry_after > 0
+    assert client.breaker.snapshot()["state"] == "open"
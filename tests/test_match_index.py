@@ -0,0 +1,128 @@
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+
+from match_index import KNOWN_SKILLS, MatchIndex, extract_skills, normalize_skill
+
+
+def profile(user_id: str, **fields) -> Dict[str, Any]:
+    return {"user_id": user_id, **fields}
+
+
+def ranked(index: MatchIndex, description: str, **kwargs) -> List[str]:
+    return [match["user_id"] for match in index.match(description, **kwargs)[2]]
+
+
+@pytest.fixture
+def index() -> MatchIndex:
+    index = MatchIndex(initial_capacity=4)
+    for document in [
+        profile("ada", skills=["Python", "k8s", "PostgreSQL"]),
+        profile("bob", skills=["python"], experience=[{"description": "Ran Kubernetes clusters on AWS"}]),
+        profile("cy", skills=["Java", "Spring"]),
+        profile("di", skills=["python", "pandas"]),
+    ]:
+        index.update(document)
+    return index
+
+
+def test_aliases_map_to_one_term():
+    assert normalize_skill("K8s") == "kubernetes"
+    assert normalize_skill("Postgres") == normalize_skill("psql") == "postgresql"
+    assert normalize_skill("Node.js") == normalize_skill("nodejs") == "node.js"
+    assert normalize_skill("Machine  Learning") == "machine learning"
+
+
+def test_longest_phrase_wins_in_free_text():
+    found = extract_skills("Machine learning with scikit learn, deployed on k8s. Also machine learning.", KNOWN_SKILLS)
+    assert found == {"machine learning": 2, "scikit-learn": 1, "kubernetes": 1}
+
+
+def test_ambiguous_names_need_an_alias_in_free_text():
+    vocabulary = KNOWN_SKILLS | {"go", "excel"}
+    assert extract_skills("Ready to go and excel at teamwork", vocabulary) == {}
+    assert extract_skills("Services in golang", vocabulary) == {"go": 1}
+    # Listed skills are taken as written
+    index = MatchIndex()
+    index.update(profile("ed", skills=["Go", "Excel"]))
+    assert index.profile_vector(profile("ed", skills=["Go", "Excel"])) == {"go": 1.0, "excel": 1.0}
+    assert index.job_terms("Golang developer, ready to go") == ["go"]
+
+
+def test_experience_mentions_add_to_listed_skills(index):
+    weights = index.profile_vector(profile("x", skills=["python"], experience=[
+        {"title": "Engineer", "description": "Python and Docker, more Python"}, "Docker in production",
+    ]))
+    assert weights["python"] > 1.0
+    assert weights["docker"] > 0.5
+    assert set(weights) == {"python", "docker"}
+
+
+def test_profiles_are_ranked_by_overlap(index):
+    terms, total, matches = index.match("Python engineer with Kubernetes and Postgres")
+    assert terms == ["kubernetes", "postgresql", "python"]
+    assert total == 3
+    assert [match["user_id"] for match in matches][0] == "ada"
+    assert matches[0]["matched_skills"] == ["kubernetes", "postgresql", "python"]
+    assert all(0 < match["score"] <= 1 for match in matches)
+    # Scores are in decreasing order
+    assert [match["score"] for match in matches] == sorted((match["score"] for match in matches), reverse=True)
+
+
+def test_rare_skills_count_for_more(index):
+    # Everybody but cy lists python; only bob knows AWS
+    scores = {match["user_id"]: match["score"] for match in index.match("python and aws")[2]}
+    assert ranked(index, "python and aws")[0] == "bob"
+    assert scores["bob"] > scores["di"]
+
+
+def test_pages_filters_and_thresholds(index):
+    everyone = ranked(index, "python kubernetes postgresql pandas")
+    assert ranked(index, "python kubernetes postgresql pandas", offset=1, limit=2) == everyone[1:3]
+    assert ranked(index, "python kubernetes postgresql pandas", user_ids=["di", "cy", "nobody"]) == ["di"]
+    _, total, matches = index.match("python kubernetes postgresql pandas", min_score=0.99)
+    assert total == len(matches) <= 1
+    assert index.match("a job with no known skills") == ([], 0, [])
+
+
+def test_updates_and_removals_replace_vectors(index):
+    index.update(profile("cy", skills=["python", "aws"]))
+    assert "cy" in ranked(index, "aws")
+    index.remove("bob")
+    assert ranked(index, "aws") == ["cy"]
+    assert len(index) == 3
+    # A profile with no skills has no vector
+    index.update(profile("ada"))
+    assert "ada" not in ranked(index, "python")
+    assert len(index) == 2
+
+
+def test_compaction_keeps_the_live_vectors():
+    index = MatchIndex(initial_capacity=4)
+    for round in range(20):
+        for user_id in ("ada", "bob"):
+            index.update(profile(user_id, skills=["python", f"skill{round}"]))
+    # Dead entries were dropped instead of growing the arrays every round
+    assert index._live == 4
+    assert len(index._weights) <= 8
+    assert sorted(ranked(index, "python")) == ["ada", "bob"]
+    assert index.match("python")[2][0]["matched_skills"] == ["python"]
+
+
+def test_build_keeps_updates_made_while_it_runs():
+    index = MatchIndex()
+
+    async def profiles():
+        yield profile("ada", skills=["java"])
+        # A change listener ran after the stored profiles were read
+        index.update(profile("bob", skills=["rust"]))
+        index.remove("cy")
+        yield profile("bob", skills=["python"])
+        yield profile("cy", skills=["python"])
+
+    asyncio.run(index.build(profiles(), yield_every=1))
+    assert index.ready
+    assert ranked(index, "rust") == ["bob"]
+    assert ranked(index, "python") == []
+    assert ranked(index, "java") == ["ada"]
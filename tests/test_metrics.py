@@ -0,0 +1,100 @@
+from types import SimpleNamespace
+
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from metrics import MongoCommandMetrics, PrometheusMiddleware, render_latest
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def mongo_calls(collection: str, command: str) -> float:
+    return sample("mongo_operation_duration_seconds_count", collection=collection, command=command)
+
+
+def event(request_id: int, command_name: str, command=None, database_name: str = "resumes_db"):
+    return SimpleNamespace(
+        request_id=request_id,
+        operation_id=request_id,
+        command_name=command_name,
+        command=command or {},
+        database_name=database_name,
+        duration_micros=1500,
+    )
+
+
+def test_mongo_commands_are_labelled_with_their_collection():
+    listener = MongoCommandMetrics()
+    commands = [
+        ("find", {"find": "metrics_profiles", "filter": {}}, "metrics_profiles"),
+        ("getMore", {"getMore": 1234, "collection": "metrics_profiles"}, "metrics_profiles"),
+        ("killCursors", {"killCursors": "metrics_resumes", "cursors": [1234]}, "metrics_resumes"),
+        # Database commands have no collection
+        ("ping", {"ping": 1}, "metrics_db"),
+    ]
+    before = {command_name: mongo_calls(collection, command_name) for command_name, _, collection in commands}
+
+    for request_id, (command_name, command, _) in enumerate(commands):
+        listener.started(event(request_id, command_name, command, "metrics_db"))
+        listener.succeeded(event(request_id, command_name))
+
+    for command_name, _, collection in commands:
+        assert mongo_calls(collection, command_name) == before[command_name] + 1
+    # Nothing is left behind for finished commands
+    assert listener._inflight == {}
+
+
+def test_failed_mongo_commands_are_counted():
+    listener = MongoCommandMetrics()
+    errors = sample("mongo_operation_errors_total", collection="metrics_failing", command="insert")
+    listener.started(event(99, "insert", {"insert": "metrics_failing"}))
+    listener.failed(event(99, "insert"))
+    assert sample("mongo_operation_errors_total", collection="metrics_failing", command="insert") == errors + 1
+    # A completion without a start is still recorded
+    unknown = mongo_calls("unknown", "update")
+    listener.succeeded(event(100, "update"))
+    assert mongo_calls("unknown", "update") == unknown + 1
+
+
+def test_requests_are_labelled_with_their_route_template():
+    app = FastAPI()
+
+    @app.get("/api/metrics-items/{item_id}")
+    async def item(item_id: str):
+        if item_id == "missing":
+            raise HTTPException(status_code=404)
+        return {"id": item_id}
+
+    @app.get("/outside")
+    async def outside():
+        return {}
+
+    app.add_middleware(PrometheusMiddleware)
+
+    def requests(route: str, status: str) -> float:
+        return sample("http_request_duration_seconds_count", method="GET", route=route, status=status)
+
+    before = (requests("/api/metrics-items/{item_id}", "200"), requests("/api/metrics-items/{item_id}", "404"),
+              requests("unmatched", "404"), requests("/outside", "200"))
+    with TestClient(app) as client:
+        for item_id in ("a", "b", "missing"):
+            client.get(f"/api/metrics-items/{item_id}")
+        client.get("/api/no-such-route")
+        client.get("/outside")
+
+    assert requests("/api/metrics-items/{item_id}", "200") == before[0] + 2
+    assert requests("/api/metrics-items/{item_id}", "404") == before[1] + 1
+    assert requests("unmatched", "404") == before[2] + 1
+    # Only the API prefix is timed
+    assert requests("/outside", "200") == before[3] == 0
+
+
+def test_render_latest_exposes_every_metric():
+    body, content_type = render_latest()
+    assert content_type.startswith("text/plain")
+    for name in ("http_request_duration_seconds", "mongo_operation_duration_seconds",
+                 "linkedin_request_duration_seconds", "linkedin_circuit_state", "event_loop_lag_seconds"):
+        assert f"# TYPE {name}".encode() in body
@@ -0,0 +1,193 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+
+import pytest
+from cryptography.fernet import Fernet
+
+import oauth_store
+from oauth_store import OAuthStore
+from token_cipher import TokenCipher
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+class MemoryTokens:
+    def __init__(self):
+        self.rows: Dict[str, Dict[str, Any]] = {}
+
+    async def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return self.rows.get(user_id)
+
+    async def put(self, user_id: str, token: str, expires_at: datetime):
+        self.rows[user_id] = {"token": token, "expires_at": expires_at}
+
+    async def delete(self, user_id: str):
+        self.rows.pop(user_id, None)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(oauth_store, "time", SimpleNamespace(time=clock.time, monotonic=clock.monotonic))
+    return clock
+
+
+def make_store(keys: Optional[str] = None, **kwargs) -> OAuthStore:
+    storage = SimpleNamespace(tokens=MemoryTokens())
+    return OAuthStore(TokenCipher(keys), storage, state_secret="secret", **kwargs)
+
+
+def test_state_is_single_use(clock):
+    store = make_store()
+
+    async def scenario():
+        state = await store.create_state()
+        return [await store.consume_state(state), await store.consume_state(state)]
+
+    assert asyncio.run(scenario()) == [True, False]
+
+
+def test_state_from_another_worker_with_the_same_secret_is_accepted(clock):
+    async def scenario():
+        state = await make_store().create_state()
+        return await make_store().consume_state(state)
+
+    assert asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("tamper", [
+    lambda state: state[:-1] + ("0" if state[-1] != "0" else "1"),
+    lambda state: "x" + state,
+    lambda state: state.rpartition(".")[0],
+    lambda state: "",
+    lambda state: None,
+])
+def test_forged_states_are_refused(clock, tamper):
+    store = make_store()
+
+    async def scenario():
+        return await store.consume_state(tamper(await store.create_state()))
+
+    assert not asyncio.run(scenario())
+
+
+def test_state_signed_with_another_secret_is_refused(clock):
+    other = OAuthStore(TokenCipher(None), SimpleNamespace(), state_secret="other")
+
+    async def scenario():
+        return await make_store().consume_state(await other.create_state())
+
+    assert not asyncio.run(scenario())
+
+
+def test_state_expires(clock):
+    store = make_store(state_ttl=600)
+
+    async def scenario():
+        fresh, stale = await store.create_state(), await store.create_state()
+        clock.now += 600
+        accepted = await store.consume_state(fresh)
+        clock.now += 1
+        return accepted, await store.consume_state(stale)
+
+    assert asyncio.run(scenario()) == (True, False)
+
+
+def test_consumed_states_are_forgotten_once_expired(clock):
+    store = make_store(state_ttl=600)
+
+    async def scenario():
+        for _ in range(3):
+            await store.consume_state(await store.create_state())
+        clock.now += 300
+        await store.consume_state(await store.create_state())
+        clock.now += 301
+        await store.consume_state(await store.create_state())
+
+    asyncio.run(scenario())
+    assert len(store._consumed) == 2
+
+
+def test_session_round_trip(clock):
+    store = make_store()
+    session = store.issue_session("user/with.dots", max_age=3600)
+    assert store.session_user(session) == "user/with.dots"
+    assert make_store().session_user(session) == "user/with.dots"
+
+
+def test_session_expires(clock):
+    store = make_store()
+    session = store.issue_session("user-1", max_age=60)
+    clock.now += 61
+    assert store.session_user(session) is None
+
+
+@pytest.mark.parametrize("session", [None, "", "user-1", "dXNlci0x.9999999999.0000"])
+def test_forged_sessions_are_refused(clock, session):
+    assert make_store().session_user(session) is None
+
+
+def test_state_is_not_a_valid_session(clock):
+    store = make_store()
+    state = asyncio.run(store.create_state())
+    assert store.session_user(state) is None
+
+
+def test_cipher_round_trip_and_rotation():
+    old, new = Fernet.generate_key().decode(), Fernet.generate_key().decode()
+    ciphertext = TokenCipher(old).encrypt("access-token")
+    assert "access-token" not in ciphertext
+    assert TokenCipher(old).decrypt(ciphertext) == "access-token"
+    # The rotated-in key encrypts; the old one still decrypts what it wrote
+    assert TokenCipher(f"{new}, {old}").decrypt(ciphertext) == "access-token"
+    assert TokenCipher(new).decrypt(TokenCipher(f"{new},{old}").encrypt("t")) == "t"
+    assert TokenCipher(new).decrypt(ciphertext) is None
+
+
+def test_cipher_without_keys_is_disabled():
+    assert not TokenCipher(None).enabled
+    assert not TokenCipher(" , ").enabled
+
+
+def test_tokens_are_stored_encrypted():
+    store = make_store(Fernet.generate_key().decode())
+
+    async def scenario():
+        assert await store.put_token("user-1", "access-token", expires_in=3600)
+        store._tokens.clear()
+        return await store.get_token("user-1")
+
+    assert asyncio.run(scenario()) == "access-token"
+    assert store.storage.tokens.rows["user-1"]["token"] != "access-token"
+
+
+def test_tokens_are_not_kept_without_a_key():
+    store = make_store()
+
+    async def scenario():
+        return await store.put_token("user-1", "access-token", expires_in=3600), await store.get_token("user-1")
+
+    assert asyncio.run(scenario()) == (False, None)
+    assert store.storage.tokens.rows == {}
+
+
+def test_deleted_token_is_gone():
+    store = make_store(Fernet.generate_key().decode())
+
+    async def scenario():
+        await store.put_token("user-1", "access-token", expires_in=3600)
+        await store.delete_token("user-1")
+        return await store.get_token("user-1")
+
+    assert asyncio.run(scenario()) is None
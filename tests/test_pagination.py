@@ -0,0 +1,49 @@
+import asyncio
+import base64
+from datetime import datetime
+
+import orjson
+import pytest
+
+from pagination import decode_cursor, encode_cursor, ndjson_rows
+
+
+def test_cursor_round_trip():
+    row = {"timestamp": datetime(2024, 5, 1, 12, 30, 15, 123456), "id": "a/b+c?d", "client_name": "x"}
+    cursor = encode_cursor(row)
+    assert "=" not in cursor
+    assert set(cursor) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+    assert decode_cursor(cursor) == (row["timestamp"], "a/b+c?d")
+
+
+def test_decoded_cursors_keep_the_sort_order():
+    earlier = {"timestamp": datetime(2024, 1, 1), "id": "b"}
+    later = {"timestamp": datetime(2024, 1, 1), "id": "c"}
+    assert decode_cursor(encode_cursor(earlier)) < decode_cursor(encode_cursor(later))
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not a cursor",
+    "!!!!",
+    base64.urlsafe_b64encode(b"{}").decode(),
+    base64.urlsafe_b64encode(b'["yesterday","id"]').decode(),
+    base64.urlsafe_b64encode(b'["2024-01-01T00:00:00"]').decode(),
+    "é",
+])
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_ndjson_rows():
+    async def rows():
+        yield {"id": "1", "timestamp": datetime(2024, 1, 1)}
+        yield {"id": "2"}
+
+    async def collect():
+        return [line async for line in ndjson_rows(rows())]
+
+    lines = asyncio.run(collect())
+    assert [orjson.loads(line) for line in lines] == [{"id": "1", "timestamp": "2024-01-01T00:00:00"}, {"id": "2"}]
+    assert all(line.endswith(b"\n") for line in lines)
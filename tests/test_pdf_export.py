@@ -0,0 +1,118 @@
+import asyncio
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+import pdf_export
+from pdf_export import ExportQueueFull, ExportTimeout, PdfExporter
+
+
+# Run in the spawned workers, which import them from this module
+
+
+def no_warm_up():
+    pass
+
+
+def sleep_then_echo(html: str) -> bytes:
+    time.sleep(float(html))
+    return html.encode()
+
+
+def crash_once(html: str) -> bytes:
+    # The marker file outlives the worker, so only the first attempt dies
+    if not os.path.exists(html):
+        open(html, "w").close()
+        os._exit(1)
+    return b"recovered"
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    monkeypatch.setattr(pdf_export, "_warm_worker", no_warm_up)
+    exporter = PdfExporter(pool_size=1, max_queue=0, job_timeout=5)
+    yield exporter
+    exporter.shutdown()
+
+
+async def settle(exporter: PdfExporter):
+    """Wait for finished jobs to hand back their slots"""
+    for _ in range(200):
+        if exporter.pending == 0:
+            return
+        await asyncio.sleep(0.01)
+
+
+def test_exports_html_to_pdf():
+    exporter = PdfExporter(pool_size=1, max_queue=0, job_timeout=60)
+    try:
+        pdf = asyncio.run(exporter.export("<html><body><h1>Ada Lovelace</h1></body></html>"))
+    finally:
+        exporter.shutdown()
+    assert pdf.startswith(b"%PDF")
+
+
+def test_jobs_beyond_the_queue_are_rejected(exporter, monkeypatch):
+    monkeypatch.setattr(pdf_export, "html_to_pdf", sleep_then_echo)
+
+    async def scenario():
+        running = asyncio.create_task(exporter.export("0.5"))
+        await asyncio.sleep(0)
+        with pytest.raises(ExportQueueFull):
+            await exporter.export("0")
+        return await running
+
+    assert asyncio.run(scenario()) == b"0.5"
+    assert exporter.pending == 0
+
+
+def test_running_job_is_killed_on_timeout(exporter, monkeypatch):
+    monkeypatch.setattr(pdf_export, "html_to_pdf", sleep_then_echo)
+    exporter.job_timeout = 0.5
+
+    async def scenario():
+        exporter.start()
+        # Let the worker start so the job is running, not queued, at the timeout
+        assert await exporter.export("0") == b"0"
+        workers = list(exporter._executor._processes.values())
+
+        started = time.monotonic()
+        with pytest.raises(ExportTimeout):
+            await exporter.export("30")
+        timed_out = time.monotonic() - started
+        await settle(exporter)
+        return workers, timed_out, await exporter.export("0")
+
+    workers, timed_out, after = asyncio.run(scenario())
+    assert timed_out < 5
+    for worker in workers:
+        worker.join(5)
+        assert not worker.is_alive()
+    # The slot was freed and the new pool takes jobs
+    assert exporter.pending == 0
+    assert after == b"0"
+
+
+def test_broken_pool_is_replaced_and_the_job_retried(exporter, monkeypatch, tmp_path):
+    monkeypatch.setattr(pdf_export, "html_to_pdf", crash_once)
+
+    result = asyncio.run(exporter.export(str(tmp_path / "crashed")))
+    assert result == b"recovered"
+    assert exporter.pending == 0
+
+
+def test_retry_after_a_broken_pool_respects_the_queue_limit(exporter, monkeypatch):
+    attempts = []
+
+    async def broken_while_busy(html):
+        attempts.append(html)
+        # Another request takes the slot the dead job freed
+        exporter._pending += 1
+        raise BrokenProcessPool()
+
+    monkeypatch.setattr(exporter, "_run", broken_while_busy)
+    with pytest.raises(ExportQueueFull):
+        asyncio.run(exporter.export("<html></html>"))
+    assert len(attempts) == 1
@@ -0,0 +1,164 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import profile_cache
+from profile_cache import ProfileCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=0.0)
+    monkeypatch.setattr(profile_cache, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def test_entries_expire_after_the_ttl(clock):
+    async def scenario():
+        cache = ProfileCache(ttl=10)
+        await cache.set("ada", {"user_id": "ada"})
+        clock.now = 9
+        fresh = await cache.get("ada")
+        clock.now = 10
+        return fresh, await cache.get("ada"), cache.stats
+
+    fresh, expired, stats = asyncio.run(scenario())
+    assert fresh == {"user_id": "ada"}
+    assert expired is None
+    assert (stats["local_hits"], stats["misses"]) == (1, 1)
+
+
+def test_least_recently_used_entries_are_evicted():
+    async def scenario():
+        cache = ProfileCache(max_entries=2)
+        await cache.set("ada", {"user_id": "ada"})
+        await cache.set("bob", {"user_id": "bob"})
+        await cache.get("ada")
+        await cache.set("cy", {"user_id": "cy"})
+        return [await cache.get(user_id) is not None for user_id in ("ada", "bob", "cy")]
+
+    assert asyncio.run(scenario()) == [True, False, True]
+
+
+def test_callers_get_their_own_copies():
+    async def scenario():
+        cache = ProfileCache()
+        profile = {"user_id": "ada", "skills": ["python"]}
+        await cache.set("ada", profile)
+        profile["skills"].append("written after set")
+        (await cache.get("ada"))["skills"].append("written after get")
+        return await cache.get("ada")
+
+    assert asyncio.run(scenario())["skills"] == ["python"]
+
+
+def test_invalidation_drops_the_entry_and_notifies_listeners():
+    notified = []
+
+    async def listener(user_id):
+        notified.append(user_id)
+
+    async def failing(user_id):
+        raise RuntimeError("listener bug")
+
+    async def scenario():
+        cache = ProfileCache()
+        cache.add_listener(failing)
+        cache.add_listener(listener)
+        await cache.set("ada", {"user_id": "ada"})
+        await cache.invalidate("ada")
+        return await cache.get("ada"), cache.stats["invalidations"]
+
+    assert asyncio.run(scenario()) == (None, 1)
+    # A failing listener does not keep the others from running
+    assert notified == ["ada"]
+
+
+async def eventually(condition, timeout: float = 5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+def shared_caches(count: int):
+    """Caches wired to one in-process Redis, as workers sharing a server would be"""
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    caches = []
+    for _ in range(count):
+        cache = ProfileCache(redis_url="redis://shared")
+        cache.redis = fakeredis.FakeAsyncRedis(server=server)
+        cache._listener = asyncio.create_task(cache._listen_for_invalidations())
+        caches.append(cache)
+    return server, caches
+
+
+def test_invalidations_reach_other_workers():
+    notified = {0: [], 1: []}
+
+    async def scenario():
+        _, (writer, reader) = shared_caches(2)
+        for n, cache in enumerate((writer, reader)):
+            async def listener(user_id, n=n):
+                notified[n].append(user_id)
+
+            cache.add_listener(listener)
+        try:
+            await writer.set("ada", {"user_id": "ada", "headline": "old"})
+            # Read through the shared tier into the reader's local tier
+            assert (await reader.get("ada"))["headline"] == "old"
+            assert reader.stats["redis_hits"] == 1
+            await asyncio.sleep(0.1)
+
+            await writer.invalidate("ada")
+            await eventually(lambda: notified[1])
+            return await reader.get("ada")
+        finally:
+            await writer.close()
+            await reader.close()
+
+    assert asyncio.run(scenario()) is None
+    # The writer notified its own listeners directly and skipped its echo
+    assert notified == {0: ["ada"], 1: ["ada"]}
+
+
+def test_a_lost_channel_clears_the_local_tier_and_resyncs():
+    resyncs = []
+
+    async def resync():
+        resyncs.append(True)
+
+    async def scenario():
+        _, (cache,) = shared_caches(1)
+        cache.add_resync_listener(resync)
+        # The listener task has not run yet, so its first subscription gets
+        # a channel that drops once ``dropped`` is set
+        pubsub = cache.redis.pubsub
+        dropped = asyncio.Event()
+
+        def dropping_pubsub():
+            channel = pubsub()
+            if not dropped.is_set():
+                async def listen():
+                    await dropped.wait()
+                    raise ConnectionError("connection reset by peer")
+                    yield
+
+                channel.listen = listen
+            return channel
+
+        cache.redis.pubsub = dropping_pubsub
+        try:
+            await cache.set("ada", {"user_id": "ada"})
+            await asyncio.sleep(0.05)
+            assert not resyncs
+            dropped.set()
+            await eventually(lambda: resyncs)
+            return dict(cache._local)
+        finally:
+            await cache.close()
+
+    assert asyncio.run(scenario()) == {}
+    assert resyncs == [True]
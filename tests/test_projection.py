@@ -0,0 +1,83 @@
+import time
+import uuid
+
+from storage.mongo import MongoProfileRepository, projection
+
+
+def create_profile(api, **fields) -> str:
+    user_id = f"projection-{uuid.uuid4().hex[:8]}"
+    response = api.post("/api/test-create-profile", json={
+        "user_id": user_id, "first_name": "Ada", "last_name": "Lovelace", "skills": ["python"],
+        "profile_picture": "https://media.licdn.com/ada.jpg", **fields
+    })
+    assert response.status_code == 201
+    return user_id
+
+
+def finished_job(api, job_id: str, timeout: float = 30) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = api.get(f"/api/jobs/{job_id}").json()
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_mongo_reads_only_the_requested_fields():
+    assert projection(["user_id", "skills"]) == {"_id": 0, "user_id": 1, "skills": 1}
+
+    class Database:
+        linkedin_profiles = None
+
+    # Full reads are projected to the model's fields too
+    assert MongoProfileRepository(Database(), ["user_id", "first_name"]).projection == {
+        "_id": 0, "user_id": 1, "first_name": 1
+    }
+
+
+def test_only_the_requested_fields_are_returned(api, server):
+    user_id = create_profile(api)
+    for cached in (False, True):
+        if cached:
+            # A full read fills the profile cache; the projection then comes from memory
+            api.get(f"/api/profile/{user_id}")
+        else:
+            server.profile_cache._local.pop(user_id, None)
+        response = api.get(f"/api/profile/{user_id}", params={"fields": "first_name, skills,user_id"})
+        assert response.status_code == 200
+        assert response.json() == {"user_id": user_id, "first_name": "Ada", "skills": ["python"]}
+
+
+def test_projected_pictures_are_proxied(api, server):
+    user_id = create_profile(api)
+    body = api.get(f"/api/profile/{user_id}", params={"fields": "profile_picture"}).json()
+    assert set(body) == {"user_id", "profile_picture"}
+    assert body["profile_picture"] == server.proxied_image_url("https://media.licdn.com/ada.jpg", "photo")
+
+
+def test_unknown_fields_and_profiles(api):
+    user_id = create_profile(api)
+    response = api.get(f"/api/profile/{user_id}", params={"fields": "first_name,password"})
+    assert response.status_code == 400
+    assert "password" in response.json()["detail"]
+    assert api.get("/api/profile/projection-missing", params={"fields": "first_name"}).status_code == 404
+
+
+def test_slim_results_carry_only_identifiers(api):
+    user_id = create_profile(api)
+    full = api.post("/api/generate-resume", params={"user_id": user_id, "template_id": "modern"}).json()
+    result = finished_job(api, full["job_id"])["result"]
+    assert result["data"]["profile"]["first_name"] == "Ada"
+
+    slim = api.post("/api/generate-resume", params={"user_id": user_id, "template_id": "modern", "slim": True}).json()
+    job = finished_job(api, slim["job_id"])
+    assert job["status"] == "succeeded"
+    # The unchanged profile reuses the first resume
+    assert job["result"] == {
+        "message": "Resume generated successfully",
+        "resume_id": result["resume_id"],
+        "user_id": user_id,
+        "template_id": "modern",
+        "profile_version": result["data"]["profile_version"],
+    }
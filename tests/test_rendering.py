@@ -0,0 +1,59 @@
+import pytest
+
+from rendering import (
+    PHOTO_TEMPLATES, TEMPLATE_VERSIONS, UnknownTemplateError, get_template, load_templates, render_context,
+    render_resume_html,
+)
+
+
+PROFILE = {
+    "_id": "ignored",
+    "user_id": "ada",
+    "first_name": "Ada",
+    "last_name": "Lovelace",
+    "headline": "Analyst",
+    "summary": "Writes <script>alert(1)</script> & notes",
+    "profile_picture": "https://media.licdn.com/ada.jpg",
+    "skills": ["Python", "Mathematics"],
+    "experience": None,
+}
+
+
+def test_templates_are_compiled_once():
+    compiled = load_templates()
+    assert set(compiled) == set(TEMPLATE_VERSIONS)
+    assert all(get_template(template_id) is compiled[template_id] for template_id in TEMPLATE_VERSIONS)
+    assert load_templates() is compiled
+
+
+def test_unknown_templates_are_refused():
+    with pytest.raises(UnknownTemplateError):
+        get_template("nosuch")
+    with pytest.raises(KeyError):
+        render_resume_html(PROFILE, "../_base")
+
+
+def test_context_holds_only_render_fields():
+    context = render_context(PROFILE)
+    assert "_id" not in context and "user_id" not in context
+    assert context["full_name"] == "Ada Lovelace"
+    assert context["experience"] == [] and context["education"] == []
+    assert render_context({"last_name": "Lovelace"})["full_name"] == "Lovelace"
+
+
+@pytest.mark.parametrize("template_id", sorted(TEMPLATE_VERSIONS))
+def test_every_template_renders_the_profile_escaped(template_id):
+    html = render_resume_html(PROFILE, template_id)
+    assert "Ada Lovelace" in html
+    assert "<li>Python</li>" in html and "<li>Mathematics</li>" in html
+    assert "<script>" not in html
+    assert "&lt;script&gt;alert(1)&lt;/script&gt; &amp; notes" in html
+    assert ("media.licdn.com/ada.jpg" in html) is (template_id in PHOTO_TEMPLATES)
+
+
+def test_picture_source_can_be_replaced_or_left_out():
+    template_id = sorted(PHOTO_TEMPLATES)[0]
+    embedded = render_resume_html(PROFILE, template_id, picture_src="data:image/jpeg;base64,AAAA")
+    assert 'src="data:image/jpeg;base64,AAAA"' in embedded
+    assert "media.licdn.com" not in embedded
+    assert 'class="photo"' not in render_resume_html(PROFILE, template_id, picture_src="")
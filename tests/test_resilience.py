@@ -0,0 +1,119 @@
+from types import SimpleNamespace
+
+import pytest
+
+import resilience
+from resilience import CircuitBreaker, RetryBudget
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience, "time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    changes = []
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30, on_change=changes.append)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.retry_after() == 30
+    assert changes == [CircuitBreaker.OPEN]
+
+
+def test_breaker_success_resets_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_lets_one_probe_through_after_reset_timeout(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 29
+    assert not breaker.allow()
+
+    clock.now += 1
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.retry_after() == 0
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_breaker_probe_success_closes(clock):
+    changes = []
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, on_change=changes.append)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+    assert changes == [CircuitBreaker.OPEN, CircuitBreaker.HALF_OPEN, CircuitBreaker.CLOSED]
+
+
+def test_breaker_probe_failure_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30)
+    for _ in range(5):
+        breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.retry_after() == 30
+
+
+def test_breaker_unreported_probe_stops_blocking_after_reset_timeout(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+
+
+def test_breaker_snapshot(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 10.04
+    assert breaker.snapshot() == {"state": "open", "consecutive_failures": 1, "retry_after": 20.0}
+
+
+def test_budget_allows_the_floor_without_traffic(clock):
+    budget = RetryBudget(ratio=0.2, min_per_second=0.5, window=10)
+    assert [budget.try_spend() for _ in range(6)] == [True] * 5 + [False]
+
+
+def test_budget_grows_with_recent_requests(clock):
+    budget = RetryBudget(ratio=0.2, min_per_second=0.1, window=10)
+    for _ in range(50):
+        budget.record_request()
+    spent = sum(budget.try_spend() for _ in range(20))
+    assert spent == 10
+
+
+def test_budget_refills_as_the_window_slides(clock):
+    budget = RetryBudget(ratio=0.2, min_per_second=0.1, window=10)
+    assert budget.try_spend()
+    assert not budget.try_spend()
+    clock.now += 10.5
+    assert budget.try_spend()
@@ -0,0 +1,178 @@
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+
+from search_index import BLOCK_SIZE, SearchIndex
+
+
+def profile(user_id: str, **fields) -> Dict[str, Any]:
+    return {"user_id": user_id, **fields}
+
+
+def search(index: SearchIndex, query: str, **kwargs):
+    return asyncio.run(index.search(query, **kwargs))
+
+
+def users(index: SearchIndex, query: str, **kwargs) -> List[str]:
+    return [user_id for user_id, _ in search(index, query, **kwargs)[1]]
+
+
+@pytest.fixture(params=[1, 1 << 17], ids=["segments", "tail"])
+def index(request) -> SearchIndex:
+    # flush_postings=1 writes a segment per profile, so merges and deletes
+    # inside segments are exercised as well as the unflushed tail
+    index = SearchIndex(flush_postings=request.param)
+    for document in [
+        profile("ada", skills=["python", "fastapi"], headline="Backend engineer", location="London"),
+        profile("bob", skills=["python"], headline="Data engineer", location="Berlin"),
+        profile("cy", skills=["java"], headline="Platform engineer", summary="Some python scripting"),
+        profile("di", skills=["pytorch"], headline="Researcher"),
+    ]:
+        index.update(document)
+    return index
+
+
+def test_all_words_must_match(index):
+    assert sorted(users(index, "python engineer", prefix=False)) == ["ada", "bob", "cy"]
+    assert users(index, "python fastapi", prefix=False) == ["ada"]
+    assert users(index, "python berlin", prefix=False) == ["bob"]
+    assert search(index, "python nosuchword", prefix=False) == (0, [])
+    assert search(index, "!!!") == (0, [])
+
+
+def test_last_word_and_starred_words_match_as_prefixes(index):
+    assert sorted(users(index, "py")) == ["ada", "bob", "cy", "di"]
+    assert users(index, "py", prefix=False) == []
+    assert users(index, "fast* engineer", prefix=False) == ["ada"]
+    assert users(index, "engineer lond") == ["ada"]
+
+
+def test_exact_match_outranks_prefix_match():
+    index = SearchIndex()
+    index.update(profile("script", skills=["javascript"]))
+    index.update(profile("exact", skills=["java"]))
+    assert users(index, "java") == ["exact", "script"]
+    assert users(index, "java", prefix=False) == ["exact"]
+
+
+def test_prefix_expansion_is_capped():
+    index = SearchIndex(max_prefix_terms=2)
+    for n, term in enumerate(["pa", "pb", "pc", "pd"]):
+        index.update(profile(f"user-{n}", skills=[term]))
+    assert index._expand("p") == ["pa", "pb"]
+    assert sorted(users(index, "p")) == ["user-0", "user-1"]
+    # An exact match is always kept
+    assert users(index, "pd") == ["user-3"]
+
+
+def test_field_weights_order_results():
+    index = SearchIndex()
+    index.update(profile("summary", summary="Kafka"))
+    index.update(profile("experience", experience=[{"description": "Kafka"}]))
+    index.update(profile("location", location="Kafka"))
+    index.update(profile("headline", headline="Kafka"))
+    index.update(profile("skill", skills=["Kafka"]))
+    assert users(index, "kafka") == ["skill", "headline", "location", "experience", "summary"]
+
+
+def test_update_replaces_the_indexed_profile(index):
+    index.update(profile("bob", skills=["rust"], headline="Systems engineer"))
+    assert "bob" not in users(index, "python")
+    assert users(index, "rust") == ["bob"]
+    assert len(index) == 4
+
+
+def test_removal_prunes_the_vocabulary():
+    index = SearchIndex(flush_postings=1)
+    index.update(profile("ada", skills=["zyzzyva", "python"]))
+    index.update(profile("bob", skills=["python"]))
+    index.remove("ada")
+
+    assert len(index) == 1
+    assert users(index, "zyz") == []
+    assert users(index, "python") == ["bob"]
+    # The segment holding only a removed profile was rewritten, taking the
+    # term's last posting with it
+    assert "zyzzyva" not in index._terms
+    assert index._expand("zy") == []
+    assert "python" in index._terms
+
+    index.update(profile("cy", skills=["zyzzyva"]))
+    assert index._expand("zy") == ["zyzzyva"]
+    assert users(index, "zyz") == ["cy"]
+
+
+def test_paging_and_totals():
+    index = SearchIndex(flush_postings=64)
+    for n in range(3 * BLOCK_SIZE):
+        # Distinct lengths give distinct scores: shorter profiles rank higher
+        index.update(profile(f"user-{n:03}", skills=["go"], summary=" ".join(["filler"] * n)))
+    total, everything = search(index, "go", prefix=False, limit=1000)
+    assert total == 3 * BLOCK_SIZE
+    assert [user_id for user_id, _ in everything] == [f"user-{n:03}" for n in range(3 * BLOCK_SIZE)]
+
+    # Reading blocks best-first and stopping early gives the same pages
+    for offset, limit in [(0, 5), (7, 10), (BLOCK_SIZE - 3, 6), (3 * BLOCK_SIZE - 2, 10)]:
+        total, page = search(index, "go", prefix=False, offset=offset, limit=limit)
+        assert total == 3 * BLOCK_SIZE
+        assert page == everything[offset:offset + limit]
+
+
+def test_segments_and_tail_rank_alike():
+    documents = [
+        profile(f"user-{n}", skills=["python"] if n % 2 else ["java"], headline=f"engineer level{n % 5}",
+                summary=" ".join(["python"] * (n % 3)))
+        for n in range(60)
+    ]
+    queries = ("python", "engineer le", "level", "java engineer")
+    ranked, matched = [], []
+    for flush_postings in (1, 7, 1 << 17):
+        index = SearchIndex(flush_postings=flush_postings)
+        for document in documents:
+            index.update(document)
+        ranked.append([search(index, query, limit=100) for query in queries])
+        for n in range(0, 60, 4):
+            index.remove(f"user-{n}")
+        # Document frequencies only drop once a segment is merged, so scores
+        # may differ after removals but the matches may not
+        matched.append([(total, sorted(user_id for user_id, _ in hits))
+                        for total, hits in (search(index, query, limit=100) for query in queries)])
+    assert ranked[0] == ranked[1] == ranked[2]
+    assert matched[0] == matched[1] == matched[2]
+    assert all(total == 45 for total, _ in matched[0][1:3])
+
+
+def test_build_does_not_overwrite_newer_writes():
+    index = SearchIndex()
+
+    async def scenario():
+        started = asyncio.Event()
+        resume = asyncio.Event()
+
+        async def profiles():
+            yield profile("ada", skills=["cobol"])
+            started.set()
+            await resume.wait()
+            # Read from storage before the write below reached the index
+            yield profile("bob", skills=["cobol"])
+            yield profile("cy", skills=["cobol"])
+
+        build = asyncio.create_task(index.build(profiles()))
+        await started.wait()
+        index.update(profile("bob", skills=["python"]))
+        index.remove("cy")
+        resume.set()
+        await build
+        return await index.search("cobol", prefix=False), await index.search("python", prefix=False)
+
+    (_, cobol), (_, python) = asyncio.run(scenario())
+    assert index.ready
+    assert [user_id for user_id, _ in cobol] == ["ada"]
+    assert [user_id for user_id, _ in python] == ["bob"]
+
+
+def test_large_queries_are_scored_on_the_executor(index, monkeypatch):
+    inline = [search(index, query) for query in ("python engineer", "py", "engineer")]
+    monkeypatch.setattr("search_index.INLINE_POSTINGS", 0)
+    assert [search(index, query) for query in ("python engineer", "py", "engineer")] == inline
@@ -0,0 +1,48 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+from pymongo.errors import BulkWriteError
+
+from storage.mongo import MongoStatusRepository
+
+
+class Collection:
+    def __init__(self, refused=()):
+        self.refused = set(refused)
+        self.documents = []
+
+    async def insert_one(self, document):
+        self.documents.append(document)
+
+    async def insert_many(self, documents, ordered=True):
+        errors = []
+        for index, document in enumerate(documents):
+            if document["id"] in self.refused:
+                errors.append({"index": index, "code": 11000, "errmsg": "duplicate key"})
+            else:
+                self.documents.append(document)
+        if errors:
+            raise BulkWriteError({"nInserted": len(documents) - len(errors), "writeErrors": errors})
+
+
+def checks(*ids):
+    return [{"id": check_id, "client_name": "probe", "timestamp": datetime(2024, 1, 1)} for check_id in ids]
+
+
+def insert(collection: Collection, documents):
+    repository = MongoStatusRepository(SimpleNamespace(status_checks=collection), ["id", "client_name", "timestamp"])
+    return asyncio.run(repository.insert_many(documents))
+
+
+def test_full_batch_reports_no_failures():
+    collection = Collection()
+    assert insert(collection, checks("a", "b", "c")) == []
+    assert insert(collection, checks("d")) == []
+    assert [document["id"] for document in collection.documents] == ["a", "b", "c", "d"]
+
+
+def test_partial_batch_reports_the_refused_ids():
+    collection = Collection(refused={"b", "d"})
+    assert insert(collection, checks("a", "b", "c", "d")) == ["b", "d"]
+    assert [document["id"] for document in collection.documents] == ["a", "c"]
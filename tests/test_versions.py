@@ -0,0 +1,179 @@
+import asyncio
+import copy
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+import pytest
+
+from storage.base import VersionRepository
+from versions import apply_patch, load_versions, make_patch, record_version, resume_profile, version_hash
+
+
+class MemoryVersions(VersionRepository):
+    def __init__(self):
+        self.records: Dict[str, List[Dict[str, Any]]] = {}
+        self.reads = 0
+
+    async def latest(self, user_id: str) -> Optional[Dict[str, Any]]:
+        records = self.records.get(user_id)
+        return copy.deepcopy(records[-1]) if records else None
+
+    async def get_many(self, user_id: str, versions: Iterable[int]) -> List[Dict[str, Any]]:
+        self.reads += 1
+        wanted = set(versions)
+        return [copy.deepcopy(record) for record in self.records.get(user_id, []) if record["version"] in wanted]
+
+    async def find_by_hash(self, user_id: str, content_hash: str) -> Optional[int]:
+        for record in self.records.get(user_id, []):
+            if record["hash"] == content_hash:
+                return record["version"]
+        return None
+
+    async def insert(self, record: Mapping[str, Any]) -> bool:
+        records = self.records.setdefault(record["user_id"], [])
+        if any(existing["version"] == record["version"] for existing in records):
+            return False
+        records.append(copy.deepcopy(dict(record)))
+        return True
+
+    async def list(self, user_id: str, before: Optional[int], limit: int) -> List[Dict[str, Any]]:
+        records = [record for record in reversed(self.records.get(user_id, []))
+                   if before is None or record["version"] < before]
+        return records[:limit]
+
+
+def profile(**changes) -> Dict[str, Any]:
+    document = {
+        "user_id": "user-1",
+        "first_name": "Ada",
+        "headline": "Engineer",
+        "summary": "Builds and operates backend services. " * 10,
+        "experience": [
+            {"title": "Engineer", "company": "Acme", "description": "Shipped things."},
+            {"title": "Intern", "company": "Initech", "description": "Fixed printers."},
+        ],
+        "skills": ["python", "mongodb"],
+    }
+    document.update(changes)
+    return document
+
+
+@pytest.mark.parametrize("old, new", [
+    ({"a": 1}, {"a": 1}),
+    ({"a": 1, "b": 2}, {"a": 3, "c": 4}),
+    ({"a": {"b/c": 1, "d~e": 2}}, {"a": {"b/c": 5}}),
+    ([1, 2, 3], [1, 5]),
+    ([1], [1, 2, 3]),
+    ({"list": [{"x": 1}, {"x": 2}]}, {"list": [{"x": 1, "y": 2}]}),
+    ({"a": 1}, [1, 2]),
+])
+def test_patch_round_trip(old, new):
+    original = copy.deepcopy(old)
+    assert apply_patch(old, make_patch(old, new)) == new
+    assert old == original
+
+
+def test_patch_only_records_changed_fields():
+    old = profile()
+    new = copy.deepcopy(old)
+    new["experience"][1]["title"] = "Engineer II"
+    assert make_patch(old, new) == [{"op": "replace", "path": "/experience/1/title", "value": "Engineer II"}]
+
+
+def test_versions_are_numbered_and_rebuilt():
+    versions = MemoryVersions()
+    edits = [profile(headline=f"Engineer {n}") for n in range(5)]
+
+    async def scenario():
+        numbers = [await record_version(versions, "user-1", edit, rebase_interval=3) for edit in edits]
+        return numbers, await load_versions(versions, "user-1", numbers)
+
+    numbers, profiles = asyncio.run(scenario())
+    assert numbers == [1, 2, 3, 4, 5]
+    assert [profiles[number] for number in numbers] == edits
+    stored = versions.records["user-1"]
+    # Patched against the base of their segment, rebased every three versions
+    assert [record["base_version"] for record in stored] == [1, 1, 1, 4, 4]
+    assert ["profile" in record for record in stored] == [True, False, False, True, False]
+
+
+def test_load_versions_reads_missing_bases_once():
+    versions = MemoryVersions()
+
+    async def scenario():
+        for n in range(3):
+            await record_version(versions, "user-1", profile(headline=f"Engineer {n}"), rebase_interval=10)
+        versions.reads = 0
+        return await load_versions(versions, "user-1", [2, 3])
+
+    profiles = asyncio.run(scenario())
+    assert profiles[3]["headline"] == "Engineer 2"
+    assert versions.reads == 2
+
+
+def test_unchanged_and_earlier_profiles_reuse_their_version():
+    versions = MemoryVersions()
+    first, second = profile(), profile(headline="Manager")
+
+    async def scenario():
+        return [
+            await record_version(versions, "user-1", document, rebase_interval=10)
+            for document in (first, first, second, {**first, "_id": "ignored"})
+        ]
+
+    assert asyncio.run(scenario()) == [1, 1, 2, 1]
+    assert len(versions.records["user-1"]) == 2
+
+
+def test_large_change_is_stored_as_a_new_base():
+    versions = MemoryVersions()
+
+    async def scenario():
+        await record_version(versions, "user-1", profile(), rebase_interval=10)
+        await record_version(versions, "user-1", profile(summary="Rewritten. " * 60), rebase_interval=10)
+
+    asyncio.run(scenario())
+    assert "profile" in versions.records["user-1"][1]
+
+
+def test_record_version_retries_a_lost_race():
+    rival = profile(headline="Rival")
+
+    class Racing(MemoryVersions):
+        raced = False
+
+        async def insert(self, record):
+            if not self.raced:
+                self.raced = True
+                await MemoryVersions.insert(self, {**record, "hash": version_hash(rival), "profile": rival})
+            return await MemoryVersions.insert(self, record)
+
+    versions = Racing()
+    number = asyncio.run(record_version(versions, "user-1", profile(), rebase_interval=10))
+    assert number == 2
+    assert [record["version"] for record in versions.records["user-1"]] == [1, 2]
+
+
+def test_resume_profile_reads_every_format():
+    versions = MemoryVersions()
+    current = profile(headline="Versioned")
+    snapshot = profile(headline="Snapshot")
+    snapshots = {version_hash(snapshot): snapshot}
+
+    async def load_snapshot(profile_hash):
+        return snapshots.get(profile_hash)
+
+    storage = SimpleNamespace(versions=versions, resumes=SimpleNamespace(load_snapshot=load_snapshot))
+    legacy = profile(headline="Embedded")
+
+    async def scenario():
+        number = await record_version(versions, "user-1", current, rebase_interval=10)
+        return [
+            await resume_profile(storage, {"user_id": "user-1", "profile": legacy}),
+            await resume_profile(storage, {"user_id": "user-1", "profile_version": number}),
+            await resume_profile(storage, {"user_id": "user-1", "profile_hash": version_hash(snapshot)}),
+            await resume_profile(storage, {"user_id": "user-1", "profile_hash": "missing"}),
+            await resume_profile(storage, {"user_id": "user-1", "profile_version": 99}),
+        ]
+
+    assert asyncio.run(scenario()) == [legacy, current, snapshot, None, None]
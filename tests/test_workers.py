@@ -0,0 +1,62 @@
+import asyncio
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+
+BACKEND = Path(__file__).resolve().parent.parent / "backend"
+
+
+def test_several_workers_require_redis(server, monkeypatch):
+    monkeypatch.setattr(server, "WEB_CONCURRENCY", 2)
+    monkeypatch.setattr(server, "REDIS_URL", None)
+
+    async def start():
+        async with server.lifespan(server.app):
+            pass
+
+    # Refused before any client, pool or task is started
+    with pytest.raises(RuntimeError, match="REDIS_URL"):
+        asyncio.run(start())
+
+
+def python(code: str, multiproc_dir: Path) -> str:
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(multiproc_dir), "PYTHONPATH": str(BACKEND)}
+    result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+WORKER = """
+import os
+from metrics import EVENT_LOOP_LAG, REQUEST_LATENCY, {finish}
+REQUEST_LATENCY.labels("GET", "/api/profile/{{user_id}}", "200").observe(0.01)
+EVENT_LOOP_LAG.set(0.5)
+{finish}() if "{finish}" == "mark_worker_dead" else None
+print(os.getpid())
+"""
+
+SCRAPE = """
+import sys
+from metrics import render_latest
+sys.stdout.write(render_latest()[0].decode())
+"""
+
+
+def test_a_scrape_merges_every_worker(tmp_path):
+    live = python(WORKER.format(finish="multiprocess_enabled"), tmp_path).strip()
+    stopped = python(WORKER.format(finish="mark_worker_dead"), tmp_path).strip()
+
+    lines = python(SCRAPE, tmp_path).splitlines()
+    count = next(line for line in lines
+                 if line.startswith("http_request_duration_seconds_count") and "/api/profile/{user_id}" in line)
+    # Both workers' requests, whichever worker answered the scrape
+    assert count.endswith(" 2.0")
+    lag = [line for line in lines if line.startswith("event_loop_lag_seconds{")]
+    # One series per live worker (the scraping process is one too); a worker
+    # that shut down drops its own
+    assert f'event_loop_lag_seconds{{pid="{live}"}} 0.5' in lag
+    assert not any(f'pid="{stopped}"' in line for line in lag)
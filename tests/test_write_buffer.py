@@ -0,0 +1,161 @@
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+
+from write_buffer import BufferFull, WriteBehindBuffer
+
+
+class Store:
+    def __init__(self, fail: int = 0, refuse: int = 0):
+        self.batches: List[List[Dict[str, Any]]] = []
+        self.fail = fail
+        self.refuse = refuse
+
+    async def write(self, batch: List[Dict[str, Any]]) -> int:
+        if self.fail:
+            self.fail -= 1
+            raise ConnectionError("store unavailable")
+        self.batches.append(list(batch))
+        return len(batch) - self.refuse
+
+
+def docs(count: int, start: int = 0) -> List[Dict[str, Any]]:
+    return [{"n": n} for n in range(start, start + count)]
+
+
+def test_full_batch_is_flushed_without_waiting_for_the_interval():
+    store = Store()
+
+    async def scenario():
+        buffer = WriteBehindBuffer(store.write, max_batch=3, flush_interval=60)
+        buffer.start()
+        await buffer.add(docs(7))
+        await asyncio.sleep(0.01)
+        flushed = list(store.batches)
+        await buffer.close()
+        return flushed, buffer
+
+    flushed, buffer = asyncio.run(scenario())
+    assert flushed == [docs(3), docs(3, 3)]
+    assert store.batches[-1] == docs(1, 6)
+    assert buffer.stats["written"] == 7
+    assert buffer.pending == 0
+
+
+def test_partial_batch_is_flushed_after_the_interval():
+    store = Store()
+
+    async def scenario():
+        buffer = WriteBehindBuffer(store.write, max_batch=100, flush_interval=0.02)
+        buffer.start()
+        await buffer.add(docs(2))
+        assert store.batches == []
+        await asyncio.sleep(0.1)
+        flushed = list(store.batches)
+        await buffer.close()
+        return flushed
+
+    assert asyncio.run(scenario()) == [docs(2)]
+
+
+def test_failed_batch_stays_queued_and_is_retried():
+    store = Store(fail=1)
+
+    async def scenario():
+        buffer = WriteBehindBuffer(store.write, max_batch=10)
+        await buffer.add(docs(4))
+        assert not await buffer.flush()
+        assert buffer.pending == 4
+        assert await buffer.flush()
+        return buffer
+
+    buffer = asyncio.run(scenario())
+    assert store.batches == [docs(4)]
+    assert buffer.stats["retried"] == 4
+    assert buffer.stats["written"] == 4
+    assert buffer.stats["failed"] == 0
+
+
+def test_refused_documents_are_counted_not_retried():
+    store = Store(refuse=1)
+
+    async def scenario():
+        buffer = WriteBehindBuffer(store.write, max_batch=10)
+        await buffer.add(docs(4))
+        await buffer.flush()
+        return buffer
+
+    buffer = asyncio.run(scenario())
+    assert buffer.pending == 0
+    assert buffer.stats["written"] == 3
+    assert buffer.stats["failed"] == 1
+
+
+def test_reject_overflow_raises_when_full():
+    store = Store()
+
+    async def scenario():
+        buffer = WriteBehindBuffer(store.write, max_batch=10, max_pending=5, overflow="reject")
+        await buffer.add(docs(4))
+        with pytest.raises(BufferFull):
+            await buffer.add(docs(2))
+        with pytest.raises(BufferFull):
+            await buffer.add(docs(6))
+        await buffer.add(docs(1))
+        return buffer
+
+    buffer = asyncio.run(scenario())
+    assert buffer.pending == 5
+    assert buffer.stats["rejected"] == 8
+
+
+def test_block_overflow_waits_for_room():
+    store = Store()
+
+    async def scenario():
+        buffer = WriteBehindBuffer(store.write, max_batch=2, flush_interval=60, max_pending=4)
+        await buffer.add(docs(4))
+        adding = asyncio.create_task(buffer.add(docs(2, 4)))
+        await asyncio.sleep(0.01)
+        assert not adding.done()
+        await buffer.flush()
+        await asyncio.wait_for(adding, 1)
+        return buffer
+
+    buffer = asyncio.run(scenario())
+    assert buffer.pending == 4
+    assert store.batches == [docs(2)]
+
+
+def test_block_overflow_queues_oversized_adds_in_chunks():
+    store = Store()
+
+    async def scenario():
+        buffer = WriteBehindBuffer(store.write, max_batch=4, flush_interval=0.01, max_pending=4)
+        buffer.start()
+        await asyncio.wait_for(buffer.add(docs(10)), 1)
+        await buffer.close()
+
+    asyncio.run(scenario())
+    assert [doc for batch in store.batches for doc in batch] == docs(10)
+
+
+def test_close_drops_what_cannot_be_written():
+    store = Store(fail=100)
+
+    async def scenario():
+        buffer = WriteBehindBuffer(store.write, flush_interval=0)
+        await buffer.add(docs(3))
+        await buffer.close(attempts=2)
+        return buffer
+
+    buffer = asyncio.run(scenario())
+    assert store.fail == 98
+    assert buffer.pending == 0
+    assert buffer.stats["failed"] == 3
+
+
+def test_unknown_overflow_policy():
+    with pytest.raises(ValueError):
+        WriteBehindBuffer(Store().write, overflow="drop")